@@ -3,6 +3,7 @@
 # Применение миграций
 python server/manage.py makemigrations
 python server/manage.py migrate
+python server/manage.py createcachetable
 
 # Сбор статических файлов
 python server/manage.py collectstatic --noinput
@@ -4,7 +4,7 @@ from django.forms.models import BaseInlineFormSet
 
 from brick_main.models import (
     Alternate, Images, Links, Obj, Theme, ThemeLinks, ThemeObjLinks,
-    Color, KnownColor, Currency, ObjProduct, ObjProductPrice, WantedList,
+    Color, KnownColor, Currency, ExchangeRate, ObjProduct, ObjProductPrice, WantedList,
     WantedListProduct, Deliverys, Shops, Statusorder
 )
 
@@ -21,6 +21,7 @@ admin.site.register(ThemeObjLinks)
 admin.site.register(Color)
 admin.site.register(KnownColor)
 admin.site.register(Currency)
+admin.site.register(ExchangeRate)
 
 
 class LimitObjProductPrice(BaseInlineFormSet):
@@ -0,0 +1,106 @@
+"""
+Кэш результатов ProductAnalyticsAPIView по паре (тип, период).
+
+Результат считается свежим PERIOD_TTL[period] секунд: длинные окна меняются
+медленнее, поэтому живут дольше. Устаревший результат хранится ещё STALE_TTL и
+отдаётся сразу, а пересчёт уходит в фоновый поток. Пересчитывает ключ только тот,
+кто первым взял блокировку cache.add: остальные процессы продолжают отдавать
+устаревшее значение. Синхронно результат считается лишь для пустого кэша — его
+заранее заполняет команда warm_analytics_cache.
+
+Блокировки и прогрев действуют между процессами, потому что кэш общий:
+отдельный алиас analytics (DatabaseCache, см. CACHES в config/settings.py).
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache import caches
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+# Отдельный алиас: вытеснение записей других кэшей не удаляет результаты и блокировки
+cache = caches['analytics']
+
+PERIOD_TTL = {
+    'week': 5 * 60,
+    'month': 15 * 60,
+    '3month': 30 * 60,
+    'half_year': 60 * 60,
+    'year': 2 * 60 * 60,
+}
+# Сколько устаревший результат ещё можно отдавать, пока он пересчитывается
+STALE_TTL = 24 * 60 * 60
+# Время жизни блокировки пересчёта: если пересчитывающий процесс упал, ключ освободится
+LOCK_TTL = 60
+# Сколько ждать результата, который считает другой процесс, при пустом кэше
+COLD_WAIT = 5
+COLD_POLL_INTERVAL = 0.1
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='analytics-cache')
+
+
+def cache_key(obj_type, period):
+    return f'analytics:top:{obj_type}:{period}'
+
+
+def store(obj_type, period, compute):
+    data = compute(obj_type, period)
+    cache.set(cache_key(obj_type, period), (time.time() + PERIOD_TTL[period], data), PERIOD_TTL[period] + STALE_TTL)
+    return data
+
+
+def lock(obj_type, period):
+    """Блокировка пересчёта ключа; True — взята этим вызовом."""
+    return cache.add(cache_key(obj_type, period) + ':lock', 1, LOCK_TTL)
+
+
+def unlock(obj_type, period):
+    cache.delete(cache_key(obj_type, period) + ':lock')
+
+
+def _refresh_in_worker(obj_type, period, compute):
+    try:
+        store(obj_type, period, compute)
+    except Exception:
+        logger.exception("Analytics cache refresh failed: %s %s", obj_type, period)
+    finally:
+        unlock(obj_type, period)
+        # Соединение принадлежит потоку пула и иначе осталось бы открытым
+        connection.close()
+
+
+def get_cached(obj_type, period, compute):
+    """
+    Результат compute(obj_type, period) из кэша. Устаревший — отдаётся, а пересчёт
+    ставится в фон (не больше одного на ключ во всех процессах).
+    """
+    key = cache_key(obj_type, period)
+    entry = cache.get(key)
+    if entry is not None:
+        fresh_until, data = entry
+        if time.time() >= fresh_until and lock(obj_type, period):
+            _executor.submit(_refresh_in_worker, obj_type, period, compute)
+        return data
+
+    # Кэш пуст: считает первый, остальные недолго ждут его результата
+    if lock(obj_type, period):
+        try:
+            return store(obj_type, period, compute)
+        finally:
+            unlock(obj_type, period)
+
+    deadline = time.time() + COLD_WAIT
+    while time.time() < deadline:
+        time.sleep(COLD_POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[1]
+    return compute(obj_type, period)
+
+
+def refresh_all(obj_types, compute):
+    """Пересчитывает все пары (тип, период) — для прогрева и после пересборки сводок."""
+    for obj_type in obj_types:
+        for period in PERIOD_TTL:
+            store(obj_type, period, compute)
@@ -0,0 +1,244 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from utils.deferred import run_on_commit
+from utils.locks import DAILY_SALES, SHOP_DAYS, advisory_xact_lock
+
+# Продажи позиций одного заказа: прибавляются к строкам daily_sales за день заказа
+RECORD_ORDER_SQL = """
+INSERT INTO daily_sales (day, product_id, obj_type, quantity)
+SELECT %(day)s, order_item.product_id, obj.item_class, SUM(order_item.quantity)
+FROM order_item
+JOIN obj_product ON obj_product.id = order_item.product_id
+JOIN obj ON obj.id = obj_product.obj_id
+WHERE order_item.order_id = %(order)s
+GROUP BY order_item.product_id, obj.item_class
+ON CONFLICT (day, product_id) DO UPDATE SET quantity = daily_sales.quantity + EXCLUDED.quantity
+"""
+
+# Новый заказ в сводках магазина: прибавляется к строкам за день заказа
+RECORD_SHOP_STATS_SQL = """
+INSERT INTO shop_daily_stats (shop_id, day, status_id, orders, units, revenue)
+SELECT "order".shop_id, %(day)s, "order".status_id, 1,
+       COALESCE(SUM(order_item.quantity), 0), COALESCE(SUM(order_item.quantity * order_item.price), 0)
+FROM "order"
+LEFT JOIN order_item ON order_item.order_id = "order".id
+WHERE "order".id = %(order)s
+GROUP BY "order".shop_id, "order".status_id
+ON CONFLICT (shop_id, day, status_id) DO UPDATE SET
+    orders = shop_daily_stats.orders + EXCLUDED.orders,
+    units = shop_daily_stats.units + EXCLUDED.units,
+    revenue = shop_daily_stats.revenue + EXCLUDED.revenue
+"""
+
+RECORD_SHOP_SALES_SQL = """
+INSERT INTO shop_daily_sales (shop_id, day, product_id, units, revenue)
+SELECT "order".shop_id, %(day)s, order_item.product_id,
+       SUM(order_item.quantity), COALESCE(SUM(order_item.quantity * order_item.price), 0)
+FROM "order"
+JOIN order_item ON order_item.order_id = "order".id
+WHERE "order".id = %(order)s
+GROUP BY "order".shop_id, order_item.product_id
+ON CONFLICT (shop_id, day, product_id) DO UPDATE SET
+    units = shop_daily_sales.units + EXCLUDED.units,
+    revenue = shop_daily_sales.revenue + EXCLUDED.revenue
+"""
+
+# Пересборка из истории заказов за полуинтервал дней [start, end)
+REBUILD_SQL = """
+INSERT INTO daily_sales (day, product_id, obj_type, quantity)
+SELECT ("order".created_at AT TIME ZONE %(tz)s)::date, order_item.product_id, obj.item_class, SUM(order_item.quantity)
+FROM order_item
+JOIN "order" ON "order".id = order_item.order_id
+JOIN obj_product ON obj_product.id = order_item.product_id
+JOIN obj ON obj.id = obj_product.obj_id
+WHERE ("order".created_at AT TIME ZONE %(tz)s)::date >= %(start)s
+  AND ("order".created_at AT TIME ZONE %(tz)s)::date < %(end)s
+GROUP BY 1, order_item.product_id, obj.item_class
+"""
+
+# Пересчёт затронутых пар (продукт, день) из позиций заказов этих дней —
+# после изменения или удаления позиций и заказов
+DELETE_PRODUCT_DAYS_SQL = """
+DELETE FROM daily_sales
+USING unnest(%(products)s::bigint[], %(days)s::date[]) AS dirty (product_id, day)
+WHERE daily_sales.product_id = dirty.product_id AND daily_sales.day = dirty.day
+"""
+
+PRODUCT_DAYS_SQL = """
+WITH dirty AS (
+    SELECT DISTINCT * FROM unnest(%(products)s::bigint[], %(days)s::date[]) AS dirty (product_id, day)
+)
+INSERT INTO daily_sales (day, product_id, obj_type, quantity)
+SELECT dirty.day, order_item.product_id, obj.item_class, SUM(order_item.quantity)
+FROM dirty
+JOIN order_item ON order_item.product_id = dirty.product_id
+JOIN "order" ON "order".id = order_item.order_id
+    AND "order".created_at >= dirty.day::timestamp AT TIME ZONE %(tz)s
+    AND "order".created_at < (dirty.day + 1)::timestamp AT TIME ZONE %(tz)s
+JOIN obj_product ON obj_product.id = order_item.product_id
+JOIN obj ON obj.id = obj_product.obj_id
+GROUP BY dirty.day, order_item.product_id, obj.item_class
+"""
+
+# Заказы и позиции затронутых пар (магазин, день); день — по локальной дате заказа
+SHOP_SALES_CTE = """
+WITH dirty AS (
+    SELECT DISTINCT * FROM unnest(%(shops)s::bigint[], %(days)s::date[]) AS dirty (shop_id, day)
+), sales AS (
+    SELECT "order".id AS order_id, "order".shop_id, dirty.day, "order".status_id,
+           order_item.product_id, order_item.quantity, order_item.quantity * order_item.price AS revenue
+    FROM dirty
+    JOIN "order" ON "order".shop_id = dirty.shop_id
+        AND "order".created_at >= dirty.day::timestamp AT TIME ZONE %(tz)s
+        AND "order".created_at < (dirty.day + 1)::timestamp AT TIME ZONE %(tz)s
+    LEFT JOIN order_item ON order_item.order_id = "order".id
+)
+"""
+
+DELETE_SHOP_DAYS_SQL = """
+DELETE FROM {table}
+USING unnest(%(shops)s::bigint[], %(days)s::date[]) AS dirty (shop_id, day)
+WHERE {table}.shop_id = dirty.shop_id AND {table}.day = dirty.day
+"""
+
+SHOP_STATS_SQL = SHOP_SALES_CTE + """
+INSERT INTO shop_daily_stats (shop_id, day, status_id, orders, units, revenue)
+SELECT shop_id, day, status_id, COUNT(DISTINCT order_id), COALESCE(SUM(quantity), 0), COALESCE(SUM(revenue), 0)
+FROM sales
+GROUP BY shop_id, day, status_id
+"""
+
+SHOP_PRODUCT_SALES_SQL = SHOP_SALES_CTE + """
+INSERT INTO shop_daily_sales (shop_id, day, product_id, units, revenue)
+SELECT shop_id, day, product_id, SUM(quantity), COALESCE(SUM(revenue), 0)
+FROM sales
+WHERE product_id IS NOT NULL
+GROUP BY shop_id, day, product_id
+"""
+
+SHOP_DAYS_SQL = """
+SELECT DISTINCT shop_id, ("order".created_at AT TIME ZONE %(tz)s)::date
+FROM "order"
+WHERE "order".created_at >= %(start)s::timestamp AT TIME ZONE %(tz)s
+  AND "order".created_at < %(end)s::timestamp AT TIME ZONE %(tz)s
+"""
+
+
+def product_day_keys(product_days):
+    """Ключи блокировки строк daily_sales: запись и пересчёт пары (продукт, день) не идут параллельно."""
+    return [f'{product_id}:{day}' for product_id, day in product_days]
+
+
+def shop_day_keys(shop_days):
+    """Ключи блокировки сводок магазина: запись и пересчёт пары (магазин, день) не идут параллельно."""
+    return [f'{shop_id}:{day}' for shop_id, day in shop_days]
+
+
+def shop_day_params(shop_days):
+    return {
+        'shops': [shop_id for shop_id, _ in shop_days],
+        'days': [day for _, day in shop_days],
+        'tz': settings.TIME_ZONE,
+    }
+
+
+def record_order_sales(order):
+    """
+    Добавляет продажи заказа в daily_sales и сводки магазина (в транзакции создания
+    заказа): стоит столько, сколько позиций в заказе, а не сколько заказов за день.
+    """
+    day = timezone.localdate(order.created_at)
+    product_ids = order.items_product.values_list('product_id', flat=True).distinct()
+    advisory_xact_lock(DAILY_SALES, product_day_keys((product_id, day) for product_id in product_ids))
+    params = {'day': day, 'order': order.id}
+    with connection.cursor() as cursor:
+        cursor.execute(RECORD_ORDER_SQL, params)
+        advisory_xact_lock(SHOP_DAYS, shop_day_keys([(order.shop_id, day)]))
+        cursor.execute(RECORD_SHOP_STATS_SQL, params)
+        cursor.execute(RECORD_SHOP_SALES_SQL, params)
+
+
+def refresh_product_days(product_days):
+    """
+    Пересчитывает строки daily_sales для пар (id продукта, день) из позиций заказов
+    этих дней. Так учитываются изменение и удаление позиций и заказов, которые
+    record_order_sales не видит.
+    """
+    product_days = list(product_days)
+    if not product_days:
+        return
+    params = {
+        'products': [product_id for product_id, _ in product_days],
+        'days': [day for _, day in product_days],
+        'tz': settings.TIME_ZONE,
+    }
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Иначе параллельный пересчёт или record_order_sales той же пары вставил бы
+        # строку между DELETE и INSERT (IntegrityError или потерянные продажи)
+        advisory_xact_lock(DAILY_SALES, product_day_keys(product_days))
+        cursor.execute(DELETE_PRODUCT_DAYS_SQL, params)
+        cursor.execute(PRODUCT_DAYS_SQL, params)
+
+
+def schedule_product_day_refresh(order, *product_ids):
+    """Пересчёт продаж продуктов за день заказа после коммита, один раз на транзакцию."""
+    day = timezone.localdate(order.created_at)
+    run_on_commit(refresh_product_days, [(product_id, day) for product_id in product_ids])
+
+
+def refresh_shop_days(shop_days):
+    """
+    Пересчитывает shop_daily_stats и shop_daily_sales для пар (id магазина, день)
+    из заказов этих дней: стоит столько, сколько заказов у магазина за день, поэтому
+    вызывается только при изменении и удалении заказов и позиций.
+    """
+    shop_days = list(shop_days)
+    if not shop_days:
+        return
+    params = shop_day_params(shop_days)
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Иначе параллельный пересчёт или record_order_sales той же пары вставил бы
+        # строку между DELETE и INSERT (IntegrityError или потерянные заказы)
+        advisory_xact_lock(SHOP_DAYS, shop_day_keys(shop_days))
+        for table in ('shop_daily_stats', 'shop_daily_sales'):
+            cursor.execute(DELETE_SHOP_DAYS_SQL.format(table=table), params)
+        cursor.execute(SHOP_STATS_SQL, params)
+        cursor.execute(SHOP_PRODUCT_SALES_SQL, params)
+
+
+def schedule_shop_day_refresh(order):
+    """Пересчёт дня заказа в сводках магазина после коммита, один раз на транзакцию."""
+    run_on_commit(refresh_shop_days, [(order.shop_id, timezone.localdate(order.created_at))])
+
+
+def rebuild_daily_sales(start, end, batch_days=30):
+    """
+    Пересобирает daily_sales и сводки магазинов за дни [start, end) пачками
+    по batch_days дней, каждая пачка — в своей транзакции. Возвращает количество пачек.
+    """
+    batches = 0
+    day = start
+    while day < end:
+        batch_end = min(day + timedelta(days=batch_days), end)
+        with transaction.atomic(), connection.cursor() as cursor:
+            # Записи и пересчёты заказов ждут конец пачки, чтобы не попасть между DELETE и INSERT
+            cursor.execute("LOCK TABLE daily_sales, shop_daily_stats, shop_daily_sales IN EXCLUSIVE MODE")
+            cursor.execute("DELETE FROM daily_sales WHERE day >= %s AND day < %s", [day, batch_end])
+            cursor.execute(REBUILD_SQL, {'tz': settings.TIME_ZONE, 'start': day, 'end': batch_end})
+            for table in ('shop_daily_stats', 'shop_daily_sales'):
+                cursor.execute(f"DELETE FROM {table} WHERE day >= %s AND day < %s", [day, batch_end])
+            cursor.execute(SHOP_DAYS_SQL, {'tz': settings.TIME_ZONE, 'start': day, 'end': batch_end})
+            shop_days = cursor.fetchall()
+            if shop_days:
+                # Без refresh_shop_days: его advisory-блокировка после блокировки таблиц
+                # могла бы встать в deadlock с record_order_sales
+                params = shop_day_params(shop_days)
+                cursor.execute(SHOP_STATS_SQL, params)
+                cursor.execute(SHOP_PRODUCT_SALES_SQL, params)
+        batches += 1
+        day = batch_end
+    return batches
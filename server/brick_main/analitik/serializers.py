@@ -3,4 +3,49 @@ from rest_framework import serializers
 class TopProductSerializer(serializers.Serializer):
     product_id = serializers.IntegerField(source='product__id')
     name = serializers.CharField(source='product__name')
-    total_quantity = serializers.IntegerField()
\ No newline at end of file
+    total_quantity = serializers.IntegerField()
+
+class TrendingProductSerializer(serializers.Serializer):
+    product_id = serializers.IntegerField()
+    name = serializers.CharField()
+    # Оценка сверху: превышает истинное значение не больше чем на error_bound ответа
+    estimated_quantity = serializers.IntegerField()
+
+
+class ShopSalesSerializer(serializers.Serializer):
+    orders = serializers.IntegerField()
+    units = serializers.IntegerField()
+    revenue = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+
+class ShopSalesDaySerializer(ShopSalesSerializer):
+    day = serializers.DateField()
+
+
+class ShopTopListingSerializer(serializers.Serializer):
+    product_id = serializers.IntegerField()
+    name = serializers.CharField(source='product__name')
+    units = serializers.IntegerField()
+    revenue = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+
+class ShopStatusSerializer(serializers.Serializer):
+    status_id = serializers.IntegerField(allow_null=True)
+    status = serializers.CharField(source='status__name', allow_null=True)
+    orders = serializers.IntegerField()
+
+
+class ShopInventorySerializer(serializers.Serializer):
+    stock_units = serializers.IntegerField(help_text="Единиц в наличии сейчас")
+    units_sold = serializers.IntegerField(help_text="Продано за период")
+    turnover = serializers.FloatField(allow_null=True, help_text="Оборачиваемость: продано за период / остаток")
+    days_of_inventory = serializers.FloatField(allow_null=True, help_text="На сколько дней хватит остатка при текущем темпе продаж")
+
+
+class ShopAnalyticsSerializer(serializers.Serializer):
+    period = serializers.CharField()
+    totals = ShopSalesSerializer()
+    series = ShopSalesDaySerializer(many=True)
+    top_listings = ShopTopListingSerializer(many=True)
+    statuses = ShopStatusSerializer(many=True)
+    inventory = ShopInventorySerializer()
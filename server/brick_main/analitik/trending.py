@@ -0,0 +1,297 @@
+"""
+Приближённый топ продаваемых продуктов за последний час и день.
+
+Каждое окно — кольцо интервалов (для часа — 60 минутных, для дня — 24 часовых),
+у каждого интервала свой count-min sketch. Сумма sketch'ей окна хранится отдельно:
+при устаревании интервала его счётчики вычитаются из суммы. Для каждого типа объекта
+хранятся до CAPACITY кандидатов в топ (куча по оценке): продукт становится кандидатом,
+если его оценка больше наименьшей в куче.
+
+Точность. Оценка продукта не меньше истинного количества и с вероятностью 1 - e^-DEPTH
+(~98%) превышает его не больше чем на e / WIDTH (~0.13%) от всех единиц, проданных
+в окне; эта граница отдаётся вместе с результатом (error_bound).
+
+Память не зависит от числа продуктов и заказов: WIDTH * DEPTH счётчиков по 8 байт
+(64 КБ) на интервал, всего около 6 МБ на оба окна в процессе.
+
+Состояние живёт в процессе. Раз в CHECKPOINT_INTERVAL секунд процесс прибавляет
+накопленные с прошлой точки счётчики к сохранённым в TrendingCheckpoint и забирает
+оттуда общий результат (sketch'и складываются), так что процессы видят продажи друг
+друга с задержкой не больше интервала, а после перезапуска состояние восстанавливается.
+"""
+import hashlib
+import heapq
+import logging
+import math
+import operator
+import threading
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import IntegrityError, connection, transaction
+
+from brick_main.models import OrderItem, TrendingCheckpoint
+
+logger = logging.getLogger(__name__)
+
+WIDTH = 2048
+DEPTH = 4
+# Кандидатов в топ на тип объекта
+CAPACITY = 100
+CHECKPOINT_INTERVAL = 60
+
+# Окно: (длина интервала в секундах, количество интервалов)
+WINDOWS = {
+    'hour': (60, 60),
+    'day': (60 * 60, 24),
+}
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='trending-checkpoint')
+
+
+def sketch_indexes(product_id):
+    """Номера счётчиков продукта в каждой строке sketch'а (одинаковые во всех процессах)."""
+    digest = hashlib.blake2b(str(product_id).encode(), digest_size=4 * DEPTH).digest()
+    return [int.from_bytes(digest[row * 4:row * 4 + 4], 'little') % WIDTH for row in range(DEPTH)]
+
+
+class CountMinSketch:
+    def __init__(self, data=None):
+        if data is None:
+            self.rows = [array('q', bytes(8 * WIDTH)) for _ in range(DEPTH)]
+        else:
+            self.rows = [array('q', data[row * 8 * WIDTH:(row + 1) * 8 * WIDTH]) for row in range(DEPTH)]
+
+    def add(self, product_id, quantity):
+        for row, index in zip(self.rows, sketch_indexes(product_id)):
+            row[index] += quantity
+
+    def estimate(self, product_id):
+        return min(row[index] for row, index in zip(self.rows, sketch_indexes(product_id)))
+
+    def merge(self, other, op=operator.add):
+        self.rows = [array('q', map(op, mine, theirs)) for mine, theirs in zip(self.rows, other.rows)]
+
+    def total(self):
+        # Каждая строка содержит сумму всех добавленных количеств
+        return sum(self.rows[0])
+
+    def to_bytes(self):
+        return b''.join(row.tobytes() for row in self.rows)
+
+
+class SlidingTopK:
+    """Скользящее окно из bucket_count интервалов по bucket_seconds секунд."""
+
+    def __init__(self, bucket_seconds, bucket_count):
+        self.bucket_seconds = bucket_seconds
+        self.bucket_count = bucket_count
+        self.buckets = {}
+        self.sum = CountMinSketch()
+        # Ещё не сохранённые в контрольную точку продажи: {начало интервала: sketch}
+        self.pending = {}
+        # {тип: {id продукта: оценка}} и ленивая куча (оценка, id) для каждого типа
+        self.candidates = {}
+        self.heaps = {}
+
+    def bucket_start(self, now):
+        return int(now) // self.bucket_seconds * self.bucket_seconds
+
+    def oldest_bucket(self, now):
+        return self.bucket_start(now) - (self.bucket_count - 1) * self.bucket_seconds
+
+    def expire(self, now):
+        oldest = self.oldest_bucket(now)
+        expired = [start for start in self.buckets if start < oldest]
+        for start in expired:
+            self.sum.merge(self.buckets.pop(start), operator.sub)
+        for start in [start for start in self.pending if start < oldest]:
+            del self.pending[start]
+        if expired:
+            for obj_type in list(self.candidates):
+                self.rebuild_candidates(obj_type, self.candidates[obj_type])
+
+    def add(self, obj_type, product_id, quantity, now):
+        self.expire(now)
+        start = self.bucket_start(now)
+        for sketches in (self.buckets, self.pending):
+            sketches.setdefault(start, CountMinSketch()).add(product_id, quantity)
+        self.sum.add(product_id, quantity)
+        self.offer(obj_type, product_id)
+
+    def offer(self, obj_type, product_id):
+        candidates = self.candidates.setdefault(obj_type, {})
+        heap = self.heaps.setdefault(obj_type, [])
+        estimate = self.sum.estimate(product_id)
+        if product_id not in candidates and len(candidates) >= CAPACITY:
+            smallest = self.smallest(obj_type)
+            if estimate <= smallest[0]:
+                return
+            heapq.heappop(heap)
+            del candidates[smallest[1]]
+        candidates[product_id] = estimate
+        heapq.heappush(heap, (estimate, product_id))
+        if len(heap) > 4 * CAPACITY:
+            self.rebuild_candidates(obj_type, candidates)
+
+    def smallest(self, obj_type):
+        """Кандидат с наименьшей оценкой; устаревшие записи кучи отбрасываются."""
+        heap = self.heaps[obj_type]
+        candidates = self.candidates[obj_type]
+        while candidates.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0]
+
+    def rebuild_candidates(self, obj_type, product_ids):
+        """Пересчитывает оценки кандидатов и оставляет CAPACITY лучших с ненулевой оценкой."""
+        estimates = [(self.sum.estimate(product_id), product_id) for product_id in product_ids]
+        best = heapq.nlargest(CAPACITY, [item for item in estimates if item[0] > 0])
+        self.candidates[obj_type] = {product_id: estimate for estimate, product_id in best}
+        self.heaps[obj_type] = best
+        heapq.heapify(best)
+
+    def top(self, obj_type, limit, now):
+        self.expire(now)
+        candidates = self.candidates.get(obj_type, {})
+        return sorted(candidates.items(), key=lambda item: (-item[1], item[0]))[:limit]
+
+    def error_bound(self):
+        return math.ceil(math.e / WIDTH * self.sum.total())
+
+    def restore(self, record, now):
+        """Берёт состоянием окна сумму сохранённого в record и ещё не сохранённого pending."""
+        oldest = self.oldest_bucket(now)
+        data = bytes(record.counters)
+        size = 8 * WIDTH * DEPTH
+        buckets = {
+            start: CountMinSketch(data[index * size:(index + 1) * size])
+            for index, start in enumerate(record.buckets)
+            if start >= oldest
+        }
+        for start, sketch in self.pending.items():
+            if start < oldest:
+                continue
+            if start in buckets:
+                buckets[start].merge(sketch)
+            else:
+                buckets[start] = CountMinSketch(sketch.to_bytes())
+        self.buckets = buckets
+        self.sum = CountMinSketch()
+        for sketch in buckets.values():
+            self.sum.merge(sketch)
+
+        stored = {int(obj_type): product_ids for obj_type, product_ids in record.candidates.items()}
+        for obj_type in set(stored) | set(self.candidates):
+            self.rebuild_candidates(obj_type, set(stored.get(obj_type, [])) | set(self.candidates.get(obj_type, {})))
+
+    def checkpoint(self, record, now):
+        """
+        Прибавляет pending к состоянию из record (под блокировкой строки), берёт
+        результат как своё состояние и записывает его в record. Возвращает взятый
+        pending — до коммита точки он нужен, чтобы вернуть продажи при ошибке.
+        """
+        self.restore(record, now)
+        pending, self.pending = self.pending, {}
+        starts = sorted(self.buckets)
+        record.buckets = starts
+        record.counters = b''.join(self.buckets[start].to_bytes() for start in starts)
+        record.candidates = {str(obj_type): list(candidates) for obj_type, candidates in self.candidates.items()}
+        return pending
+
+    def return_pending(self, pending):
+        """Возвращает в pending продажи, взятые checkpoint, если точка не сохранилась."""
+        for start, sketch in pending.items():
+            if start in self.pending:
+                self.pending[start].merge(sketch)
+            else:
+                self.pending[start] = sketch
+
+
+class Trending:
+    """Окна WINDOWS процесса и их синхронизация через TrendingCheckpoint."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.windows = {name: SlidingTopK(*params) for name, params in WINDOWS.items()}
+        # 0 — состояние ещё не загружалось из контрольной точки
+        self.checkpointed_at = 0
+        self.checkpoint_scheduled = False
+
+    def record(self, sales):
+        """sales — [(тип объекта, id продукта, количество)]."""
+        now = time.time()
+        with self.lock:
+            for window in self.windows.values():
+                for obj_type, product_id, quantity in sales:
+                    window.add(obj_type, product_id, quantity, now)
+        self.schedule_checkpoint(now)
+
+    def top(self, window_name, obj_type, limit):
+        now = time.time()
+        if not self.checkpointed_at:
+            # Первое обращение в процессе: состояние только читается, запись — в фоне
+            self.load()
+        self.schedule_checkpoint(now)
+        with self.lock:
+            window = self.windows[window_name]
+            return window.top(obj_type, limit, now), window.sum.total(), window.error_bound()
+
+    def schedule_checkpoint(self, now):
+        with self.lock:
+            if self.checkpoint_scheduled or now - self.checkpointed_at < CHECKPOINT_INTERVAL:
+                return
+            self.checkpoint_scheduled = True
+        _executor.submit(self._checkpoint_in_worker)
+
+    def _checkpoint_in_worker(self):
+        try:
+            self.checkpoint()
+        except Exception:
+            logger.exception("Trending checkpoint failed")
+        finally:
+            self.checkpoint_scheduled = False
+            # Соединение принадлежит потоку пула и иначе осталось бы открытым
+            connection.close()
+
+    def load(self):
+        """Восстанавливает окна из TrendingCheckpoint без блокировок и записи."""
+        now = time.time()
+        records = TrendingCheckpoint.objects.in_bulk(list(self.windows), field_name='window')
+        with self.lock:
+            if self.checkpointed_at:
+                # Пока читали, фоновая точка уже синхронизировала окна
+                return
+            for name, window in self.windows.items():
+                if name in records:
+                    window.restore(records[name], now)
+            self.checkpointed_at = now
+
+    def checkpoint(self):
+        now = time.time()
+        for name, window in self.windows.items():
+            taken = {}
+            try:
+                with transaction.atomic():
+                    record, _ = TrendingCheckpoint.objects.select_for_update().get_or_create(window=name)
+                    with self.lock:
+                        taken = window.checkpoint(record, now)
+                    record.save()
+            except Exception as error:
+                # Точка не сохранилась: продажи возвращаются в pending и войдут в следующую
+                with self.lock:
+                    window.return_pending(taken)
+                # IntegrityError — строку окна одновременно создал другой процесс
+                if not isinstance(error, IntegrityError):
+                    raise
+        self.checkpointed_at = now
+
+
+trending = Trending()
+
+
+def record_order_trending(order_id):
+    """Учитывает позиции заказа в окнах трендов (вызывается после коммита заказа)."""
+    trending.record(
+        OrderItem.objects.filter(order_id=order_id).values_list('product__obj__item_class', 'product_id', 'quantity')
+    )
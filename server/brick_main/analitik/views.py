@@ -1,15 +1,21 @@
 # analytics/views.py
 from datetime import timedelta
+from decimal import Decimal
 from django.utils import timezone
 from django.db.models import Sum
+from django.shortcuts import get_object_or_404
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework_simplejwt.authentication import JWTAuthentication
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
-from brick_main.models import OrderItem
-from brick_main.analitik.serializers import TopProductSerializer
+from brick_main.models import DailySales, ObjProduct, ShopDailySales, ShopDailyStats, Shops
+from brick_main.analitik.serializers import ShopAnalyticsSerializer, TopProductSerializer, TrendingProductSerializer
+from brick_main.analitik.cache import get_cached
+from brick_main.analitik.trending import WINDOWS, trending
+from utils.permissions import IsSellerRole
 
 TYPE_MAPPING = {
     'detal': 1,
@@ -26,13 +32,20 @@ PERIOD_MAPPING = {
     'week': 7
 }
 
+SHOP_TOP_LISTINGS = 10
+TRENDING_LIMIT = 10
+TRENDING_MAX_LIMIT = 50
+
 def get_top_products_by_type_and_period(obj_type: int, days: int):
-    now = timezone.now()
-    start_date = now - timedelta(days=days)
+    """
+    Топ-5 продуктов по проданному количеству за последние days дней.
+    Считается по суточной сводке daily_sales: не больше одной строки на продукт за день.
+    """
+    start_date = timezone.localdate() - timedelta(days=days)
 
-    queryset = OrderItem.objects.filter(
-        order__created_at__range=(start_date, now),
-        product__obj=obj_type
+    queryset = DailySales.objects.filter(
+        obj_type=obj_type,
+        day__gt=start_date,
     ).values(
         'product__id',
         'product__name'
@@ -42,6 +55,12 @@ def get_top_products_by_type_and_period(obj_type: int, days: int):
 
     return queryset
 
+
+def compute_top_products(obj_type: int, period: str):
+    """Готовый ответ ProductAnalyticsAPIView — то, что хранится в кэше аналитики."""
+    stats = get_top_products_by_type_and_period(obj_type, PERIOD_MAPPING[period])
+    return [dict(item) for item in TopProductSerializer(stats, many=True).data]
+
 class ProductAnalyticsAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -61,8 +80,121 @@ class ProductAnalyticsAPIView(APIView):
         if not obj_type or period not in PERIOD_MAPPING:
             return Response({'detail': 'Указан неверный тип или период'}, status=400)
 
-        days = PERIOD_MAPPING[period]
-        stats = get_top_products_by_type_and_period(obj_type, days)
-        serializer = TopProductSerializer(stats, many=True)
-        return Response(serializer.data)
+        # Результат одинаков для всех пользователей: берётся из кэша (см. analitik/cache.py)
+        return Response(get_cached(obj_type, period, compute_top_products))
+
+
+class TrendingProductsAPIView(APIView):
+    """
+    Продукты в тренде за последний час или день — приближённо, по скользящему окну
+    в памяти процесса (см. analitik/trending.py). Количество каждого продукта — оценка
+    сверху: с вероятностью ~98% она превышает истинное не больше чем на error_bound
+    (~0.13% от всех единиц, проданных в окне).
+    """
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        tags=["Analytics"],
+        manual_parameters=[
+            openapi.Parameter('type', openapi.IN_QUERY, description="Тип продукта (detal, nabor, minifigurka, instruktsiya)", type=openapi.TYPE_STRING, required=True),
+            openapi.Parameter('window', openapi.IN_QUERY, description="Окно (hour, day)", type=openapi.TYPE_STRING, required=True),
+            openapi.Parameter('limit', openapi.IN_QUERY, description=f"Количество продуктов (по умолчанию {TRENDING_LIMIT}, не больше {TRENDING_MAX_LIMIT})", type=openapi.TYPE_INTEGER),
+        ]
+    )
+    def get(self, request):
+        obj_type = TYPE_MAPPING.get(request.GET.get('type'))
+        window = request.GET.get('window')
+
+        if not obj_type or window not in WINDOWS:
+            return Response({'detail': 'Указан неверный тип или окно'}, status=400)
+
+        try:
+            limit = min(int(request.GET.get('limit', TRENDING_LIMIT)), TRENDING_MAX_LIMIT)
+        except ValueError:
+            return Response({'detail': 'limit должен быть числом'}, status=400)
+
+        top, total, error_bound = trending.top(window, obj_type, max(limit, 1))
+        names = dict(ObjProduct.objects.filter(id__in=[product_id for product_id, _ in top]).values_list('id', 'name'))
+        results = [
+            {'product_id': product_id, 'name': names[product_id], 'estimated_quantity': estimate}
+            for product_id, estimate in top
+            if product_id in names
+        ]
+        return Response({
+            'window': window,
+            'total_quantity': total,
+            'error_bound': error_bound,
+            'results': TrendingProductSerializer(results, many=True).data,
+        })
+
+
+def get_shop_analytics(shops, days):
+    """Сводка продаж магазинов за последние days дней из shop_daily_stats и shop_daily_sales."""
+    start_date = timezone.localdate() - timedelta(days=days)
+    stats = ShopDailyStats.objects.filter(shop__in=shops, day__gt=start_date)
+
+    series = list(
+        stats.values('day').annotate(orders=Sum('orders'), units=Sum('units'), revenue=Sum('revenue')).order_by('day')
+    )
+    totals = {
+        'orders': sum(point['orders'] for point in series),
+        'units': sum(point['units'] for point in series),
+        'revenue': sum((point['revenue'] for point in series), Decimal('0')),
+    }
+    statuses = stats.values('status_id', 'status__name').annotate(orders=Sum('orders')).order_by('-orders')
+    top_listings = ShopDailySales.objects.filter(shop__in=shops, day__gt=start_date).values(
+        'product_id', 'product__name'
+    ).annotate(
+        units=Sum('units'), revenue=Sum('revenue')
+    ).order_by('-units', 'product_id')[:SHOP_TOP_LISTINGS]
+
+    stock = ObjProduct.objects.filter(shop__in=shops).aggregate(total=Sum('quantity'))['total'] or 0
+    units_sold = totals['units']
+    inventory = {
+        'stock_units': stock,
+        'units_sold': units_sold,
+        'turnover': round(units_sold / stock, 2) if stock else None,
+        'days_of_inventory': round(stock / (units_sold / days), 1) if units_sold else None,
+    }
+    return {
+        'totals': totals,
+        'series': series,
+        'top_listings': top_listings,
+        'statuses': statuses,
+        'inventory': inventory,
+    }
+
+
+class ShopAnalyticsAPIView(APIView):
+    """
+    Аналитика продавца по его магазинам: выручка и продажи по дням, лучшие предложения,
+    заказы по статусам и оборачиваемость остатков. Считается по сводкам магазинов,
+    которые обновляются при изменении заказов (см. analitik/rollup.py), поэтому время
+    ответа зависит от длины периода, а не от числа заказов. Выручка — в базовой валюте.
+    """
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated, IsSellerRole]
+
+    @swagger_auto_schema(
+        tags=["Analytics"],
+        manual_parameters=[
+            openapi.Parameter('period', openapi.IN_QUERY, description="Временные интервалы (year, half_year, 3month, month, week)", type=openapi.TYPE_STRING, required=True),
+            openapi.Parameter('shop', openapi.IN_QUERY, description="ID магазина (по умолчанию — все магазины продавца)", type=openapi.TYPE_INTEGER),
+        ],
+        responses={200: ShopAnalyticsSerializer()}
+    )
+    def get(self, request):
+        period = request.GET.get('period')
+        if period not in PERIOD_MAPPING:
+            return Response({'detail': 'Указан неверный период'}, status=400)
+
+        shops = Shops.objects.filter(owner=request.user)
+        shop_id = request.GET.get('shop')
+        if shop_id:
+            if not shop_id.isdigit():
+                return Response({'detail': 'Неверный ID магазина'}, status=400)
+            shops = [get_object_or_404(shops, id=shop_id)]
 
+        data = get_shop_analytics(shops, PERIOD_MAPPING[period])
+        data['period'] = period
+        return Response(ShopAnalyticsSerializer(data).data)
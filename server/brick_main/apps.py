@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class BrickMainConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'brick_main'
+
+    def ready(self):
+        import brick_main.signals  # noqa: F401
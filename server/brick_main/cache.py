@@ -0,0 +1,21 @@
+from django.db.models import F
+
+from brick_main.models import CacheVersion
+from utils.deferred import run_on_commit
+
+
+def get_version(name):
+    """Текущая версия данных для ключей кэша (один запрос по уникальному индексу)."""
+    return CacheVersion.objects.filter(name=name).values_list('version', flat=True).first() or 0
+
+
+def bump_versions(names):
+    for name in names:
+        updated = CacheVersion.objects.filter(name=name).update(version=F('version') + 1)
+        if not updated:
+            CacheVersion.objects.get_or_create(name=name)
+
+
+def schedule_version_bump(name):
+    """Увеличивает версию после коммита транзакции, один раз на транзакцию."""
+    run_on_commit(bump_versions, [name])
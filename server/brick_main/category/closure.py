@@ -0,0 +1,54 @@
+from django.db import connection, transaction
+
+from utils.deferred import run_on_commit
+
+# Защита от циклов в theme_links
+MAX_DEPTH = 50
+
+# Все пути снизу вверх от указанных тематик до корней. Для пар, достижимых
+# несколькими путями, хранится минимальная глубина.
+BUILD_SQL = """
+WITH RECURSIVE up (ancestor_id, descendant_id, depth) AS (
+    SELECT id, id, 0 FROM theme WHERE {condition}
+    UNION
+    SELECT theme_links.high_id, up.descendant_id, up.depth + 1
+    FROM up
+    JOIN theme_links ON theme_links.low_id = up.ancestor_id
+    WHERE up.depth < %(max_depth)s
+)
+INSERT INTO theme_closure (ancestor_id, descendant_id, depth)
+SELECT ancestor_id, descendant_id, MIN(depth)
+FROM up
+GROUP BY ancestor_id, descendant_id
+"""
+
+
+def rebuild_theme_closure(theme_ids=None):
+    """
+    Пересобирает theme_closure для указанных тематик и всего их поддерева.
+    Без аргументов — полная пересборка.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        if theme_ids is None:
+            cursor.execute("TRUNCATE theme_closure")
+            cursor.execute(BUILD_SQL.format(condition="TRUE"), {'max_depth': MAX_DEPTH})
+            return
+
+        # Поддерево по текущему (ещё не пересобранному) замыканию: внутренние
+        # связи поддерева не меняются, меняются только пути к нему сверху
+        cursor.execute(
+            "SELECT descendant_id FROM theme_closure WHERE ancestor_id = ANY(%(themes)s)",
+            {'themes': list(theme_ids)},
+        )
+        subtree = set(theme_ids) | {row[0] for row in cursor.fetchall()}
+
+        cursor.execute("DELETE FROM theme_closure WHERE descendant_id = ANY(%(themes)s)", {'themes': list(subtree)})
+        cursor.execute(
+            BUILD_SQL.format(condition="id = ANY(%(themes)s)"),
+            {'themes': list(subtree), 'max_depth': MAX_DEPTH},
+        )
+
+
+def schedule_closure_rebuild(theme_id):
+    """Пересборка замыкания после коммита, один раз на транзакцию."""
+    run_on_commit(rebuild_theme_closure, [theme_id])
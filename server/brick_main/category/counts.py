@@ -0,0 +1,84 @@
+from django.db import connection
+from django.db.models import F
+
+from brick_main.models import Theme
+from utils.deferred import run_on_commit
+
+# Пересчёт хранимых количеств объектов для тематик, попадающих под {condition}
+RECOUNT_SQL = """
+UPDATE theme SET
+    direct_objects_count = (SELECT COUNT(*) FROM theme_obj_links WHERE theme_obj_links.high_id = theme.id),
+    total_objects_count = counts.total
+FROM (
+    SELECT closure.ancestor_id, COUNT(DISTINCT theme_obj_links.obj_id) AS total
+    FROM theme_closure closure
+    LEFT JOIN theme_obj_links ON theme_obj_links.high_id = closure.descendant_id
+    WHERE {condition}
+    GROUP BY closure.ancestor_id
+) counts
+WHERE theme.id = counts.ancestor_id
+"""
+
+# Изменение total_objects_count у предков тематики при добавлении/удалении одной связи.
+# Объект учитывается в поддереве предка один раз, поэтому счётчик меняется, только
+# если других связей этого объекта в поддереве нет.
+TOTAL_DELTA_SQL = """
+UPDATE theme SET total_objects_count = total_objects_count + %(delta)s
+WHERE theme.id IN (SELECT ancestor_id FROM theme_closure WHERE descendant_id = %(theme)s)
+  AND NOT EXISTS (
+      SELECT 1
+      FROM theme_obj_links
+      JOIN theme_closure ON theme_closure.descendant_id = theme_obj_links.high_id
+      WHERE theme_closure.ancestor_id = theme.id
+        AND theme_obj_links.obj_id = %(obj)s
+        AND theme_obj_links.id <> %(link)s
+  )
+"""
+
+
+def recount_theme_objects(theme_ids=None):
+    """
+    Пересчитывает direct/total_objects_count для указанных тематик и всех их предков.
+    Без аргументов — для всех тематик (после массовой загрузки).
+    """
+    with connection.cursor() as cursor:
+        if theme_ids is None:
+            cursor.execute(RECOUNT_SQL.format(condition="TRUE"))
+        else:
+            cursor.execute(
+                RECOUNT_SQL.format(condition=(
+                    "closure.ancestor_id IN "
+                    "(SELECT ancestor_id FROM theme_closure WHERE descendant_id = ANY(%(themes)s))"
+                )),
+                {'themes': list(theme_ids)},
+            )
+
+
+def _apply_total_delta(link, delta):
+    """
+    Проверка "других связей объекта в поддереве нет" верна, только если связи одного
+    объекта меняются по очереди: иначе две параллельные вставки в соседние тематики
+    не видят друг друга и обе увеличат общих предков. Поэтому строка объекта
+    блокируется до конца транзакции, в которой записана связь (ThemeObjLinks.save
+    и удаление выполняются в транзакции). FOR NO KEY UPDATE не конфликтует с FOR KEY
+    SHARE, который берёт вставка связи по внешнему ключу, поэтому взаимной блокировки
+    нет, а следующий запрос (READ COMMITTED) уже видит связи закоммиченных транзакций.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM obj WHERE id = %s FOR NO KEY UPDATE", [link.obj_id])
+        cursor.execute(TOTAL_DELTA_SQL, {'delta': delta, 'theme': link.high_id, 'obj': link.obj_id, 'link': link.id})
+
+
+def theme_object_link_added(link):
+    Theme.objects.filter(id=link.high_id).update(direct_objects_count=F('direct_objects_count') + 1)
+    _apply_total_delta(link, 1)
+
+
+def theme_object_link_removed(link):
+    Theme.objects.filter(id=link.high_id).update(direct_objects_count=F('direct_objects_count') - 1)
+    _apply_total_delta(link, -1)
+
+
+def schedule_recount(*theme_ids):
+    """Пересчёт после коммита (после пересборки theme_closure), один раз на транзакцию."""
+    run_on_commit(recount_theme_objects, theme_ids)
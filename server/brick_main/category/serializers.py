@@ -7,10 +7,10 @@ class ThemesSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Theme
-        fields = ['id', 'collection_name', 'size']
+        fields = ['id', 'collection_name', 'size', 'direct_objects_count', 'total_objects_count']
 
 
 class ObjectSerializer(serializers.ModelSerializer):
     class Meta:
         model = Obj
-        fields = ['id', 'item_name', 'description'] 
+        fields = ['id', 'item_name']
@@ -0,0 +1,51 @@
+import gzip
+import json
+
+from django.core.cache import cache
+
+from brick_main.cache import get_version
+from brick_main.models import Theme, ThemeLinks
+
+THEME_TREE = 'theme_tree'
+
+
+def build_theme_tree():
+    """Всё дерево тематик с количеством объектов в каждом узле."""
+    themes = {theme.id: theme for theme in Theme.objects.all()}
+
+    children = {}
+    has_parent = set()
+    for high_id, low_id in ThemeLinks.objects.values_list('high_id', 'low_id').order_by('high_id', 'low_id'):
+        children.setdefault(high_id, []).append(low_id)
+        has_parent.add(low_id)
+
+    def build_node(theme_id, path):
+        theme = themes[theme_id]
+        return {
+            'id': theme.id,
+            'collection_name': theme.collection_name,
+            'size': theme.size,
+            'objects_count': theme.total_objects_count,
+            'children': [
+                build_node(child_id, path | {child_id})
+                for child_id in children.get(theme_id, [])
+                if child_id not in path
+            ],
+        }
+
+    return [build_node(theme_id, {theme_id}) for theme_id in sorted(themes) if theme_id not in has_parent]
+
+
+def get_theme_tree():
+    """
+    Версия и gzip-снимок дерева тематик. Снимок строится один раз на версию
+    и хранится в кэше; версия меняется при изменении Theme, ThemeLinks, ThemeObjLinks.
+    """
+    version = get_version(THEME_TREE)
+    key = f'{THEME_TREE}:{version}'
+    snapshot = cache.get(key)
+    if snapshot is None:
+        body = json.dumps(build_theme_tree(), ensure_ascii=False).encode()
+        snapshot = gzip.compress(body)
+        cache.set(key, snapshot, timeout=None)
+    return version, snapshot
@@ -4,14 +4,21 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework_simplejwt.authentication import JWTAuthentication
 
+import gzip
+
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
 from django.db.models import Q
 
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
+from utils.pagination import CatalogPagination
+from utils.streaming import iter_json_array, iter_json_object, streaming_json_response
+
 from brick_main.models import Theme, ThemeLinks
 from brick_main.category.serializers import ThemesSerializer, ObjectSerializer
+from brick_main.category.tree import get_theme_tree
 
 
 class CategeorysView(APIView):
@@ -29,13 +36,23 @@ class CategeorysView(APIView):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class CategoryDetailAPIView(APIView):
+class CategoryDetailAPIView(GenericAPIView):
     """
     Полная информация о категории: подкатегории и объекты
     """
+    pagination_class = CatalogPagination
+
     @swagger_auto_schema(
         tags=["Category"],
-        operation_description="Полная информация о категории: подкатегории и объекты",
+        operation_description="Полная информация о категории: подкатегории и объекты. "
+                              "С параметрами пагинации objects возвращается постранично, stream=true — потоком",
+        manual_parameters=[
+            openapi.Parameter("page", openapi.IN_QUERY, description="Номер страницы", type=openapi.TYPE_INTEGER),
+            openapi.Parameter("limit", openapi.IN_QUERY, description="Элементов на странице (по умолчанию: 10): 10 можно изменить динамически", type=openapi.TYPE_INTEGER),
+            openapi.Parameter("cursor", openapi.IN_QUERY, description="Keyset-пагинация: пустое значение — первая страница, далее значение из next", type=openapi.TYPE_STRING),
+            openapi.Parameter("count", openapi.IN_QUERY, description="count=false — без подсчёта общего количества (только next/previous)", type=openapi.TYPE_BOOLEAN),
+            openapi.Parameter("stream", openapi.IN_QUERY, description="stream=true — все объекты потоком, без пагинации", type=openapi.TYPE_BOOLEAN),
+        ],
         responses={200: ThemesSerializer(many=True)}
     )
     def get(self, request, category_id):
@@ -45,10 +62,46 @@ class CategoryDetailAPIView(APIView):
             id__in=ThemeLinks.objects.filter(high=category).values('low')
         )
 
-        objects = category.get_all_objects().order_by('item_name')
+        objects = category.get_all_objects().order_by('item_name', 'id')
 
-        return Response({
+        data = {
             'current_category': ThemesSerializer(category).data,
             'subcategories': ThemesSerializer(subcategories, many=True).data,
-            'objects': ObjectSerializer(objects, many=True).data
-        }, status=status.HTTP_200_OK)
\ No newline at end of file
+        }
+
+        if request.query_params.get("stream", "").lower() in ("true", "1"):
+            items = iter_json_array(objects, ObjectSerializer, context={"request": request})
+            return streaming_json_response(iter_json_object(data, 'objects', items))
+
+        if CatalogPagination.is_requested(request):
+            page = self.paginate_queryset(objects)
+            data['objects'] = self.get_paginated_response(ObjectSerializer(page, many=True).data).data
+        else:
+            data['objects'] = ObjectSerializer(objects, many=True).data
+
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class CategoryTreeView(APIView):
+
+    @swagger_auto_schema(
+        tags=["Category"],
+        operation_description="Всё дерево категорий с количеством объектов в каждом узле. "
+                              "Поддерживает If-None-Match (304) и gzip",
+        responses={200: "Дерево категорий", 304: "Не изменилось"}
+    )
+    def get(self, request):
+        version, snapshot = get_theme_tree()
+        etag = f'"theme-tree-{version}"'
+
+        if etag in request.headers.get("If-None-Match", ""):
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        elif "gzip" in request.headers.get("Accept-Encoding", ""):
+            response = HttpResponse(snapshot, content_type="application/json")
+            response["Content-Encoding"] = "gzip"
+        else:
+            response = HttpResponse(gzip.decompress(snapshot), content_type="application/json")
+
+        response["ETag"] = etag
+        response["Vary"] = "Accept-Encoding"
+        return response
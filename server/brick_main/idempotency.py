@@ -0,0 +1,89 @@
+import hashlib
+from functools import wraps
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.http.request import RawPostDataException
+from drf_yasg import openapi
+from rest_framework import status
+from rest_framework.response import Response
+
+from brick_main.models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+# Сколько ответ хранится в кэше; строки в БД удаляет команда clear_idempotency_keys
+IDEMPOTENCY_TTL = 24 * 60 * 60
+
+idempotency_key_parameter = openapi.Parameter(
+    IDEMPOTENCY_HEADER, openapi.IN_HEADER, type=openapi.TYPE_STRING,
+    description="Ключ идемпотентности: повтор запроса с тем же ключом вернёт первый ответ, не выполняя запрос заново",
+)
+
+
+def get_request_hash(request):
+    try:
+        body = request.body
+    except RawPostDataException:
+        body = repr(sorted(request.data.lists())).encode()
+    return hashlib.sha256(request.method.encode() + request.path.encode() + body).hexdigest()
+
+
+def replay(request_hash, stored):
+    stored_hash, status_code, data = stored
+    if stored_hash != request_hash:
+        return Response(
+            {"error": "Ключ идемпотентности уже использован для другого запроса"},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    return Response(data, status=status_code, headers={'Idempotent-Replayed': 'true'})
+
+
+def idempotent(handler):
+    """
+    Декоратор POST-метода APIView: поддержка заголовка Idempotency-Key.
+
+    Повтор с тем же ключом стоит одного обращения к кэшу. Если в кэше ответа нет,
+    источник истины — строка IdempotencyKey с уникальным ключом (user, key): она
+    создаётся в одной транзакции с обработкой запроса, поэтому параллельный повтор
+    ждёт коммита первого и получает его ответ. Сохраняются только успешные (2xx) ответы.
+    """
+    @wraps(handler)
+    def wrapper(view, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key or not request.user.is_authenticated:
+            return handler(view, request, *args, **kwargs)
+        if len(key) > 255:
+            return Response({"error": "Слишком длинный Idempotency-Key"}, status=status.HTTP_400_BAD_REQUEST)
+
+        cache_key = f'idempotency:{request.user.id}:{hashlib.sha256(key.encode()).hexdigest()}'
+        request_hash = get_request_hash(request)
+        stored = cache.get(cache_key)
+        if stored is not None:
+            return replay(request_hash, stored)
+
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    record = IdempotencyKey.objects.create(
+                        user=request.user, key=key, endpoint=request.path, request_hash=request_hash
+                    )
+            except IntegrityError:
+                record = IdempotencyKey.objects.get(user=request.user, key=key)
+                stored = (record.request_hash, record.status_code, record.response)
+                cache.set(cache_key, stored, IDEMPOTENCY_TTL)
+                return replay(request_hash, stored)
+
+            response = handler(view, request, *args, **kwargs)
+            if not status.is_success(response.status_code):
+                # Ошибку можно исправить и повторить с тем же ключом
+                transaction.set_rollback(True)
+                return response
+
+            record.status_code = response.status_code
+            record.response = response.data
+            record.save(update_fields=['status_code', 'response'])
+
+        cache.set(cache_key, (request_hash, response.status_code, response.data), IDEMPOTENCY_TTL)
+        return response
+
+    return wrapper
@@ -0,0 +1,156 @@
+import random
+import statistics
+import time
+from functools import partial
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from brick_main.product.filter import ObjProductFilter, obj_listings
+
+# Синтетический каталог: объекты, предложения, цены в трёх валютах и их копия
+# в прежнем виде — строкой (как до перехода на decimal и normalized_price)
+SETUP_SQL = [
+    """
+    INSERT INTO valyuta (name) VALUES ('BENCH-BASE'), ('BENCH-EUR'), ('BENCH-RUB')
+    """,
+    """
+    INSERT INTO exchange_rate (currency_id, rate, updated_at)
+    SELECT id, CASE name WHEN 'BENCH-BASE' THEN 1 WHEN 'BENCH-EUR' THEN 1.08 ELSE 0.011 END, now()
+    FROM valyuta WHERE name LIKE 'BENCH-%%'
+    """,
+    """
+    INSERT INTO obj (id, item_name, item_class, best_offer_quantity)
+    SELECT 'BENCH-' || n, 'Benchmark object ' || n, 1, 0 FROM generate_series(1, %(objects)s) AS n
+    """,
+    """
+    INSERT INTO obj_product (name, description, quantity, obj_id, ship_countries)
+    SELECT 'Listing ' || n, '', 1 + n %% 50, 'BENCH-' || (1 + n %% %(objects)s), '{}'
+    FROM generate_series(1, %(listings)s) AS n
+    """,
+    # По одной цене на предложение, у каждого третьего — ещё одна во второй валюте
+    """
+    INSERT INTO product_price (product_id, currency_id, price)
+    SELECT obj_product.id, currency.id, round((random() * 100 / currency.rate)::numeric, 2)
+    FROM obj_product
+    JOIN obj ON obj.id = obj_product.obj_id AND obj.id LIKE 'BENCH-%%'
+    CROSS JOIN LATERAL (
+        SELECT valyuta.id, exchange_rate.rate
+        FROM valyuta JOIN exchange_rate ON exchange_rate.currency_id = valyuta.id
+        WHERE valyuta.name LIKE 'BENCH-%%'
+        ORDER BY valyuta.id
+        OFFSET obj_product.id %% 3
+        LIMIT CASE WHEN obj_product.id %% 3 = 0 THEN 2 ELSE 1 END
+    ) AS currency
+    """,
+    """
+    CREATE TEMPORARY TABLE bench_price_text ON COMMIT DROP AS
+    SELECT product_price.product_id, product_price.currency_id, product_price.price::text AS price
+    FROM product_price
+    JOIN obj_product ON obj_product.id = product_price.product_id
+    WHERE obj_product.obj_id LIKE 'BENCH-%%'
+    """,
+    # Прежний индекс — только внешний ключ на продукт
+    "CREATE INDEX ON bench_price_text (product_id)",
+    "ANALYZE obj, obj_product, product_price, exchange_rate, bench_price_text",
+]
+
+# Запрос baseline-версии ObjProductsView: цена хранилась строкой, min_price и max_price
+# сравнивались с ней как строки без перевода по курсу. django-filter применял их
+# отдельными filter(), поэтому к product_price было два join
+BASELINE_SQL = """
+SELECT obj_product.id
+FROM obj_product
+INNER JOIN bench_price_text AS min_price ON min_price.product_id = obj_product.id
+INNER JOIN bench_price_text AS max_price ON max_price.product_id = obj_product.id
+WHERE obj_product.obj_id = %(obj)s
+  AND min_price.price >= %(min_price)s
+  AND max_price.price <= %(max_price)s
+ORDER BY obj_product.id
+LIMIT %(limit)s
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Замер фильтра предложений по цене: запрос baseline-версии ObjProductsView "
+        "(сравнение строковой цены) против текущего запроса представления "
+        "(obj_listings и ObjProductFilter по normalized_price). Данные создаются "
+        "в транзакции и откатываются"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--listings', type=int, default=1_000_000, help="Предложений (по умолчанию 1 000 000)")
+        parser.add_argument('--objects', type=int, default=100, help="Объектов каталога, между которыми делятся предложения")
+        parser.add_argument('--repeat', type=int, default=5, help="Повторов каждого запроса")
+        parser.add_argument('--explain', action='store_true', help="Вывести планы запросов")
+
+    def handle(self, *args, **options):
+        if options['listings'] < 1 or options['objects'] < 1 or options['repeat'] < 1:
+            raise CommandError("--listings, --objects и --repeat должны быть положительными")
+
+        with transaction.atomic():
+            started = time.perf_counter()
+            with connection.cursor() as cursor:
+                for sql in SETUP_SQL:
+                    cursor.execute(sql, {'objects': options['objects'], 'listings': options['listings']})
+            self.stdout.write(f"Данные подготовлены за {time.perf_counter() - started:.1f} с")
+
+            try:
+                self.run_benchmark(options)
+            finally:
+                transaction.set_rollback(True)
+
+    def run_benchmark(self, options):
+        rng = random.Random(0)
+        cases = [
+            {'obj': f"BENCH-{rng.randint(1, options['objects'])}", 'min_price': 20, 'max_price': 40, 'limit': 10}
+            for _ in range(options['repeat'])
+        ]
+
+        runs = (
+            ('baseline', self.run_baseline),
+            ('current', partial(self.run_current, ordering=None)),
+            ('current, ordering=price', partial(self.run_current, ordering='price')),
+        )
+        results = {}
+        for name, run in runs:
+            timings = []
+            for case in cases:
+                started = time.perf_counter()
+                rows = run(case)
+                timings.append((time.perf_counter() - started) * 1000)
+            results[name] = statistics.median(timings)
+            self.stdout.write(f"{name:>24}: медиана {results[name]:.2f} мс, строк {len(rows)}")
+            if options['explain']:
+                self.stdout.write(self.explain(name, cases[0]))
+
+        # Запросы не равнозначны: baseline сравнивает строки и не учитывает валюту
+        self.stdout.write(self.style.SUCCESS(
+            f"baseline / current: {results['baseline'] / max(results['current'], 0.001):.2f}"
+        ))
+
+    def baseline_params(self, case):
+        return {**case, 'min_price': str(case['min_price']), 'max_price': str(case['max_price'])}
+
+    def run_baseline(self, case):
+        with connection.cursor() as cursor:
+            cursor.execute(BASELINE_SQL, self.baseline_params(case))
+            return cursor.fetchall()
+
+    def current_queryset(self, case, ordering=None):
+        # Тот же queryset и фильтр, что у ObjProductsView
+        data = {'min_price': case['min_price'], 'max_price': case['max_price']}
+        if ordering:
+            data['ordering'] = ordering
+        return ObjProductFilter(data, queryset=obj_listings(case['obj'])).qs.values_list('id', flat=True)[:case['limit']]
+
+    def run_current(self, case, ordering=None):
+        return list(self.current_queryset(case, ordering))
+
+    def explain(self, name, case):
+        if name != 'baseline':
+            return self.current_queryset(case, 'price' if 'price' in name else None).explain(analyze=True)
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN ANALYZE ' + BASELINE_SQL, self.baseline_params(case))
+            return '\n'.join(row[0] for row in cursor.fetchall())
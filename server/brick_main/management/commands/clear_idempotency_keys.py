@@ -0,0 +1,16 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from brick_main.idempotency import IDEMPOTENCY_TTL
+from brick_main.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = "Удаляет ключи идемпотентности старше срока хранения ответа"
+
+    def handle(self, *args, **options):
+        expired = timezone.now() - timedelta(seconds=IDEMPOTENCY_TTL)
+        deleted, _ = IdempotencyKey.objects.filter(created_at__lt=expired).delete()
+        self.stdout.write(self.style.SUCCESS(f"Удалено ключей: {deleted}"))
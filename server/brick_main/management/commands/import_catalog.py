@@ -0,0 +1,220 @@
+import csv
+import multiprocessing
+import os
+import time
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+
+from brick_main.models import (
+    Obj, Alternate, Images, Links, Theme, ThemeLinks, ThemeObjLinks, KnownColor
+)
+from brick_main.product.inventory import rebuild_set_inventories
+from brick_main.category.closure import rebuild_theme_closure
+from brick_main.category.counts import recount_theme_objects
+from brick_main.category.tree import THEME_TREE
+from brick_main.cache import bump_versions
+
+# Порядок важен: сначала таблицы, на которые ссылаются остальные
+CATALOG_TABLES = [
+    ('obj', Obj),
+    ('alternate', Alternate),
+    ('images', Images),
+    ('links', Links),
+    ('theme', Theme),
+    ('theme-links', ThemeLinks),
+    ('theme-obj-links', ThemeObjLinks),
+    ('known-color', KnownColor),
+]
+
+# Колонка изменённых строк, по которой после загрузки пересчитываются производные таблицы
+TRACKED_COLUMNS = {
+    Links: 'set_id',
+}
+
+
+def get_conflict_columns(model):
+    """Колонки уникального ключа: unique_together модели, иначе первичный ключ."""
+    if model._meta.unique_together:
+        names = model._meta.unique_together[0]
+    else:
+        names = [model._meta.pk.name]
+    return [model._meta.get_field(name).column for name in names]
+
+
+def get_file_columns(model, header):
+    """Сопоставляет заголовок файла с колонками таблицы (допускаются имена полей и колонок)."""
+    by_name = {}
+    for field in model._meta.concrete_fields:
+        by_name[field.name] = field.column
+        by_name[field.column] = field.column
+
+    columns = []
+    for name in header:
+        name = name.strip()
+        if name not in by_name:
+            raise CommandError(f"{model._meta.db_table}: неизвестная колонка '{name}'")
+        columns.append(by_name[name])
+    return columns
+
+
+def build_merge_sql(model, columns, stage_table, partitions, track=None):
+    """
+    INSERT ... ON CONFLICT из staging-таблицы для одной партиции ключей.
+
+    Партиции не пересекаются по ключу, поэтому воркеры не блокируют друг друга.
+    Строки, которые не изменились, не переписываются (WHERE ... IS DISTINCT FROM).
+    Если указан track, запрос возвращает (значение track, число изменённых строк).
+    """
+    table = model._meta.db_table
+    keys = get_conflict_columns(model)
+    values = [column for column in columns if column not in keys]
+
+    column_list = ', '.join(columns)
+    key_list = ', '.join(keys)
+    partition_key = "concat_ws('|', %s)" % ', '.join(f'{key}::text' for key in keys)
+
+    sql = (
+        f"INSERT INTO {table} ({column_list}) "
+        f"SELECT DISTINCT ON ({key_list}) {column_list} FROM {stage_table} "
+        f"WHERE (hashtext({partition_key}) & 2147483647) %% {partitions} = %s "
+        f"ON CONFLICT ({key_list}) "
+    )
+    if not values:
+        sql += "DO NOTHING"
+    else:
+        assignments = ', '.join(f'{column} = EXCLUDED.{column}' for column in values)
+        current = ', '.join(f'{table}.{column}' for column in values)
+        excluded = ', '.join(f'EXCLUDED.{column}' for column in values)
+        sql += f"DO UPDATE SET {assignments} WHERE ROW({current}) IS DISTINCT FROM ROW({excluded})"
+
+    if track:
+        sql = (
+            f"WITH merged AS ({sql} RETURNING {table}.{track}) "
+            f"SELECT {track}, count(*) FROM merged GROUP BY {track}"
+        )
+    return sql
+
+
+def quote_literal(value):
+    return "'%s'" % value.replace("'", "''")
+
+
+def init_worker():
+    django.setup()
+
+
+def merge_partition(args):
+    sql, partition, track = args
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [partition])
+        if not track:
+            return cursor.rowcount, []
+        rows = cursor.fetchall()
+        return sum(count for _, count in rows), [value for value, _ in rows]
+
+
+class Command(BaseCommand):
+    help = (
+        "Загрузка каталога (obj, links, images, ...) из CSV/TSV: "
+        "COPY в staging-таблицу и upsert только изменившихся строк"
+    )
+
+    def add_arguments(self, parser):
+        for option, model in CATALOG_TABLES:
+            parser.add_argument(
+                f'--{option}', metavar='PATH',
+                help=f"Файл для таблицы {model._meta.db_table} (заголовок — имена колонок)",
+            )
+        parser.add_argument('--delimiter', help="Разделитель (по умолчанию: TAB для .tsv/.txt, иначе запятая)")
+        parser.add_argument('--workers', type=int, default=min(os.cpu_count() or 1, 8), help="Число параллельных процессов для upsert")
+
+    def handle(self, *args, **options):
+        files = []
+        for option, model in CATALOG_TABLES:
+            path = options[option.replace('-', '_')]
+            if path:
+                if not os.path.exists(path):
+                    raise CommandError(f"Файл не найден: {path}")
+                files.append((model, path))
+
+        if not files:
+            raise CommandError("Не указан ни один файл для загрузки")
+
+        workers = max(options['workers'], 1)
+        changes = {}
+        for model, path in files:
+            delimiter = options['delimiter'] or self.guess_delimiter(path)
+            changes[model] = self.import_table(model, path, delimiter, workers)
+
+        self.after_import(changes)
+
+    def guess_delimiter(self, path):
+        return '\t' if path.lower().endswith(('.tsv', '.txt')) else ','
+
+    def import_table(self, model, path, delimiter, workers):
+        table = model._meta.db_table
+        stage_table = f'import_stage_{table}'
+        started = time.monotonic()
+
+        with open(path, newline='', encoding='utf-8') as file:
+            header = next(csv.reader([file.readline()], delimiter=delimiter))
+            columns = get_file_columns(model, header)
+            missing = set(get_conflict_columns(model)) - set(columns)
+            if missing:
+                raise CommandError(f"{table}: в файле нет ключевых колонок {', '.join(sorted(missing))}")
+
+            column_list = ', '.join(columns)
+            with connection.cursor() as cursor:
+                cursor.execute(f"DROP TABLE IF EXISTS {stage_table}")
+                cursor.execute(
+                    f"CREATE UNLOGGED TABLE {stage_table} AS "
+                    f"SELECT {column_list} FROM {table} WITH NO DATA"
+                )
+                cursor.copy_expert(
+                    f"COPY {stage_table} ({column_list}) FROM STDIN "
+                    f"WITH (FORMAT csv, DELIMITER {quote_literal(delimiter)})",
+                    file,
+                )
+                cursor.execute(f"ANALYZE {stage_table}")
+                cursor.execute(f"SELECT count(*) FROM {stage_table}")
+                staged = cursor.fetchone()[0]
+
+        try:
+            track = TRACKED_COLUMNS.get(model)
+            sql = build_merge_sql(model, columns, stage_table, workers, track)
+            tasks = [(sql, partition, track) for partition in range(workers)]
+            if workers == 1:
+                results = list(map(merge_partition, tasks))
+            else:
+                # Каждый процесс открывает своё соединение — закрываем унаследованные
+                connections.close_all()
+                with multiprocessing.Pool(workers, initializer=init_worker) as pool:
+                    results = pool.map(merge_partition, tasks)
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute(f"DROP TABLE IF EXISTS {stage_table}")
+
+        changed = sum(count for count, _ in results)
+        tracked = {value for _, values in results for value in values}
+        self.stdout.write(self.style.SUCCESS(
+            f"{table}: прочитано {staged}, вставлено/изменено {changed} за {time.monotonic() - started:.1f} с"
+        ))
+        return changed, tracked
+
+    def after_import(self, changes):
+        """Пересчёт производных таблиц (сигналы моделей при COPY/upsert не срабатывают)."""
+        _, changed_sets = changes.get(Links, (0, set()))
+        if changed_sets:
+            rebuild_set_inventories(changed_sets)
+            self.stdout.write(f"set_inventory: пересобрано для {len(changed_sets)} наборов и их родителей")
+
+        if changes.get(Theme, (0,))[0] or changes.get(ThemeLinks, (0,))[0]:
+            rebuild_theme_closure()
+            self.stdout.write("theme_closure: пересобрано")
+
+        if any(changes.get(model, (0,))[0] for model in (Theme, ThemeLinks, ThemeObjLinks)):
+            recount_theme_objects()
+            self.stdout.write("theme: количества объектов пересчитаны")
+            bump_versions([THEME_TREE])
@@ -0,0 +1,55 @@
+import csv
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from brick_main.models import Currency, ExchangeRate
+
+
+class Command(BaseCommand):
+    help = (
+        "Загрузка курсов валют из CSV-файла с колонками currency (название валюты) и rate "
+        "(стоимость единицы валюты в базовой валюте) и пересчёт цен в базовой валюте"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV-файл с курсами")
+        parser.add_argument('--delimiter', default=',', help="Разделитель колонок (по умолчанию ',')")
+
+    def handle(self, *args, **options):
+        rates = self.read_rates(options['path'], options['delimiter'])
+        currencies = {currency.name: currency for currency in Currency.objects.filter(name__in=rates)}
+        unknown = sorted(set(rates) - set(currencies))
+        if unknown:
+            raise CommandError(f"Неизвестные валюты: {', '.join(unknown)}")
+
+        current = dict(ExchangeRate.objects.values_list('currency_id', 'rate'))
+        changed = [
+            currency.id for name, currency in currencies.items()
+            if current.get(currency.id) != rates[name]
+        ]
+
+        # Цены пересчитываются одним UPDATE после коммита (см. signals.exchange_rate_changed)
+        with transaction.atomic():
+            for name, currency in currencies.items():
+                if currency.id in changed:
+                    ExchangeRate.objects.update_or_create(currency=currency, defaults={'rate': rates[name]})
+
+        self.stdout.write(self.style.SUCCESS(f"Курсов загружено: {len(rates)}, изменилось: {len(changed)}"))
+
+    def read_rates(self, path, delimiter):
+        rates = {}
+        with open(path, newline='', encoding='utf-8') as file:
+            reader = csv.DictReader(file, delimiter=delimiter)
+            if not reader.fieldnames or not {'currency', 'rate'} <= set(reader.fieldnames):
+                raise CommandError("В файле должны быть колонки currency и rate")
+            for line, row in enumerate(reader, start=2):
+                try:
+                    rate = Decimal(row['rate'].strip())
+                except (InvalidOperation, AttributeError):
+                    raise CommandError(f"Строка {line}: неверный курс '{row['rate']}'")
+                if rate <= 0:
+                    raise CommandError(f"Строка {line}: курс должен быть положительным")
+                rates[row['currency'].strip()] = rate
+        return rates
@@ -0,0 +1,37 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.utils import timezone
+
+from brick_main.analitik.cache import refresh_all
+from brick_main.analitik.rollup import rebuild_daily_sales
+from brick_main.analitik.views import TYPE_MAPPING, compute_top_products
+from brick_main.models import Order
+
+
+class Command(BaseCommand):
+    help = "Пересборка сводок продаж по дням (daily_sales, shop_daily_stats, shop_daily_sales) из истории заказов"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help="Только за последние N дней (по умолчанию — вся история)")
+        parser.add_argument('--batch-days', type=int, default=30, help="Дней в одной транзакции (по умолчанию 30)")
+
+    def handle(self, *args, **options):
+        if options['batch_days'] < 1:
+            raise CommandError("--batch-days должен быть положительным")
+
+        end = timezone.localdate() + timedelta(days=1)
+        if options['days']:
+            start = end - timedelta(days=options['days'])
+        else:
+            first_order = Order.objects.aggregate(first=Min('created_at'))['first']
+            if first_order is None:
+                self.stdout.write("Заказов нет")
+                return
+            start = timezone.localdate(first_order)
+
+        batches = rebuild_daily_sales(start, end, options['batch_days'])
+        # Закэшированные топы посчитаны по старым сводкам
+        refresh_all(TYPE_MAPPING.values(), compute_top_products)
+        self.stdout.write(self.style.SUCCESS(f"Сводки продаж пересобраны с {start} по {end - timedelta(days=1)}, пачек: {batches}"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from brick_main.product.inventory import rebuild_set_inventories
+
+
+class Command(BaseCommand):
+    help = "Полная пересборка развёрнутых составов наборов (set_inventory) из links"
+
+    def handle(self, *args, **options):
+        rebuild_set_inventories()
+        self.stdout.write(self.style.SUCCESS("Составы наборов пересобраны"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from brick_main.category.closure import rebuild_theme_closure
+
+
+class Command(BaseCommand):
+    help = "Полная пересборка замыкания иерархии тематик (theme_closure) из theme_links"
+
+    def handle(self, *args, **options):
+        rebuild_theme_closure()
+        self.stdout.write(self.style.SUCCESS("Замыкание тематик пересобрано"))
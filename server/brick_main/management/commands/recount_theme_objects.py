@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from brick_main.cache import bump_versions
+from brick_main.category.counts import recount_theme_objects
+from brick_main.category.tree import THEME_TREE
+
+
+class Command(BaseCommand):
+    help = "Пересчёт хранимых количеств объектов тематик (после массовых загрузок)"
+
+    def handle(self, *args, **options):
+        recount_theme_objects()
+        bump_versions([THEME_TREE])
+        self.stdout.write(self.style.SUCCESS("Количества объектов тематик пересчитаны"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from brick_main.product.best_offer import refresh_best_offers
+
+
+class Command(BaseCommand):
+    help = "Полный пересчёт лучших предложений (цена, магазин, остаток) для всех объектов каталога"
+
+    def handle(self, *args, **options):
+        refresh_best_offers()
+        self.stdout.write(self.style.SUCCESS("Лучшие предложения пересчитаны"))
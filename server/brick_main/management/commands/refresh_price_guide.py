@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from brick_main.product.price_guide import refresh_price_guides
+
+
+class Command(BaseCommand):
+    help = "Полная пересборка сводки цен (price_guide) по предложениям продавцов"
+
+    def handle(self, *args, **options):
+        refresh_price_guides()
+        self.stdout.write(self.style.SUCCESS("Сводка цен пересобрана"))
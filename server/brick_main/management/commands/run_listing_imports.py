@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from brick_main.models import ListingImportJob
+from brick_main.shop.bulk_upload import claimable_jobs, run_import
+
+
+class Command(BaseCommand):
+    help = (
+        "Выполняет задачи массовой загрузки предложений в статусе 'В очереди' "
+        "(например, оставшиеся после перезапуска сервера) и продолжает задачи, "
+        "брошенные упавшим процессом"
+    )
+
+    def handle(self, *args, **options):
+        job_ids = list(
+            claimable_jobs().order_by('id').values_list('id', flat=True)
+        )
+        for job_id in job_ids:
+            run_import(job_id)
+            job = ListingImportJob.objects.get(id=job_id)
+            self.stdout.write(
+                f"Задача {job_id}: {job.get_status_display()}, "
+                f"создано {job.created_count}, ошибок {job.error_count}"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Обработано задач: {len(job_ids)}"))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from brick_main.analitik.cache import PERIOD_TTL, refresh_all
+from brick_main.analitik.views import TYPE_MAPPING, compute_top_products
+
+
+class Command(BaseCommand):
+    help = "Заполнение кэша аналитики: топы для всех пар (тип, период)"
+
+    def handle(self, *args, **options):
+        refresh_all(TYPE_MAPPING.values(), compute_top_products)
+        self.stdout.write(self.style.SUCCESS(
+            f"Кэш аналитики заполнен: {len(TYPE_MAPPING) * len(PERIOD_TTL)} ключей"
+        ))
@@ -0,0 +1,61 @@
+# Generated by Django 5.2 on 2026-10-18 06:22
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+# Поисковый вектор: идентификатор (вес A, без морфологии) + название (вес B, english)
+SEARCH_VECTOR_SQL = """
+CREATE OR REPLACE FUNCTION obj_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('simple', coalesce(NEW.id, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.item_name, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER obj_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF id, item_name ON obj
+    FOR EACH ROW EXECUTE FUNCTION obj_search_vector_update();
+
+UPDATE obj SET search_vector =
+    setweight(to_tsvector('simple', coalesce(id, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(item_name, '')), 'B');
+"""
+
+SEARCH_VECTOR_REVERSE_SQL = """
+DROP TRIGGER IF EXISTS obj_search_vector_trigger ON obj;
+DROP FUNCTION IF EXISTS obj_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('brick_main', '0011_order_delivery'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='obj',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, null=True, verbose_name='Поисковый вектор'),
+        ),
+        migrations.AddIndex(
+            model_name='alternate',
+            index=models.Index(fields=['item_id'], name='alternate_item_id_040681_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='obj',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='obj_search_vector_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='obj',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['item_name'], name='obj_item_name_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.RunSQL(SEARCH_VECTOR_SQL, SEARCH_VECTOR_REVERSE_SQL),
+    ]
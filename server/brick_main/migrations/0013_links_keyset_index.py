@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-18 06:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('brick_main', '0012_obj_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='links',
+            index=models.Index(fields=['set', 'part_class', 'id'], name='links_set_id_344c70_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2 on 2026-10-18 06:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('brick_main', '0013_links_keyset_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SetInventory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('color', models.TextField(verbose_name='Цвет')),
+                ('total_count', models.IntegerField(verbose_name='Общее количество')),
+                ('part', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inventory_as_part', to='brick_main.obj', verbose_name='Деталь')),
+                ('set', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inventory', to='brick_main.obj', verbose_name='Набор')),
+            ],
+            options={
+                'verbose_name': 'Состав набора',
+                'verbose_name_plural': 'Составы наборов',
+                'db_table': 'set_inventory',
+                'unique_together': {('set', 'part', 'color')},
+            },
+        ),
+    ]
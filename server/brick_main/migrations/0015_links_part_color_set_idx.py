@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-18 06:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('brick_main', '0014_setinventory'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='links',
+            name='links_part_id_d4777d_idx',
+        ),
+        migrations.AddIndex(
+            model_name='links',
+            index=models.Index(fields=['part', 'color', 'set'], include=('part_count',), name='links_part_color_set_idx'),
+        ),
+    ]
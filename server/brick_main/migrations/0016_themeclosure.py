@@ -0,0 +1,47 @@
+# Generated by Django 5.2 on 2026-10-18 06:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+BUILD_CLOSURE_SQL = """
+WITH RECURSIVE up (ancestor_id, descendant_id, depth) AS (
+    SELECT id, id, 0 FROM theme
+    UNION
+    SELECT theme_links.high_id, up.descendant_id, up.depth + 1
+    FROM up
+    JOIN theme_links ON theme_links.low_id = up.ancestor_id
+    WHERE up.depth < 50
+)
+INSERT INTO theme_closure (ancestor_id, descendant_id, depth)
+SELECT ancestor_id, descendant_id, MIN(depth)
+FROM up
+GROUP BY ancestor_id, descendant_id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('brick_main', '0015_links_part_color_set_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ThemeClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.IntegerField(verbose_name='Глубина')),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='closure_descendants', to='brick_main.theme', verbose_name='Предок')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='closure_ancestors', to='brick_main.theme', verbose_name='Потомок')),
+            ],
+            options={
+                'verbose_name': 'Замыкание тематических коллекций',
+                'verbose_name_plural': 'Замыкание тематических коллекций',
+                'db_table': 'theme_closure',
+                'indexes': [models.Index(fields=['descendant', 'depth'], name='theme_closu_descend_01bef4_idx')],
+                'unique_together': {('ancestor', 'descendant')},
+            },
+        ),
+        migrations.RunSQL(BUILD_CLOSURE_SQL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2 on 2026-10-18 06:28
+
+from django.db import migrations, models
+
+
+RECOUNT_SQL = """
+UPDATE theme SET
+    direct_objects_count = (SELECT COUNT(*) FROM theme_obj_links WHERE theme_obj_links.high_id = theme.id),
+    total_objects_count = counts.total
+FROM (
+    SELECT closure.ancestor_id, COUNT(DISTINCT theme_obj_links.obj_id) AS total
+    FROM theme_closure closure
+    LEFT JOIN theme_obj_links ON theme_obj_links.high_id = closure.descendant_id
+    GROUP BY closure.ancestor_id
+) counts
+WHERE theme.id = counts.ancestor_id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('brick_main', '0017_cacheversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='theme',
+            name='direct_objects_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Объектов в коллекции'),
+        ),
+        migrations.AddField(
+            model_name='theme',
+            name='total_objects_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Объектов с подколлекциями'),
+        ),
+        migrations.RunSQL(RECOUNT_SQL, migrations.RunSQL.noop),
+    ]
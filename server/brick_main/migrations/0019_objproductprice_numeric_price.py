@@ -0,0 +1,54 @@
+# Generated by Django 5.2 on 2026-10-18 06:30
+
+from django.db import migrations, models
+
+
+# Разбор строковых цен: пробелы убираются, запятая считается десятичным
+# разделителем, берётся первое число. Нераспознанные значения становятся NULL.
+PARSE_PRICE_SQL = r"""
+UPDATE product_price
+SET price_amount = round(
+    substring(replace(regexp_replace(price, '\s', '', 'g'), ',', '.') from '[0-9]+(?:\.[0-9]+)?')::numeric,
+    2
+)
+WHERE price IS NOT NULL
+"""
+
+FORMAT_PRICE_SQL = """
+UPDATE product_price SET price_text = price_amount::text WHERE price_amount IS NOT NULL
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('brick_main', '0018_theme_objects_counts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='objproductprice',
+            name='price_amount',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True, verbose_name='Цена'),
+        ),
+        migrations.RunSQL(PARSE_PRICE_SQL, migrations.RunSQL.noop),
+        migrations.RenameField(
+            model_name='objproductprice',
+            old_name='price',
+            new_name='price_text',
+        ),
+        migrations.RunSQL(migrations.RunSQL.noop, FORMAT_PRICE_SQL),
+        migrations.RemoveField(
+            model_name='objproductprice',
+            name='price_text',
+        ),
+        migrations.RenameField(
+            model_name='objproductprice',
+            old_name='price_amount',
+            new_name='price',
+        ),
+        migrations.AddIndex(
+            model_name='objproductprice',
+            index=models.Index(fields=['product', 'currency', 'price'], name='product_pri_product_aa40ea_idx'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2 on 2026-10-18 06:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Цена в базовой валюте считается в БД при каждой вставке/изменении цены,
+# поэтому её не нужно поддерживать во всех местах создания ObjProductPrice
+NORMALIZE_TRIGGER_SQL = """
+CREATE FUNCTION product_price_normalize() RETURNS trigger AS $$
+BEGIN
+    NEW.normalized_price := round(
+        NEW.price * (SELECT rate FROM exchange_rate WHERE exchange_rate.currency_id = NEW.currency_id), 2
+    );
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER product_price_normalize_trigger
+    BEFORE INSERT OR UPDATE OF price, currency_id ON product_price
+    FOR EACH ROW EXECUTE FUNCTION product_price_normalize();
+"""
+
+DROP_NORMALIZE_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS product_price_normalize_trigger ON product_price;
+DROP FUNCTION IF EXISTS product_price_normalize();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('brick_main', '0019_objproductprice_numeric_price'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExchangeRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rate', models.DecimalField(decimal_places=8, max_digits=18, verbose_name='Курс к базовой валюте')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+            ],
+            options={
+                'verbose_name': 'Курс валюты',
+                'verbose_name_plural': 'Курсы валют',
+                'db_table': 'exchange_rate',
+            },
+        ),
+        migrations.AddField(
+            model_name='objproductprice',
+            name='normalized_price',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=14, null=True, verbose_name='Цена в базовой валюте'),
+        ),
+        migrations.AddIndex(
+            model_name='objproductprice',
+            index=models.Index(fields=['product', 'normalized_price'], name='product_pri_product_8e0674_idx'),
+        ),
+        migrations.AddField(
+            model_name='exchangerate',
+            name='currency',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='exchange_rate', to='brick_main.currency', verbose_name='Валюта'),
+        ),
+        migrations.RunSQL(NORMALIZE_TRIGGER_SQL, DROP_NORMALIZE_TRIGGER_SQL),
+    ]
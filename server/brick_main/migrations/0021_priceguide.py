@@ -0,0 +1,55 @@
+# Generated by Django 5.2 on 2026-10-18 06:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+BUILD_SQL = """
+INSERT INTO price_guide (obj_id, condition, currency_id, min_price, max_price, avg_price, median_price, offer_count)
+SELECT
+    obj_product.obj_id,
+    COALESCE(obj_product.condition, ''),
+    product_price.currency_id,
+    MIN(product_price.price),
+    MAX(product_price.price),
+    round(AVG(product_price.price), 2),
+    round(percentile_cont(0.5) WITHIN GROUP (ORDER BY product_price.price)::numeric, 2),
+    COUNT(*)
+FROM obj_product
+JOIN product_price ON product_price.product_id = obj_product.id
+WHERE obj_product.obj_id IS NOT NULL
+  AND product_price.price IS NOT NULL
+  AND product_price.currency_id IS NOT NULL
+GROUP BY obj_product.obj_id, COALESCE(obj_product.condition, ''), product_price.currency_id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('brick_main', '0020_exchange_rate_normalized_price'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceGuide',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('condition', models.CharField(blank=True, choices=[('новое', 'Новый'), ('б/у:', 'б/у:')], max_length=100, verbose_name='Состояние')),
+                ('min_price', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Минимальная цена')),
+                ('max_price', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Максимальная цена')),
+                ('avg_price', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Средняя цена')),
+                ('median_price', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Медианная цена')),
+                ('offer_count', models.PositiveIntegerField(verbose_name='Количество предложений')),
+                ('currency', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='brick_main.currency', verbose_name='Валюта')),
+                ('obj', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_guide', to='brick_main.obj', verbose_name='Объект')),
+            ],
+            options={
+                'verbose_name': 'Сводка цен',
+                'verbose_name_plural': 'Сводка цен',
+                'db_table': 'price_guide',
+                'unique_together': {('obj', 'condition', 'currency')},
+            },
+        ),
+        migrations.RunSQL(BUILD_SQL, migrations.RunSQL.noop),
+    ]
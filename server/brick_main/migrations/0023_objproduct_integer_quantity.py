@@ -0,0 +1,27 @@
+# Generated by Django 5.2 on 2026-10-18 06:36
+
+from django.db import migrations, models
+
+# Перед сменой типа: нечисловые и слишком большие значения считаются нулевым остатком
+CLEAN_QUANTITY_SQL = """
+UPDATE obj_product SET quantity = CASE
+    WHEN quantity ~ '^ *[0-9]{1,9} *$' THEN trim(quantity)
+    ELSE '0'
+END
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('brick_main', '0022_listingimportjob'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CLEAN_QUANTITY_SQL, migrations.RunSQL.noop),
+        migrations.AlterField(
+            model_name='objproduct',
+            name='quantity',
+            field=models.PositiveIntegerField(default=0, verbose_name='Количество'),
+        ),
+    ]
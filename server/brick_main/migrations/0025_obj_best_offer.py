@@ -0,0 +1,65 @@
+# Generated by Django 5.2 on 2026-10-18 06:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Начальное заполнение лучших предложений (см. brick_main/product/best_offer.py)
+REFRESH_SQL = """
+UPDATE obj SET
+    best_price = best.normalized_price,
+    best_offer_id = best.product_id,
+    best_offer_shop_id = best.shop_id,
+    best_offer_quantity = COALESCE(best.quantity, 0)
+FROM (
+    SELECT obj.id AS obj_id, offer.normalized_price, offer.product_id, offer.shop_id, offer.quantity
+    FROM obj
+    LEFT JOIN LATERAL (
+        SELECT product_price.normalized_price, obj_product.id AS product_id, obj_product.shop_id, obj_product.quantity
+        FROM obj_product
+        JOIN product_price ON product_price.product_id = obj_product.id
+        WHERE obj_product.obj_id = obj.id
+          AND obj_product.quantity > 0
+          AND product_price.normalized_price IS NOT NULL
+        ORDER BY product_price.normalized_price, obj_product.id
+        LIMIT 1
+    ) offer ON TRUE
+) best
+WHERE obj.id = best.obj_id
+  AND (obj.best_price, obj.best_offer_id, obj.best_offer_shop_id, obj.best_offer_quantity)
+      IS DISTINCT FROM (best.normalized_price, best.product_id, best.shop_id, COALESCE(best.quantity, 0))
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('brick_main', '0024_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='obj',
+            name='best_offer',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='brick_main.objproduct', verbose_name='Лучшее предложение'),
+        ),
+        migrations.AddField(
+            model_name='obj',
+            name='best_offer_quantity',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Остаток лучшего предложения'),
+        ),
+        migrations.AddField(
+            model_name='obj',
+            name='best_offer_shop',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='brick_main.shops', verbose_name='Магазин лучшего предложения'),
+        ),
+        migrations.AddField(
+            model_name='obj',
+            name='best_price',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=14, null=True, verbose_name='Лучшая цена'),
+        ),
+        migrations.AddIndex(
+            model_name='obj',
+            index=models.Index(fields=['best_price', 'id'], name='obj_best_price_idx'),
+        ),
+        migrations.RunSQL(REFRESH_SQL, migrations.RunSQL.noop),
+    ]
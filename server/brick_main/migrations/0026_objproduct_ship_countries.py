@@ -0,0 +1,46 @@
+# Generated by Django 5.2 on 2026-10-18 06:40
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.conf import settings
+from django.db import migrations, models
+
+# Начальное заполнение стран доставки (см. brick_main/product/shipping.py)
+REFRESH_SQL = """
+UPDATE obj_product SET ship_countries = eligible.countries
+FROM (
+    SELECT
+        obj_product.id,
+        CASE WHEN COALESCE(shops.is_openid, FALSE) THEN ARRAY[]::integer[]
+        ELSE COALESCE(
+            (SELECT array_agg(country_id ORDER BY country_id)::integer[] FROM obj_product_country WHERE objproduct_id = obj_product.id),
+            (SELECT array_agg(country_id ORDER BY country_id)::integer[] FROM shops_country WHERE shops_id = obj_product.shop_id),
+            ARRAY[]::integer[]
+        ) END AS countries
+    FROM obj_product
+    LEFT JOIN shops ON shops.id = obj_product.shop_id
+) eligible
+WHERE obj_product.id = eligible.id AND obj_product.ship_countries IS DISTINCT FROM eligible.countries
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authen', '0005_customuser_verification_code'),
+        ('brick_main', '0025_obj_best_offer'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='objproduct',
+            name='ship_countries',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), blank=True, default=list, editable=False, size=None, verbose_name='Страны доставки'),
+        ),
+        migrations.AddIndex(
+            model_name='objproduct',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['ship_countries'], name='obj_product_ship_countries_gin'),
+        ),
+        migrations.RunSQL(REFRESH_SQL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2 on 2026-10-18 06:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Продажи из уже существующих заказов; день — локальная дата заказа (как в analitik/rollup.py)
+BACKFILL_SQL = """
+INSERT INTO daily_sales (day, product_id, obj_type, quantity)
+SELECT ("order".created_at AT TIME ZONE %s)::date, order_item.product_id, obj.item_class, SUM(order_item.quantity)
+FROM order_item
+JOIN "order" ON "order".id = order_item.order_id
+JOIN obj_product ON obj_product.id = order_item.product_id
+JOIN obj ON obj.id = obj_product.obj_id
+GROUP BY 1, order_item.product_id, obj.item_class
+"""
+
+
+def backfill_daily_sales(apps, schema_editor):
+    schema_editor.execute(BACKFILL_SQL, [settings.TIME_ZONE])
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('brick_main', '0026_objproduct_ship_countries'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='День')),
+                ('obj_type', models.IntegerField(verbose_name='Тип объекта')),
+                ('quantity', models.PositiveIntegerField(default=0, verbose_name='Продано единиц')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='brick_main.objproduct', verbose_name='Продукт')),
+            ],
+            options={
+                'verbose_name': 'Продажи за день',
+                'verbose_name_plural': 'Продажи за день',
+                'db_table': 'daily_sales',
+                'indexes': [models.Index(fields=['obj_type', 'day'], include=('product', 'quantity'), name='daily_sales_type_day_idx')],
+                'unique_together': {('day', 'product')},
+            },
+        ),
+        migrations.RunPython(backfill_daily_sales, migrations.RunPython.noop),
+    ]
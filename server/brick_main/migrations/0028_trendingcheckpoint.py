@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-18 06:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('brick_main', '0027_dailysales'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window', models.CharField(max_length=16, unique=True, verbose_name='Окно')),
+                ('buckets', models.JSONField(default=list, verbose_name='Интервалы')),
+                ('counters', models.BinaryField(default=bytes, verbose_name='Счётчики')),
+                ('candidates', models.JSONField(default=dict, verbose_name='Кандидаты')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+            ],
+            options={
+                'verbose_name': 'Контрольная точка трендов',
+                'verbose_name_plural': 'Контрольные точки трендов',
+                'db_table': 'trending_checkpoint',
+            },
+        ),
+    ]
@@ -0,0 +1,120 @@
+# Generated by Django 5.2 on 2026-10-18 06:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# У старых позиций цены на момент заказа нет: берётся текущая лучшая цена предложения
+ORDER_ITEM_PRICE_SQL = """
+UPDATE order_item
+SET price = best.price
+FROM (
+    SELECT product_id, MIN(normalized_price) AS price
+    FROM product_price
+    GROUP BY product_id
+) AS best
+WHERE best.product_id = order_item.product_id AND order_item.price IS NULL
+"""
+
+# Сводки магазинов из уже существующих заказов; день — локальная дата заказа (как в analitik/rollup.py)
+BACKFILL_STATS_SQL = """
+INSERT INTO shop_daily_stats (shop_id, day, status_id, orders, units, revenue)
+SELECT "order".shop_id, ("order".created_at AT TIME ZONE %s)::date, "order".status_id, COUNT(DISTINCT "order".id),
+       COALESCE(SUM(order_item.quantity), 0), COALESCE(SUM(order_item.quantity * order_item.price), 0)
+FROM "order"
+LEFT JOIN order_item ON order_item.order_id = "order".id
+GROUP BY 1, 2, 3
+"""
+
+BACKFILL_SALES_SQL = """
+INSERT INTO shop_daily_sales (shop_id, day, product_id, units, revenue)
+SELECT "order".shop_id, ("order".created_at AT TIME ZONE %s)::date, order_item.product_id,
+       SUM(order_item.quantity), COALESCE(SUM(order_item.quantity * order_item.price), 0)
+FROM "order"
+JOIN order_item ON order_item.order_id = "order".id
+GROUP BY 1, 2, 3
+"""
+
+
+def backfill_shop_rollups(apps, schema_editor):
+    schema_editor.execute(BACKFILL_STATS_SQL, [settings.TIME_ZONE])
+    schema_editor.execute(BACKFILL_SALES_SQL, [settings.TIME_ZONE])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('brick_main', '0028_trendingcheckpoint'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShopDailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='День')),
+                ('units', models.PositiveIntegerField(default=0, verbose_name='Продано единиц')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Выручка в базовой валюте')),
+            ],
+            options={
+                'verbose_name': 'Продажи предложения за день',
+                'verbose_name_plural': 'Продажи предложений за день',
+                'db_table': 'shop_daily_sales',
+            },
+        ),
+        migrations.CreateModel(
+            name='ShopDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='День')),
+                ('orders', models.PositiveIntegerField(default=0, verbose_name='Заказов')),
+                ('units', models.PositiveIntegerField(default=0, verbose_name='Продано единиц')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Выручка в базовой валюте')),
+            ],
+            options={
+                'verbose_name': 'Заказы магазина за день',
+                'verbose_name_plural': 'Заказы магазинов за день',
+                'db_table': 'shop_daily_stats',
+            },
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='price',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=14, null=True, verbose_name='Цена за единицу'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['shop', 'created_at'], name='order_shop_created_idx'),
+        ),
+        migrations.AddField(
+            model_name='shopdailysales',
+            name='product',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='brick_main.objproduct', verbose_name='Продукт'),
+        ),
+        migrations.AddField(
+            model_name='shopdailysales',
+            name='shop',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='brick_main.shops', verbose_name='Магазин'),
+        ),
+        migrations.AddField(
+            model_name='shopdailystats',
+            name='shop',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='brick_main.shops', verbose_name='Магазин'),
+        ),
+        migrations.AddField(
+            model_name='shopdailystats',
+            name='status',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='brick_main.statusorder', verbose_name='Статус'),
+        ),
+        migrations.AddIndex(
+            model_name='shopdailysales',
+            index=models.Index(fields=['shop', 'day'], include=('product', 'units', 'revenue'), name='shop_daily_sales_shop_day_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shopdailystats',
+            index=models.Index(fields=['shop', 'day'], name='shop_daily_stats_shop_day_idx'),
+        ),
+        migrations.RunSQL(ORDER_ITEM_PRICE_SQL, migrations.RunSQL.noop),
+        migrations.RunPython(backfill_shop_rollups, migrations.RunPython.noop),
+    ]
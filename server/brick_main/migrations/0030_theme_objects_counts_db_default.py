@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-18 06:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('brick_main', '0029_shop_rollups'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='theme',
+            name='direct_objects_count',
+            field=models.PositiveIntegerField(db_default=0, default=0, verbose_name='Объектов в коллекции'),
+        ),
+        migrations.AlterField(
+            model_name='theme',
+            name='total_objects_count',
+            field=models.PositiveIntegerField(db_default=0, default=0, verbose_name='Объектов с подколлекциями'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 06:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('brick_main', '0030_theme_objects_counts_db_default'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='obj',
+            name='best_offer_quantity',
+            field=models.PositiveIntegerField(db_default=0, default=0, editable=False, verbose_name='Остаток лучшего предложения'),
+        ),
+    ]
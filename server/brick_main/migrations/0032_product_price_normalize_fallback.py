@@ -0,0 +1,87 @@
+# Generated by Django 5.2 on 2026-10-18 07:20
+
+from django.db import migrations
+
+# Пока курс валюты не загружен (load_exchange_rates), цена берётся как есть — как
+# сравнивались цены до перехода на normalized_price. Иначе сразу после развёртывания
+# фильтр и сортировка по цене, лучшие предложения и фасеты цены видели бы только NULL
+NORMALIZE_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION product_price_normalize() RETURNS trigger AS $$
+BEGIN
+    NEW.normalized_price := round(
+        NEW.price * COALESCE((SELECT rate FROM exchange_rate WHERE exchange_rate.currency_id = NEW.currency_id), 1), 2
+    );
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+"""
+
+PREVIOUS_NORMALIZE_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION product_price_normalize() RETURNS trigger AS $$
+BEGIN
+    NEW.normalized_price := round(
+        NEW.price * (SELECT rate FROM exchange_rate WHERE exchange_rate.currency_id = NEW.currency_id), 2
+    );
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+"""
+
+BACKFILL_SQL = """
+UPDATE product_price SET normalized_price = round(price, 2)
+WHERE normalized_price IS NULL
+  AND price IS NOT NULL
+  AND NOT EXISTS (SELECT 1 FROM exchange_rate WHERE exchange_rate.currency_id = product_price.currency_id)
+"""
+
+# Позиции заказов без цены на момент заказа (см. миграцию 0029)
+ORDER_ITEM_PRICE_SQL = """
+UPDATE order_item
+SET price = best.price
+FROM (
+    SELECT product_id, MIN(normalized_price) AS price
+    FROM product_price
+    GROUP BY product_id
+) AS best
+WHERE best.product_id = order_item.product_id AND order_item.price IS NULL
+"""
+
+# Лучшие предложения с новыми ценами (см. brick_main/product/best_offer.py)
+REFRESH_BEST_OFFERS_SQL = """
+UPDATE obj SET
+    best_price = best.normalized_price,
+    best_offer_id = best.product_id,
+    best_offer_shop_id = best.shop_id,
+    best_offer_quantity = COALESCE(best.quantity, 0)
+FROM (
+    SELECT obj.id AS obj_id, offer.normalized_price, offer.product_id, offer.shop_id, offer.quantity
+    FROM obj
+    LEFT JOIN LATERAL (
+        SELECT product_price.normalized_price, obj_product.id AS product_id, obj_product.shop_id, obj_product.quantity
+        FROM obj_product
+        JOIN product_price ON product_price.product_id = obj_product.id
+        WHERE obj_product.obj_id = obj.id
+          AND obj_product.quantity > 0
+          AND product_price.normalized_price IS NOT NULL
+        ORDER BY product_price.normalized_price, obj_product.id
+        LIMIT 1
+    ) offer ON TRUE
+) best
+WHERE obj.id = best.obj_id
+  AND (obj.best_price, obj.best_offer_id, obj.best_offer_shop_id, obj.best_offer_quantity)
+      IS DISTINCT FROM (best.normalized_price, best.product_id, best.shop_id, COALESCE(best.quantity, 0))
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('brick_main', '0031_obj_best_offer_quantity_db_default'),
+    ]
+
+    operations = [
+        migrations.RunSQL(NORMALIZE_FUNCTION_SQL, PREVIOUS_NORMALIZE_FUNCTION_SQL),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+        migrations.RunSQL(ORDER_ITEM_PRICE_SQL, migrations.RunSQL.noop),
+        migrations.RunSQL(REFRESH_BEST_OFFERS_SQL, migrations.RunSQL.noop),
+    ]
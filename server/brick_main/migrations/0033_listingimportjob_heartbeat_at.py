@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 07:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('brick_main', '0032_product_price_normalize_fallback'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listingimportjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Последняя активность'),
+        ),
+    ]
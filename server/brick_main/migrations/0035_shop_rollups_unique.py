@@ -0,0 +1,54 @@
+# Generated by Django 5.2 on 2026-10-18 07:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+# Параллельные пересчёты одного дня могли задвоить строки: сводки собираются заново
+# из истории заказов (как в 0029), после чего на них ставятся уникальные ключи
+BACKFILL_STATS_SQL = """
+INSERT INTO shop_daily_stats (shop_id, day, status_id, orders, units, revenue)
+SELECT "order".shop_id, ("order".created_at AT TIME ZONE %s)::date, "order".status_id, COUNT(DISTINCT "order".id),
+       COALESCE(SUM(order_item.quantity), 0), COALESCE(SUM(order_item.quantity * order_item.price), 0)
+FROM "order"
+LEFT JOIN order_item ON order_item.order_id = "order".id
+GROUP BY 1, 2, 3
+"""
+
+BACKFILL_SALES_SQL = """
+INSERT INTO shop_daily_sales (shop_id, day, product_id, units, revenue)
+SELECT "order".shop_id, ("order".created_at AT TIME ZONE %s)::date, order_item.product_id,
+       SUM(order_item.quantity), COALESCE(SUM(order_item.quantity * order_item.price), 0)
+FROM "order"
+JOIN order_item ON order_item.order_id = "order".id
+GROUP BY 1, 2, 3
+"""
+
+
+def rebuild_shop_rollups(apps, schema_editor):
+    schema_editor.execute("DELETE FROM shop_daily_stats")
+    schema_editor.execute("DELETE FROM shop_daily_sales")
+    schema_editor.execute(BACKFILL_STATS_SQL, [settings.TIME_ZONE])
+    schema_editor.execute(BACKFILL_SALES_SQL, [settings.TIME_ZONE])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('brick_main', '0034_objproduct_ship_countries_bigint'),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_shop_rollups, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='shopdailystats',
+            name='shop_daily_stats_shop_day_idx',
+        ),
+        migrations.AlterUniqueTogether(
+            name='shopdailysales',
+            unique_together={('shop', 'day', 'product')},
+        ),
+        migrations.AddConstraint(
+            model_name='shopdailystats',
+            constraint=models.UniqueConstraint(fields=('shop', 'day', 'status'), name='shop_daily_stats_uniq', nulls_distinct=False),
+        ),
+    ]
@@ -1,4 +1,8 @@
-from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from authen.models import Country, CustomUser
 
 
@@ -38,6 +42,24 @@ class Currency(models.Model):
         verbose_name_plural = "Тип валюты"
 
 
+class ExchangeRate(models.Model):
+    """
+    Курс валюты к базовой: сколько единиц базовой валюты стоит одна единица currency
+    (у базовой валюты курс 1). Загружается локально командой load_exchange_rates.
+    """
+    currency = models.OneToOneField(Currency, on_delete=models.CASCADE, related_name="exchange_rate", verbose_name="Валюта")
+    rate = models.DecimalField(max_digits=18, decimal_places=8, verbose_name="Курс к базовой валюте")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Обновлено")
+
+    def __str__(self):
+        return f"{self.currency}: {self.rate}"
+
+    class Meta:
+        db_table = 'exchange_rate'
+        verbose_name = "Курс валюты"
+        verbose_name_plural = "Курсы валют"
+
+
 class ConditionType(models.TextChoices):
     NEW = "новое", "Новый"
     OLD = "б/у:", "б/у:"
@@ -72,6 +94,9 @@ class Alternate(models.Model):
         db_table = 'alternate'
         verbose_name = "Альтернативный идентификатор"
         verbose_name_plural = "Альтернативные идентификаторы"
+        indexes = [
+            models.Index(fields=['item_id']),
+        ]
 
     def __str__(self):
         return f"Альтернативный ID: {self.item_id} для объекта {self.id}"
@@ -113,13 +138,36 @@ class Links(models.Model):
         verbose_name_plural = "Связи"
         indexes = [
             models.Index(fields=['set']),
-            models.Index(fields=['part']),
+            models.Index(fields=['set', 'part_class', 'id']),
+            # Покрывающий индекс для обратного поиска "в каких наборах есть деталь"
+            models.Index(fields=['part', 'color', 'set'], include=['part_count'], name='links_part_color_set_idx'),
         ]
 
     def __str__(self):
         return f"Связь: {self.set} -> {self.part}"
 
 
+class SetInventory(models.Model):
+    """
+    Развёрнутый состав набора: сколько деталей каждого цвета содержит набор
+    с учётом вложенных наборов и минифигурок. Строится из Links
+    (см. brick_main.product.inventory), вручную не редактируется.
+    """
+    set = models.ForeignKey('Obj', models.CASCADE, related_name='inventory', verbose_name="Набор")
+    part = models.ForeignKey('Obj', models.CASCADE, related_name='inventory_as_part', verbose_name="Деталь")
+    color = models.TextField(verbose_name="Цвет")
+    total_count = models.IntegerField(verbose_name="Общее количество")
+
+    class Meta:
+        db_table = 'set_inventory'
+        unique_together = (('set', 'part', 'color'),)
+        verbose_name = "Состав набора"
+        verbose_name_plural = "Составы наборов"
+
+    def __str__(self):
+        return f"{self.set_id}: {self.part_id} ({self.color}) x {self.total_count}"
+
+
 class Obj(models.Model):
     """
     Основная модель для хранения объектов (например, наборы, детали и т.д.).
@@ -135,11 +183,25 @@ class Obj(models.Model):
     flat_dim = models.TextField(blank=True, null=True, verbose_name="Плоские размеры")
     stud_dim = models.TextField(blank=True, null=True, verbose_name="Размеры шпильки")
     instructions = models.BooleanField(blank=True, null=True, verbose_name="Наличие инструкций")
+    # Заполняется триггером obj_search_vector_trigger (см. миграцию 0012)
+    search_vector = SearchVectorField(blank=True, null=True, editable=False, verbose_name="Поисковый вектор")
+    # Лучшее предложение: самая низкая цена в базовой валюте среди предложений в наличии.
+    # Обновляется при изменении предложений (см. product/best_offer.py). Значение по умолчанию
+    # есть и в БД: import_catalog вставляет в obj только колонки из файла
+    best_price = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True, editable=False, verbose_name="Лучшая цена")
+    best_offer = models.ForeignKey('ObjProduct', on_delete=models.SET_NULL, null=True, blank=True, editable=False, related_name="+", verbose_name="Лучшее предложение")
+    best_offer_shop = models.ForeignKey(Shops, on_delete=models.SET_NULL, null=True, blank=True, editable=False, related_name="+", verbose_name="Магазин лучшего предложения")
+    best_offer_quantity = models.PositiveIntegerField(default=0, db_default=0, editable=False, verbose_name="Остаток лучшего предложения")
 
     class Meta:
         db_table = 'obj'
         verbose_name = "Объект"
         verbose_name_plural = "Объекты"
+        indexes = [
+            GinIndex(fields=['search_vector'], name='obj_search_vector_gin'),
+            GinIndex(fields=['item_name'], name='obj_item_name_trgm', opclasses=['gin_trgm_ops']),
+            models.Index(fields=['best_price', 'id'], name='obj_best_price_idx'),
+        ]
 
     def __str__(self):
         return f"{self.item_name} ({self.id})"
@@ -152,46 +214,30 @@ class Theme(models.Model):
     id = models.IntegerField(primary_key=True, verbose_name="Идентификатор")
     collection_name = models.TextField(blank=True, null=True, verbose_name="Название коллекции")
     size = models.IntegerField(blank=True, null=True, verbose_name="Размер коллекции")
+    # Поддерживаются автоматически (см. brick_main.category.counts). Значение по умолчанию
+    # есть и в БД: import_catalog вставляет в theme только колонки из файла
+    direct_objects_count = models.PositiveIntegerField(default=0, db_default=0, verbose_name="Объектов в коллекции")
+    total_objects_count = models.PositiveIntegerField(default=0, db_default=0, verbose_name="Объектов с подколлекциями")
 
     def get_all_subcategories(self):
-        """Возвращает все подкатегории, включая вложенные"""
-        subcategories = set()
-        direct_subcats = Theme.objects.filter(id__in=self.high_links.values('low'))
-        
-        for subcat in direct_subcats:
-            subcategories.add(subcat)
-            subcategories.update(subcat.get_all_subcategories())
-        
-        return subcategories
+        """Возвращает все подкатегории, включая вложенные (один запрос по ThemeClosure)"""
+        return Theme.objects.filter(closure_ancestors__ancestor=self, closure_ancestors__depth__gt=0)
 
     def get_all_objects(self):
         """Возвращает все объекты категории и её подкатегорий"""
-        # Получаем все категории (текущую и все подкатегории)
-        categories = {self}.union(self.get_all_subcategories())
-        category_ids = [cat.id for cat in categories]
-        
-        # Получаем все объекты из всех категорий
-        return Obj.objects.filter(theme_obj_links__high_id__in=category_ids).distinct()
+        subtree = ThemeClosure.objects.filter(ancestor=self).values('descendant')
+        return Obj.objects.filter(
+            id__in=ThemeObjLinks.objects.filter(high__in=subtree).values('obj')
+        )
 
     def get_total_objects_count(self):
-        """Подсчитывает общее количество объектов в категории и всех её подкатегориях"""
-        return self.get_all_objects().count()
+        """Общее количество объектов в категории и всех её подкатегориях (хранимое значение)"""
+        return self.total_objects_count
 
     def get_category_path(self):
-        """Возвращает путь до текущей категории в виде списка кортежей (id, name)"""
-        path = [(self.id, self.collection_name)]
-        
-        # Ищем родительскую категорию
-        parent_link = ThemeLinks.objects.filter(low=self.id).first()
-        
-        # Рекурсивно строим путь
-        while parent_link:
-            parent = parent_link.high
-            path.append((parent.id, parent.collection_name))
-            parent_link = ThemeLinks.objects.filter(low=parent.id).first()
-        
-        # Возвращаем путь в обратном порядке (от корня до текущей категории)
-        return list(reversed(path))
+        """Возвращает путь до текущей категории в виде списка кортежей (id, name), от корня"""
+        ancestors = ThemeClosure.objects.filter(descendant=self).select_related('ancestor').order_by('-depth')
+        return [(link.ancestor.id, link.ancestor.collection_name) for link in ancestors]
 
     class Meta:
         db_table = 'theme'
@@ -223,6 +269,29 @@ class ThemeLinks(models.Model):
         return f"Связь: {self.high} -> {self.low}"
 
 
+class ThemeClosure(models.Model):
+    """
+    Транзитивное замыкание иерархии тематик: все пары (предок, потомок) с глубиной.
+    Каждая тематика — сама себе предок с depth = 0. Поддерживается автоматически
+    при изменении Theme и ThemeLinks (см. brick_main.category.closure).
+    """
+    ancestor = models.ForeignKey(Theme, models.CASCADE, related_name='closure_descendants', verbose_name="Предок")
+    descendant = models.ForeignKey(Theme, models.CASCADE, related_name='closure_ancestors', verbose_name="Потомок")
+    depth = models.IntegerField(verbose_name="Глубина")
+
+    class Meta:
+        db_table = 'theme_closure'
+        unique_together = (('ancestor', 'descendant'),)
+        verbose_name = "Замыкание тематических коллекций"
+        verbose_name_plural = "Замыкание тематических коллекций"
+        indexes = [
+            models.Index(fields=['descendant', 'depth']),
+        ]
+
+    def __str__(self):
+        return f"{self.ancestor_id} -> {self.descendant_id} ({self.depth})"
+
+
 class ThemeObjLinks(models.Model):
     """
     Модель для хранения связей между тематическими коллекциями и объектами.
@@ -230,6 +299,12 @@ class ThemeObjLinks(models.Model):
     high = models.ForeignKey(Theme, models.CASCADE, related_name='theme_obj_links', verbose_name="Коллекция")
     obj = models.ForeignKey(Obj, models.CASCADE, related_name='theme_obj_links', verbose_name="Объект")
 
+    def save(self, *args, **kwargs):
+        # Запись связи и изменение счётчиков тематик в post_save — одна транзакция
+        # (см. brick_main.category.counts)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     class Meta:
         db_table = 'theme_obj_links'
         unique_together = (('high', 'obj'),)
@@ -244,6 +319,23 @@ class ThemeObjLinks(models.Model):
         return f"Связь: {self.high} -> {self.obj}"
 
 
+class CacheVersion(models.Model):
+    """
+    Версии закэшированных снимков данных. Номер увеличивается при изменении
+    исходных таблиц; снимки старых версий просто перестают запрашиваться.
+    """
+    name = models.CharField(max_length=100, unique=True, verbose_name="Название")
+    version = models.PositiveBigIntegerField(default=1, verbose_name="Версия")
+
+    class Meta:
+        db_table = 'cache_version'
+        verbose_name = "Версия кэша"
+        verbose_name_plural = "Версии кэша"
+
+    def __str__(self):
+        return f"{self.name}: {self.version}"
+
+
 class Color(models.Model):
     """
     Официальные цвета LEGO.
@@ -285,13 +377,17 @@ class ObjProduct(models.Model):
     name = models.CharField(max_length=250, verbose_name="Название")
     description = models.CharField(max_length=250, verbose_name="Описание")
     image = models.URLField(null=True, blank=True, verbose_name="URL-адрес изображения")
-    quantity = models.CharField(max_length=250, verbose_name="Количество")
+    quantity = models.PositiveIntegerField(default=0, verbose_name="Количество")
     condition = models.CharField(max_length=100, null=True, blank=True, choices=ConditionType.choices, verbose_name="Состояние")
     obj = models.ForeignKey(Obj, on_delete=models.CASCADE, null=True, blank=True, verbose_name="Объект")
     shop = models.ForeignKey(Shops, on_delete=models.CASCADE, null=True, blank=True, verbose_name="Магазин")
     country = models.ManyToManyField(Country, null=True, blank=True, verbose_name="Продавец отправляет товар")
     owner = models.ForeignKey(CustomUser, on_delete=models.CASCADE, null=True, blank=True, verbose_name="Владелец")
-    
+    # Страны, куда предложение действительно доставляется: страны продукта, а если они
+    # не указаны — страны магазина; у временно закрытого магазина — пусто.
+    # Поддерживается product/shipping.py. Элементы — id Country (bigint, как DEFAULT_AUTO_FIELD)
+    ship_countries = ArrayField(models.BigIntegerField(), default=list, blank=True, editable=False, verbose_name="Страны доставки")
+
     def __str__(self):
         return self.name
     
@@ -299,17 +395,93 @@ class ObjProduct(models.Model):
         db_table = 'obj_product'
         verbose_name = "Объект продукта"
         verbose_name_plural = "Объект продукта"
+        indexes = [
+            GinIndex(fields=['ship_countries'], name='obj_product_ship_countries_gin'),
+        ]
 
 
 class ObjProductPrice(models.Model):
     product = models.ForeignKey(ObjProduct, on_delete=models.CASCADE, null=True, blank=True, related_name="product_price", verbose_name="Продукт")
-    price = models.CharField(max_length=250, null=True, blank=True, verbose_name="Цена")
+    price = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True, verbose_name="Цена")
     currency = models.ForeignKey(Currency, on_delete=models.CASCADE, null=True, blank=True, verbose_name="Валюта")
+    # Цена в базовой валюте. Заполняется триггером product_price_normalize_trigger
+    # (миграции 0020, 0032) и пересчитывается при изменении курсов. Пока курс валюты
+    # не загружен, равна price
+    normalized_price = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True, editable=False, verbose_name="Цена в базовой валюте")
 
     class Meta:
         db_table = 'product_price'
         verbose_name = "Цена продукта"
         verbose_name_plural = "Цена продукта"
+        indexes = [
+            models.Index(fields=['product', 'currency', 'price']),
+            models.Index(fields=['product', 'normalized_price']),
+        ]
+
+
+class ListingImportJob(models.Model):
+    """Массовая загрузка предложений продавца из файла (выполняется в фоне, см. shop/bulk_upload.py)."""
+
+    class Format(models.TextChoices):
+        CSV = "csv", "CSV"
+        JSONL = "jsonl", "JSON Lines"
+        XML = "xml", "BrickLink XML"
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "В очереди"
+        RUNNING = "running", "Выполняется"
+        DONE = "done", "Завершена"
+        FAILED = "failed", "Ошибка"
+
+    owner = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="listing_imports", verbose_name="Владелец")
+    shop = models.ForeignKey(Shops, on_delete=models.CASCADE, null=True, blank=True, verbose_name="Магазин")
+    currency = models.ForeignKey(Currency, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Валюта по умолчанию")
+    file = models.FileField(upload_to='listing_imports/', verbose_name="Файл")
+    format = models.CharField(max_length=10, choices=Format.choices, verbose_name="Формат")
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING, verbose_name="Статус")
+    processed_rows = models.PositiveIntegerField(default=0, verbose_name="Обработано строк")
+    created_count = models.PositiveIntegerField(default=0, verbose_name="Создано предложений")
+    error_count = models.PositiveIntegerField(default=0, verbose_name="Строк с ошибками")
+    # [{"row": номер строки, "errors": {...}}], не больше MAX_STORED_ERRORS записей
+    errors = models.JSONField(default=list, blank=True, verbose_name="Ошибки")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Создана")
+    # Обновляется при взятии задачи и после каждой пачки; по нему находятся задачи,
+    # брошенные упавшим процессом (см. shop/bulk_upload.py, STALE_AFTER)
+    heartbeat_at = models.DateTimeField(null=True, blank=True, verbose_name="Последняя активность")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Завершена")
+
+    def __str__(self):
+        return f"{self.owner_id}: {self.file.name} ({self.status})"
+
+    class Meta:
+        db_table = 'listing_import_job'
+        verbose_name = "Загрузка предложений"
+        verbose_name_plural = "Загрузки предложений"
+
+
+class PriceGuide(models.Model):
+    """
+    Сводка цен предложений по объекту каталога в разрезе состояния и валюты.
+    Пересчитывается по объекту при изменении его предложений (см. product/price_guide.py).
+    """
+    obj = models.ForeignKey(Obj, on_delete=models.CASCADE, related_name="price_guide", verbose_name="Объект")
+    # Пустая строка — состояние не указано
+    condition = models.CharField(max_length=100, blank=True, choices=ConditionType.choices, verbose_name="Состояние")
+    currency = models.ForeignKey(Currency, on_delete=models.CASCADE, verbose_name="Валюта")
+    min_price = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="Минимальная цена")
+    max_price = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="Максимальная цена")
+    avg_price = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="Средняя цена")
+    median_price = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="Медианная цена")
+    offer_count = models.PositiveIntegerField(verbose_name="Количество предложений")
+
+    def __str__(self):
+        return f"{self.obj_id} {self.condition} {self.currency_id}"
+
+    class Meta:
+        db_table = 'price_guide'
+        verbose_name = "Сводка цен"
+        verbose_name_plural = "Сводка цен"
+        unique_together = ('obj', 'condition', 'currency')
 
 
 class WantedList(models.Model):
@@ -354,6 +526,9 @@ class Order(models.Model):
         db_table = "order"
         verbose_name = "Заказ"
         verbose_name_plural = "Заказы"
+        indexes = [
+            models.Index(fields=['shop', 'created_at'], name='order_shop_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.shop.name} - {self.created_at.strftime('%Y-%m-%d')}"
@@ -363,6 +538,8 @@ class OrderItem(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="items_product", verbose_name="Заказ")
     product = models.ForeignKey(ObjProduct, on_delete=models.CASCADE, verbose_name="Продукт")
     quantity = models.PositiveIntegerField(verbose_name="Число")
+    # Цена единицы в базовой валюте на момент заказа (лучшая цена предложения)
+    price = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True, editable=False, verbose_name="Цена за единицу")
 
     def __str__(self):
         return f"{self.product.name} ({self.quantity})"
@@ -370,4 +547,123 @@ class OrderItem(models.Model):
     class Meta:
         db_table = "order_item"
         verbose_name = "Заказать продукцию"
-        verbose_name_plural = "Заказать продукцию"
\ No newline at end of file
+        verbose_name_plural = "Заказать продукцию"
+
+
+
+class DailySales(models.Model):
+    """
+    Продажи продукта за день (по дате заказа). Пополняется при создании заказа,
+    полностью пересобирается командой rebuild_daily_sales (см. analitik/rollup.py).
+    """
+    day = models.DateField(verbose_name="День")
+    product = models.ForeignKey(ObjProduct, on_delete=models.CASCADE, related_name="+", verbose_name="Продукт")
+    # Класс объекта продукта (Obj.item_class) — тип в аналитике
+    obj_type = models.IntegerField(verbose_name="Тип объекта")
+    quantity = models.PositiveIntegerField(default=0, verbose_name="Продано единиц")
+
+    def __str__(self):
+        return f"{self.day} {self.product_id}: {self.quantity}"
+
+    class Meta:
+        db_table = 'daily_sales'
+        verbose_name = "Продажи за день"
+        verbose_name_plural = "Продажи за день"
+        unique_together = ('day', 'product')
+        indexes = [
+            models.Index(fields=['obj_type', 'day'], include=['product', 'quantity'], name='daily_sales_type_day_idx'),
+        ]
+
+
+class ShopDailyStats(models.Model):
+    """
+    Заказы магазина за день в разрезе статуса. Пополняется при создании заказа,
+    пересчитывается по паре (магазин, день) при изменении и удалении заказов и их
+    позиций (см. analitik/rollup.py).
+    """
+    shop = models.ForeignKey(Shops, on_delete=models.CASCADE, related_name="+", verbose_name="Магазин")
+    day = models.DateField(verbose_name="День")
+    status = models.ForeignKey(Statusorder, on_delete=models.SET_NULL, null=True, blank=True, related_name="+", verbose_name="Статус")
+    orders = models.PositiveIntegerField(default=0, verbose_name="Заказов")
+    units = models.PositiveIntegerField(default=0, verbose_name="Продано единиц")
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Выручка в базовой валюте")
+
+    def __str__(self):
+        return f"{self.shop_id} {self.day} {self.status_id}: {self.orders}"
+
+    class Meta:
+        db_table = 'shop_daily_stats'
+        verbose_name = "Заказы магазина за день"
+        verbose_name_plural = "Заказы магазинов за день"
+        constraints = [
+            # Заказы без статуса — одна строка на день (ключ для INSERT ... ON CONFLICT)
+            models.UniqueConstraint(fields=['shop', 'day', 'status'], nulls_distinct=False, name='shop_daily_stats_uniq'),
+        ]
+
+
+class ShopDailySales(models.Model):
+    """Продажи предложения магазина за день; пересчитывается вместе с ShopDailyStats."""
+    shop = models.ForeignKey(Shops, on_delete=models.CASCADE, related_name="+", verbose_name="Магазин")
+    day = models.DateField(verbose_name="День")
+    product = models.ForeignKey(ObjProduct, on_delete=models.CASCADE, related_name="+", verbose_name="Продукт")
+    units = models.PositiveIntegerField(default=0, verbose_name="Продано единиц")
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Выручка в базовой валюте")
+
+    def __str__(self):
+        return f"{self.shop_id} {self.day} {self.product_id}: {self.units}"
+
+    class Meta:
+        db_table = 'shop_daily_sales'
+        verbose_name = "Продажи предложения за день"
+        verbose_name_plural = "Продажи предложений за день"
+        unique_together = ('shop', 'day', 'product')
+        indexes = [
+            models.Index(fields=['shop', 'day'], include=['product', 'units', 'revenue'], name='shop_daily_sales_shop_day_idx'),
+        ]
+
+
+class TrendingCheckpoint(models.Model):
+    """
+    Сохранённое состояние скользящего окна "в тренде" (см. analitik/trending.py):
+    через него процессы объединяют свои счётчики и восстанавливают их после перезапуска.
+    """
+    window = models.CharField(max_length=16, unique=True, verbose_name="Окно")
+    # Начала интервалов окна (unix-время) в порядке, в котором их счётчики лежат в counters
+    buckets = models.JSONField(default=list, verbose_name="Интервалы")
+    counters = models.BinaryField(default=bytes, verbose_name="Счётчики")
+    # Кандидаты в топ по типам: {тип: [id продукта, ...]}
+    candidates = models.JSONField(default=dict, verbose_name="Кандидаты")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Обновлено")
+
+    def __str__(self):
+        return self.window
+
+    class Meta:
+        db_table = 'trending_checkpoint'
+        verbose_name = "Контрольная точка трендов"
+        verbose_name_plural = "Контрольные точки трендов"
+
+
+class IdempotencyKey(models.Model):
+    """
+    Результат первого успешного POST-запроса с заголовком Idempotency-Key.
+    Повтор запроса с тем же ключом получает сохранённый ответ (см. brick_main/idempotency.py).
+    """
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, verbose_name="Пользователь")
+    key = models.CharField(max_length=255, verbose_name="Ключ")
+    endpoint = models.CharField(max_length=255, verbose_name="Адрес запроса")
+    request_hash = models.CharField(max_length=64, verbose_name="Хэш тела запроса")
+    # Пусто, пока первый запрос выполняется (строка ещё не закоммичена)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True, verbose_name="Код ответа")
+    response = models.JSONField(encoder=DjangoJSONEncoder, null=True, blank=True, verbose_name="Ответ")
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name="Создан")
+
+    def __str__(self):
+        return f"{self.user_id}: {self.key}"
+
+    class Meta:
+        db_table = 'idempotency_key'
+        verbose_name = "Ключ идемпотентности"
+        verbose_name_plural = "Ключи идемпотентности"
+        unique_together = ('user', 'key')
+
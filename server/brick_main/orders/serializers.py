@@ -1,6 +1,15 @@
+from collections import Counter
+from functools import partial
+
+from django.db import transaction
+from django.db.models import F, Min
 from rest_framework import serializers
 
-from brick_main.models import Order, OrderItem
+from brick_main.analitik.rollup import record_order_sales
+from brick_main.analitik.trending import record_order_trending
+from brick_main.models import Order, OrderItem, ObjProduct, ObjProductPrice
+from brick_main.product.best_offer import refresh_best_offers
+from utils.query_planning import PlannedListSerializer
 
 
 class OrderProductSerializer(serializers.ModelSerializer):
@@ -8,6 +17,8 @@ class OrderProductSerializer(serializers.ModelSerializer):
     class Meta:
         model = OrderItem
         fields = ['id', 'order', 'product', 'quantity']
+        # Заказ позиции задаётся при создании заказа (OrderCreateSerializer)
+        read_only_fields = ['order']
 
 
 class OrdersSerializer(serializers.ModelSerializer):
@@ -16,6 +27,8 @@ class OrdersSerializer(serializers.ModelSerializer):
     class Meta:
         model = Order
         fields = ['id', 'user', 'shop', 'is_new', 'items_product', 'status', 'created_at']
+        list_serializer_class = PlannedListSerializer
+        prefetch_related = ['items_product']
 
 
 class OrderStatusChangeSellerSerializer(serializers.ModelSerializer):
@@ -53,7 +66,34 @@ class OrderCreateSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         items_data = validated_data.pop('items_product')
-        order = Order.objects.create(user=self.context['request'].user, **validated_data)
+
+        requested = Counter()
         for item in items_data:
-            OrderItem.objects.create(order=order, **item)
+            requested[item['product'].id] += item['quantity']
+
+        with transaction.atomic():
+            # Условное списание остатка: при нехватке строка не обновится, и заказ откатится.
+            # Продукты списываются по возрастанию id, чтобы параллельные заказы не блокировали друг друга
+            for product_id in sorted(requested):
+                reserved = ObjProduct.objects.filter(id=product_id, quantity__gte=requested[product_id]).update(
+                    quantity=F('quantity') - requested[product_id]
+                )
+                if not reserved:
+                    raise serializers.ValidationError(
+                        {"items_product": [f"Недостаточно товара на складе: продукт {product_id}"]}
+                    )
+
+            order = Order.objects.create(user=self.context['request'].user, **validated_data)
+            # Цена на момент заказа — для выручки в аналитике продавца
+            prices = dict(
+                ObjProductPrice.objects.filter(product_id__in=requested)
+                .values('product_id').annotate(best=Min('normalized_price')).values_list('product_id', 'best')
+            )
+            OrderItem.objects.bulk_create([
+                OrderItem(order=order, price=prices.get(item['product'].id), **item) for item in items_data
+            ])
+            record_order_sales(order)
+            transaction.on_commit(partial(record_order_trending, order.id))
+            # Остаток лучшего предложения мог измениться или закончиться
+            refresh_best_offers({item['product'].obj_id for item in items_data})
         return order
\ No newline at end of file
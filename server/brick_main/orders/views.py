@@ -15,6 +15,7 @@ from drf_yasg import openapi
 from utils.pagination import PaginationList
 from utils.permissions import IsSellerRole
 
+from brick_main.idempotency import idempotent, idempotency_key_parameter
 from brick_main.models import Order, Shops
 from brick_main.orders.serializers import (
     OrdersSerializer,
@@ -102,7 +103,7 @@ class OrdersForuserView(GenericAPIView):
         responses={200: OrdersSerializer(many=True)}
     )
     def get(self, request, *args, **kwargs):
-        queryset = Order.objects.filter(owner=request.user).order_by("id")
+        queryset = Order.objects.filter(user=request.user).order_by("id")
 
         page = self.paginate_queryset(queryset)
         if page is not None:
@@ -115,7 +116,9 @@ class OrdersForuserView(GenericAPIView):
     @swagger_auto_schema(
         tags=["Order"],
         operation_description="Для заказывающего пользователя",
+        manual_parameters=[idempotency_key_parameter],
         request_body=OrderCreateSerializer)
+    @idempotent
     def post(self, request):
         serializer = OrderCreateSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
@@ -0,0 +1,57 @@
+from django.db import connection
+
+# Самое дешёвое (в базовой валюте) предложение в наличии для объектов под {condition}.
+# Строки obj переписываются, только если лучшее предложение изменилось
+REFRESH_SQL = """
+UPDATE obj SET
+    best_price = best.normalized_price,
+    best_offer_id = best.product_id,
+    best_offer_shop_id = best.shop_id,
+    best_offer_quantity = COALESCE(best.quantity, 0)
+FROM (
+    SELECT obj.id AS obj_id, offer.normalized_price, offer.product_id, offer.shop_id, offer.quantity
+    FROM obj
+    LEFT JOIN LATERAL (
+        SELECT product_price.normalized_price, obj_product.id AS product_id, obj_product.shop_id, obj_product.quantity
+        FROM obj_product
+        JOIN product_price ON product_price.product_id = obj_product.id
+        WHERE obj_product.obj_id = obj.id
+          AND obj_product.quantity > 0
+          AND product_price.normalized_price IS NOT NULL
+        ORDER BY product_price.normalized_price, obj_product.id
+        LIMIT 1
+    ) offer ON TRUE
+    WHERE {condition}
+) best
+WHERE obj.id = best.obj_id
+  AND (obj.best_price, obj.best_offer_id, obj.best_offer_shop_id, obj.best_offer_quantity)
+      IS DISTINCT FROM (best.normalized_price, best.product_id, best.shop_id, COALESCE(best.quantity, 0))
+"""
+
+
+def refresh_best_offers(obj_ids=None):
+    """
+    Пересчитывает лучшее предложение для указанных объектов в текущей транзакции.
+    Без аргументов — для всех объектов.
+    """
+    with connection.cursor() as cursor:
+        if obj_ids is None:
+            cursor.execute(REFRESH_SQL.format(condition="TRUE"))
+            return
+
+        obj_ids = [obj_id for obj_id in obj_ids if obj_id is not None]
+        if obj_ids:
+            cursor.execute(REFRESH_SQL.format(condition="obj.id = ANY(%(objs)s)"), {'objs': obj_ids})
+
+
+def refresh_best_offers_for_currencies(currency_ids):
+    """Пересчёт для объектов, у предложений которых есть цены в указанных валютах (после смены курсов)."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            REFRESH_SQL.format(condition=(
+                "obj.id IN (SELECT obj_product.obj_id FROM obj_product "
+                "JOIN product_price ON product_price.product_id = obj_product.id "
+                "WHERE product_price.currency_id = ANY(%(currencies)s))"
+            )),
+            {'currencies': list(currency_ids)},
+        )
@@ -0,0 +1,111 @@
+import hashlib
+
+from django.core.cache import cache
+from django.db import connection
+
+from brick_main.cache import get_version
+
+# Версия данных предложений (см. brick_main/cache.py): меняется при изменении предложений и курсов
+LISTINGS = 'listings'
+FACETS_TTL = 5 * 60
+
+# Границы ценовых диапазонов в базовой валюте (по минимальной цене предложения)
+PRICE_BUCKETS = [0, 1, 5, 10, 50, 100, 500, 1000]
+
+# Выражение группировки для каждого фасета
+FACET_COLUMNS = {
+    'condition': 'listing.condition',
+    'country': 'country_link.country_id',
+    'price': 'listing.price_bucket',
+    'shop': 'listing.shop_id',
+}
+
+# Все фасеты считаются одним проходом: GROUPING SETS по каждому запрошенному фасету,
+# GROUPING() показывает, к какому фасету относится строка
+FACETS_SQL = """
+WITH listing AS (
+    SELECT
+        obj_product.id,
+        obj_product.condition,
+        obj_product.shop_id,
+        obj_product.ship_countries,
+        width_bucket(
+            (SELECT MIN(normalized_price) FROM product_price WHERE product_price.product_id = obj_product.id),
+            %s::numeric[]
+        ) AS price_bucket
+    FROM obj_product
+    WHERE obj_product.id IN ({listings})
+)
+SELECT {columns}, {grouping}, COUNT(DISTINCT listing.id)
+FROM listing
+{joins}
+GROUP BY GROUPING SETS ({sets})
+"""
+
+
+def parse_facets(value):
+    """Список фасетов из параметра facets: через запятую или "all"."""
+    names = [name.strip() for name in (value or '').split(',') if name.strip()]
+    if 'all' in names:
+        return list(FACET_COLUMNS)
+    return [name for name in FACET_COLUMNS if name in names]
+
+
+def compute_facets(queryset, names):
+    """Количество предложений из queryset по значениям каждого фасета из names."""
+    listings_sql, listings_params = queryset.order_by().values('id').query.sql_with_params()
+    columns = [FACET_COLUMNS[name] for name in names]
+
+    joins = ''
+    if 'country' in names:
+        # Те же страны доставки, что и у фильтра country
+        joins = "LEFT JOIN LATERAL unnest(listing.ship_countries) AS country_link (country_id) ON TRUE"
+
+    sql = FACETS_SQL.format(
+        listings=listings_sql,
+        columns=', '.join(columns),
+        grouping=f"GROUPING({', '.join(columns)})",
+        joins=joins,
+        sets=', '.join(f'({column})' for column in columns),
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [PRICE_BUCKETS, *listings_params])
+        rows = cursor.fetchall()
+
+    facets = {name: [] for name in names}
+    for row in rows:
+        values, grouping, count = row[:len(names)], row[len(names)], row[-1]
+        # В GROUPING() бит фасета сброшен только для колонки, по которой сгруппирована строка
+        for index, name in enumerate(names):
+            if not grouping & (1 << (len(names) - 1 - index)):
+                facets[name].append(format_facet_value(name, values[index], count))
+                break
+
+    for name, items in facets.items():
+        items.sort(key=lambda item: -item['count'])
+    return facets
+
+
+def format_facet_value(name, value, count):
+    if name != 'price':
+        return {'value': value, 'count': count}
+    if value is None:
+        return {'from': None, 'to': None, 'count': count}
+    # width_bucket: 0 — ниже первой границы, len(PRICE_BUCKETS) — не ниже последней
+    lower = PRICE_BUCKETS[value - 1] if value > 0 else None
+    upper = PRICE_BUCKETS[value] if value < len(PRICE_BUCKETS) else None
+    return {'from': lower, 'to': upper, 'count': count}
+
+
+def get_facets(queryset, names, params):
+    """
+    Фасеты с кэшированием на комбинацию фильтров (params — параметры запроса,
+    от которых зависит queryset). Кэш сбрасывается сменой версии LISTINGS.
+    """
+    signature = repr((names, sorted(params.items()))).encode()
+    cache_key = f'facets:{get_version(LISTINGS)}:{hashlib.sha256(signature).hexdigest()}'
+    facets = cache.get(cache_key)
+    if facets is None:
+        facets = compute_facets(queryset, names)
+        cache.set(cache_key, facets, FACETS_TTL)
+    return facets
@@ -1,14 +1,66 @@
+from django.db.models import Exists, OuterRef, Subquery
 from django_filters import rest_framework as filters
-from brick_main.models import ObjProduct
+from brick_main.models import Currency, ObjProduct, ObjProductPrice
+from brick_main.product.pricing import get_exchange_rate
 from authen.models import Country
 
 
 class ObjProductFilter(filters.FilterSet):
-    min_price = filters.NumberFilter(field_name='product_price__price', lookup_expr='gte')
-    max_price = filters.NumberFilter(field_name='product_price__price', lookup_expr='lte')
+    min_price = filters.NumberFilter(method='filter_price_range')
+    max_price = filters.NumberFilter(method='filter_price_range')
+    currency = filters.ModelChoiceFilter(queryset=Currency.objects.all(), method='filter_price_range')
     condition = filters.CharFilter(field_name='condition', lookup_expr='iexact')
-    country = filters.ModelMultipleChoiceFilter(field_name='country', to_field_name='id', queryset=Country.objects.all())
+    # Доставка хотя бы в одну из стран: один поиск по GIN-индексу ship_countries, без join и дублей
+    country = filters.ModelMultipleChoiceFilter(queryset=Country.objects.all(), method='filter_ship_countries')
+    # price_value — аннотация минимальной цены предложения в базовой валюте (см. obj_listings)
+    ordering = filters.OrderingFilter(fields=(('price_value', 'price'), ('id', 'id')))
 
     class Meta:
         model = ObjProduct
-        fields = ['condition', 'min_price', 'max_price', 'country']
+        fields = ['condition', 'min_price', 'max_price', 'currency', 'country']
+
+    def filter_ship_countries(self, queryset, name, value):
+        if not value:
+            return queryset
+        return queryset.filter(ship_countries__overlap=[country.id for country in value])
+
+    def filter_price_range(self, queryset, name, value):
+        # min_price, max_price и currency применяются вместе в filter_queryset
+        return queryset
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        data = self.form.cleaned_data
+        min_price, max_price, currency = data.get('min_price'), data.get('max_price'), data.get('currency')
+        if min_price is None and max_price is None:
+            return queryset
+
+        prices = ObjProductPrice.objects.filter(product=OuterRef('pk'))
+        field = 'normalized_price'
+        if currency is not None:
+            rate = get_exchange_rate(currency)
+            if rate is None:
+                # Курс не загружен — сравниваем только цены в этой же валюте
+                field = 'price'
+                prices = prices.filter(currency=currency)
+            else:
+                min_price = min_price * rate if min_price is not None else None
+                max_price = max_price * rate if max_price is not None else None
+
+        if min_price is not None:
+            prices = prices.filter(**{f'{field}__gte': min_price})
+        if max_price is not None:
+            prices = prices.filter(**{f'{field}__lte': max_price})
+        return queryset.filter(Exists(prices))
+
+
+def obj_listings(obj):
+    """
+    Предложения объекта для ObjProductsView: с price_value — минимальной ценой
+    в базовой валюте для сортировки по цене во всех валютах.
+    """
+    min_price = (
+        ObjProductPrice.objects.filter(product=OuterRef("pk"), normalized_price__isnull=False)
+        .order_by("normalized_price").values("normalized_price")[:1]
+    )
+    return ObjProduct.objects.filter(obj=obj).annotate(price_value=Subquery(min_price)).order_by("id")
@@ -0,0 +1,67 @@
+from django.db import connection, transaction
+
+from utils.deferred import run_on_commit
+
+# Защита от циклов в links: глубже этого уровня вложенности не спускаемся
+MAX_DEPTH = 10
+
+# Рекурсивный обход links вниз от набора; в состав попадают только "листья" —
+# объекты, у которых нет собственного состава.
+BUILD_SQL = """
+WITH RECURSIVE walk (root_id, part_id, color, quantity, depth) AS (
+    SELECT set_id, part_id, color, COALESCE(part_count, 1), 1
+    FROM links
+    WHERE {condition}
+    UNION ALL
+    SELECT walk.root_id, links.part_id, links.color, walk.quantity * COALESCE(links.part_count, 1), walk.depth + 1
+    FROM walk
+    JOIN links ON links.set_id = walk.part_id
+    WHERE walk.depth < %(max_depth)s
+)
+INSERT INTO set_inventory (set_id, part_id, color, total_count)
+SELECT root_id, part_id, color, SUM(quantity)
+FROM walk
+WHERE NOT EXISTS (SELECT 1 FROM links WHERE links.set_id = walk.part_id)
+GROUP BY root_id, part_id, color
+"""
+
+# Наборы, в которые (рекурсивно) входят указанные: их состав тоже меняется
+ANCESTORS_SQL = """
+WITH RECURSIVE up (set_id) AS (
+    SELECT unnest(%(sets)s::varchar[])
+    UNION
+    SELECT links.set_id FROM links JOIN up ON links.part_id = up.set_id
+)
+SELECT set_id FROM up
+"""
+
+
+def rebuild_set_inventories(set_ids=None):
+    """
+    Пересобирает set_inventory для указанных наборов и всех наборов, которые их содержат.
+    Без аргументов — полная пересборка.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        if set_ids is None:
+            cursor.execute("TRUNCATE set_inventory")
+            cursor.execute(BUILD_SQL.format(condition="TRUE"), {'max_depth': MAX_DEPTH})
+            return
+
+        cursor.execute(ANCESTORS_SQL, {'sets': list(set_ids)})
+        affected = [row[0] for row in cursor.fetchall()]
+        if not affected:
+            return
+
+        cursor.execute("DELETE FROM set_inventory WHERE set_id = ANY(%(sets)s)", {'sets': affected})
+        cursor.execute(
+            BUILD_SQL.format(condition="set_id = ANY(%(sets)s)"),
+            {'sets': affected, 'max_depth': MAX_DEPTH},
+        )
+
+
+def schedule_inventory_rebuild(set_id):
+    """
+    Откладывает пересборку состава набора до коммита транзакции.
+    Изменения нескольких связей в одной транзакции пересобираются одним запросом.
+    """
+    run_on_commit(rebuild_set_inventories, [set_id])
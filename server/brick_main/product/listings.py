@@ -0,0 +1,18 @@
+from brick_main.cache import schedule_version_bump
+from brick_main.product.best_offer import refresh_best_offers
+from brick_main.product.facets import LISTINGS
+from brick_main.product.price_guide import refresh_price_guides
+from utils.deferred import run_on_commit
+
+
+def listings_changed(*obj_ids):
+    """
+    Вызывается после создания, изменения или удаления предложений объектов obj_ids.
+
+    Лучшее предложение обновляется сразу, в той же транзакции, что и предложения.
+    Сводка цен пересчитывается и кэш фасетов сбрасывается после коммита,
+    один раз на транзакцию.
+    """
+    refresh_best_offers(obj_ids)
+    run_on_commit(refresh_price_guides, obj_ids)
+    schedule_version_bump(LISTINGS)
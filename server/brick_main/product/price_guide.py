@@ -0,0 +1,48 @@
+from django.db import connection, transaction
+
+from utils.locks import PRICE_GUIDE, advisory_xact_lock
+
+# Сводка по предложениям объектов, попадающих под {condition}. Цены без валюты не учитываются
+BUILD_SQL = """
+INSERT INTO price_guide (obj_id, condition, currency_id, min_price, max_price, avg_price, median_price, offer_count)
+SELECT
+    obj_product.obj_id,
+    COALESCE(obj_product.condition, ''),
+    product_price.currency_id,
+    MIN(product_price.price),
+    MAX(product_price.price),
+    round(AVG(product_price.price), 2),
+    round(percentile_cont(0.5) WITHIN GROUP (ORDER BY product_price.price)::numeric, 2),
+    COUNT(*)
+FROM obj_product
+JOIN product_price ON product_price.product_id = obj_product.id
+WHERE obj_product.obj_id IS NOT NULL
+  AND product_price.price IS NOT NULL
+  AND product_price.currency_id IS NOT NULL
+  AND {condition}
+GROUP BY obj_product.obj_id, COALESCE(obj_product.condition, ''), product_price.currency_id
+"""
+
+
+def refresh_price_guides(obj_ids=None):
+    """
+    Пересчитывает price_guide для указанных объектов каталога.
+    Без аргументов — полная пересборка.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        if obj_ids is None:
+            cursor.execute("TRUNCATE price_guide")
+            cursor.execute(BUILD_SQL.format(condition="TRUE"))
+            return
+
+        obj_ids = [obj_id for obj_id in obj_ids if obj_id is not None]
+        if not obj_ids:
+            return
+        # Параллельные пересчёты одного объекта иначе вставили бы его группы дважды
+        advisory_xact_lock(PRICE_GUIDE, obj_ids)
+        cursor.execute("DELETE FROM price_guide WHERE obj_id = ANY(%(objs)s)", {'objs': obj_ids})
+        cursor.execute(
+            BUILD_SQL.format(condition="obj_product.obj_id = ANY(%(objs)s)"),
+            {'objs': obj_ids},
+        )
+
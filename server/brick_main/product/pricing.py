@@ -0,0 +1,41 @@
+from django.db import connection, transaction
+
+from brick_main.models import ExchangeRate
+from brick_main.product.best_offer import refresh_best_offers, refresh_best_offers_for_currencies
+from utils.deferred import run_on_commit
+
+# Пересчёт цен в базовой валюте одним UPDATE; для валют без курса — цена как есть
+# (как в триггере product_price_normalize, миграция 0032)
+RENORMALIZE_SQL = """
+UPDATE product_price SET normalized_price = round(
+    price * COALESCE((SELECT rate FROM exchange_rate WHERE exchange_rate.currency_id = product_price.currency_id), 1), 2
+)
+WHERE {condition}
+"""
+
+
+def renormalize_prices(currency_ids=None):
+    """
+    Пересчитывает normalized_price у цен в указанных валютах (после изменения курсов)
+    и лучшие предложения затронутых объектов. Без аргументов — у всех цен.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        if currency_ids is None:
+            cursor.execute(RENORMALIZE_SQL.format(condition="TRUE"))
+            refresh_best_offers()
+        else:
+            cursor.execute(
+                RENORMALIZE_SQL.format(condition="currency_id = ANY(%(currencies)s)"),
+                {'currencies': list(currency_ids)},
+            )
+            refresh_best_offers_for_currencies(currency_ids)
+
+
+def schedule_renormalize(currency_id):
+    """Пересчёт после коммита, один раз на транзакцию."""
+    run_on_commit(renormalize_prices, [currency_id])
+
+
+def get_exchange_rate(currency):
+    """Курс валюты к базовой или None, если курс не загружен."""
+    return ExchangeRate.objects.filter(currency=currency).values_list('rate', flat=True).first()
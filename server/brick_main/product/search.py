@@ -0,0 +1,36 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db.models import Case, F, IntegerField, Q, Value, When
+
+from brick_main.models import Alternate
+
+# Должна совпадать с конфигурацией в триггере obj_search_vector_update (миграция 0012)
+SEARCH_CONFIG = 'english'
+
+
+def search_objects(queryset, query):
+    """
+    Поиск объектов по идентификатору, альтернативному идентификатору и названию.
+
+    Все условия накладываются на таблицу obj, поэтому Postgres объединяет
+    индексы (pk, GIN по search_vector, GIN trigram по item_name) через BitmapOr
+    вместо последовательного сканирования. Точные совпадения по id идут первыми,
+    остальные сортируются по релевантности.
+    """
+    query = query.strip()
+    exact_ids = {query}
+    exact_ids.update(Alternate.objects.filter(item_id=query).values_list('pk', flat=True))
+
+    search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch')
+
+    return queryset.filter(
+        Q(id__in=exact_ids)
+        | Q(search_vector=search_query)
+        | Q(item_name__trigram_word_similar=query)
+    ).annotate(
+        exact_match=Case(
+            When(id__in=exact_ids, then=Value(1)),
+            default=Value(0),
+            output_field=IntegerField(),
+        ),
+        rank=SearchRank(F('search_vector'), search_query) + TrigramWordSimilarity(query, 'item_name'),
+    ).order_by('-exact_match', '-rank', 'id')
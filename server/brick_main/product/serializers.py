@@ -1,7 +1,13 @@
+from collections import defaultdict
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q
 from rest_framework import serializers
 
-from brick_main.models import Obj, Images, ThemeObjLinks, Links, Color, KnownColor, ObjProduct, ObjProductPrice, Currency
+from brick_main.models import Obj, Images, ThemeObjLinks, Links, Color, KnownColor, ObjProduct, ObjProductPrice, Currency, SetInventory, PriceGuide
 from brick_main.category.serializers import ThemesSerializer
+from utils.query_planning import PlannedListSerializer
 
 
 class CurrencySerializer(serializers.ModelSerializer):
@@ -41,18 +47,73 @@ class ImagesSerializer(serializers.ModelSerializer):
         fields = ['id', 'item', 'color', 'address']
 
 
+def get_part_images_map(links):
+    """Изображения деталей для списка связей одним запросом, по ключу (деталь, цвет)."""
+    keys = {(link.part_id, link.color) for link in links}
+    images_map = defaultdict(list)
+    if keys:
+        condition = reduce(or_, (Q(item_id=part_id, color=color) for part_id, color in keys))
+        for image in Images.objects.filter(condition):
+            images_map[(image.item_id, image.color)].append(image)
+    return images_map
+
+
+class LinksListSerializer(serializers.ListSerializer):
+    """Перед сериализацией страницы загружает изображения всех её деталей."""
+
+    def to_representation(self, data):
+        links = list(data.all() if hasattr(data, 'all') else data)
+        self.context['part_images'] = get_part_images_map(links)
+        return super().to_representation(links)
+
+
 class LinksSerializer(serializers.ModelSerializer):
     part_images = serializers.SerializerMethodField()
 
     class Meta:
         model = Links
         fields = ['id', 'set', 'part', 'set_class', 'part_class', 'part_count', 'color', 'part_images']
+        list_serializer_class = LinksListSerializer
 
     def get_part_images(self, obj):
-        images = Images.objects.filter(item=obj.part)
+        images_map = self.context.get('part_images')
+        if images_map is None:
+            images = Images.objects.filter(item=obj.part_id, color=obj.color)
+        else:
+            images = images_map.get((obj.part_id, obj.color), [])
         return ImagesSerializer(images, many=True).data
 
 
+class SetInventorySerializer(serializers.ModelSerializer):
+    part_name = serializers.CharField(source='part.item_name', read_only=True)
+    part_class = serializers.IntegerField(source='part.item_class', read_only=True)
+
+    class Meta:
+        model = SetInventory
+        fields = ['part', 'part_name', 'part_class', 'color', 'total_count']
+
+
+class PriceGuideSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = PriceGuide
+        fields = ['obj', 'condition', 'currency', 'min_price', 'max_price', 'avg_price', 'median_price', 'offer_count']
+
+
+class PartAppearsInSerializer(serializers.Serializer):
+    set = serializers.CharField()
+    set_name = serializers.CharField()
+    color = serializers.CharField()
+    part_count = serializers.IntegerField(allow_null=True)
+
+
+class PartAppearsInThemeSerializer(serializers.Serializer):
+    theme = serializers.IntegerField(source='high')
+    theme_name = serializers.CharField(source='high__collection_name', allow_null=True)
+    sets_count = serializers.IntegerField()
+    total_count = serializers.IntegerField(allow_null=True)
+
+
 class ProductsSerializer(serializers.ModelSerializer):
     images = ImagesSerializer(many=True)
 
@@ -69,6 +130,10 @@ class ProductsSerializer(serializers.ModelSerializer):
                 'flat_dim',
                 'stud_dim',
                 'instructions',
+                'best_price',
+                'best_offer',
+                'best_offer_shop',
+                'best_offer_quantity',
                 'images'
                 ]
 
@@ -76,6 +141,7 @@ class ProductsSerializer(serializers.ModelSerializer):
 class ProductDetaileSerializer(serializers.ModelSerializer):
     images = ImagesSerializer(many=True)
     theme_obj_links = ThemeObjLinkSerializer(many=True)
+    price_guide = PriceGuideSerializer(many=True, read_only=True)
 
     class Meta:
         model = Obj
@@ -90,8 +156,13 @@ class ProductDetaileSerializer(serializers.ModelSerializer):
                 'flat_dim',
                 'stud_dim',
                 'instructions',
+                'best_price',
+                'best_offer',
+                'best_offer_shop',
+                'best_offer_quantity',
                 'images',
-                'theme_obj_links'
+                'theme_obj_links',
+                'price_guide'
                 ]
 
 
@@ -99,6 +170,7 @@ class ProductPartsDetaileSerializer(serializers.ModelSerializer):
     images = ImagesSerializer(many=True)
     theme_obj_links = ThemeObjLinkSerializer(many=True)
     known_colors = KnworColorsSerializer(many=True)
+    price_guide = PriceGuideSerializer(many=True, read_only=True)
 
     class Meta:
         model = Obj
@@ -113,9 +185,14 @@ class ProductPartsDetaileSerializer(serializers.ModelSerializer):
                 'flat_dim',
                 'stud_dim',
                 'instructions',
+                'best_price',
+                'best_offer',
+                'best_offer_shop',
+                'best_offer_quantity',
                 'known_colors',
                 'images',
-                'theme_obj_links'
+                'theme_obj_links',
+                'price_guide'
                 ]
 
 
@@ -123,7 +200,7 @@ class ObjProductPriceSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = ObjProductPrice
-        fields = ['id', 'product', 'price', 'currency']
+        fields = ['id', 'product', 'price', 'currency', 'normalized_price']
 
 
 class ObjProductsSerializers(serializers.ModelSerializer):
@@ -131,4 +208,6 @@ class ObjProductsSerializers(serializers.ModelSerializer):
 
     class Meta:
         model = ObjProduct
-        fields = ['id', 'name', 'description', 'image', 'quantity', 'condition', 'obj', 'country', 'product_price', 'shop', 'owner']
\ No newline at end of file
+        fields = ['id', 'name', 'description', 'image', 'quantity', 'condition', 'obj', 'country', 'product_price', 'shop', 'owner']
+        list_serializer_class = PlannedListSerializer
+        prefetch_related = ['product_price', 'country']
@@ -0,0 +1,56 @@
+from django.db import connection
+
+from utils.deferred import run_on_commit
+
+# Страны доставки предложений под {condition}: свои страны продукта, иначе страны
+# магазина; у временно закрытого магазина (is_openid) — пустой массив
+REFRESH_SQL = """
+UPDATE obj_product SET ship_countries = eligible.countries
+FROM (
+    SELECT
+        obj_product.id,
+        CASE WHEN COALESCE(shops.is_openid, FALSE) THEN ARRAY[]::bigint[]
+        ELSE COALESCE(
+            (SELECT array_agg(country_id ORDER BY country_id) FROM obj_product_country WHERE objproduct_id = obj_product.id),
+            (SELECT array_agg(country_id ORDER BY country_id) FROM shops_country WHERE shops_id = obj_product.shop_id),
+            ARRAY[]::bigint[]
+        ) END AS countries
+    FROM obj_product
+    LEFT JOIN shops ON shops.id = obj_product.shop_id
+    WHERE {condition}
+) eligible
+WHERE obj_product.id = eligible.id AND obj_product.ship_countries IS DISTINCT FROM eligible.countries
+"""
+
+
+def refresh_ship_countries(product_ids=None):
+    """
+    Пересчитывает ship_countries для указанных предложений.
+    Без аргументов — для всех предложений.
+    """
+    with connection.cursor() as cursor:
+        if product_ids is None:
+            cursor.execute(REFRESH_SQL.format(condition="TRUE"))
+        elif product_ids:
+            cursor.execute(
+                REFRESH_SQL.format(condition="obj_product.id = ANY(%(products)s)"),
+                {'products': list(product_ids)},
+            )
+
+
+def refresh_shop_ship_countries(shop_ids):
+    """Пересчёт для всех предложений указанных магазинов (смена стран или статуса магазина)."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            REFRESH_SQL.format(condition="obj_product.shop_id = ANY(%(shops)s)"),
+            {'shops': list(shop_ids)},
+        )
+
+
+def schedule_ship_countries_refresh(product_ids):
+    """Пересчёт после коммита, один раз на транзакцию."""
+    run_on_commit(refresh_ship_countries, product_ids)
+
+
+def schedule_shop_ship_countries_refresh(shop_id):
+    run_on_commit(refresh_shop_ship_countries, [shop_id])
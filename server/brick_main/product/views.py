@@ -5,33 +5,55 @@ from rest_framework import status
 
 from django_filters.rest_framework import DjangoFilterBackend
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
+from django.db.models import Count, F, Sum
 
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
-from utils.pagination import PaginationList
+from utils.pagination import PaginationList, CatalogPagination
+from utils.streaming import iter_json_array, streaming_json_response
 
-from brick_main.models import Obj, Theme, Links, KnownColor, ObjProduct
-from brick_main.product.filter import ObjProductFilter
+from brick_main.models import Obj, Theme, Links, KnownColor, ObjProduct, SetInventory, ThemeObjLinks, PriceGuide
+from brick_main.product.facets import parse_facets, get_facets
+from brick_main.product.filter import ObjProductFilter, obj_listings
+from brick_main.product.search import search_objects
 from brick_main.product.serializers import (
     ProductsSerializer, ProductDetaileSerializer,
     LinksSerializer, ProductPartsDetaileSerializer,
-    ObjProductsSerializers, 
+    ObjProductsSerializers, SetInventorySerializer,
+    PartAppearsInSerializer, PartAppearsInThemeSerializer, PriceGuideSerializer,
 )
 
+# ordering=price/-price для списков каталога: по хранимой цене лучшего предложения
+# (индекс obj_best_price_idx). Объекты без предложений в такой список не попадают
+PRICE_ORDERINGS = {"price": ("best_price", "id"), "-price": ("-best_price", "-id")}
+price_ordering_parameter = openapi.Parameter(
+    "ordering", openapi.IN_QUERY, type=openapi.TYPE_STRING,
+    description="price / -price — по цене лучшего предложения (только объекты с предложениями)",
+)
+
+
+def order_by_best_price(queryset, request):
+    ordering = PRICE_ORDERINGS.get(request.query_params.get("ordering"))
+    if ordering is None:
+        return queryset
+    return queryset.filter(best_price__isnull=False).order_by(*ordering)
+
 
 class ProductsView(GenericAPIView):
     serializer_class = ProductsSerializer
-    pagination_class = PaginationList
+    pagination_class = CatalogPagination
 
     @swagger_auto_schema(
         tags=["Product"],
         operation_description="Все продукты, Paganiation, Поиск",
         manual_parameters=[
-            openapi.Parameter("search", openapi.IN_QUERY, description="Поиск по item_name", type=openapi.TYPE_STRING),
+            openapi.Parameter("search", openapi.IN_QUERY, description="Поиск по id, альтернативному id и item_name (по релевантности)", type=openapi.TYPE_STRING),
             openapi.Parameter("page", openapi.IN_QUERY, description="Номер страницы", type=openapi.TYPE_INTEGER),
             openapi.Parameter("limit", openapi.IN_QUERY, description="Элементов на странице (по умолчанию: 10): 10 можно изменить динамически", type=openapi.TYPE_INTEGER),
+            openapi.Parameter("cursor", openapi.IN_QUERY, description="Keyset-пагинация: пустое значение — первая страница, далее значение из next", type=openapi.TYPE_STRING),
+            openapi.Parameter("count", openapi.IN_QUERY, description="count=false — без подсчёта общего количества (только next/previous)", type=openapi.TYPE_BOOLEAN),
+            price_ordering_parameter,
         ],
         responses={200: ProductsSerializer(many=True)}
     )
@@ -40,7 +62,8 @@ class ProductsView(GenericAPIView):
         queryset = Obj.objects.all().order_by("id")
 
         if search_query:
-            queryset = queryset.filter(Q(item_name__icontains=search_query))
+            queryset = search_objects(queryset, search_query)
+        queryset = order_by_best_price(queryset, request)
 
         page = self.paginate_queryset(queryset)
         if page is not None:
@@ -77,30 +100,92 @@ class ProductSetDetaileView(APIView):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class ProductsByCategoryView(APIView):
+class ProductsPriceGuideView(APIView):
+    # Ограничение на число объектов в одном запросе (как max_page_size у пагинации)
+    max_ids = 100
+
+    @swagger_auto_schema(
+        tags=["Product"],
+        operation_description="Сводка цен (min/max/avg/median, количество предложений) по состоянию и валюте для списка объектов одним запросом",
+        manual_parameters=[
+            openapi.Parameter("ids", openapi.IN_QUERY, description="ID объектов через запятую (не более 100)", type=openapi.TYPE_STRING, required=True),
+        ],
+        responses={200: PriceGuideSerializer(many=True)}
+    )
+    def get(self, request):
+        ids = [value.strip() for value in request.query_params.get("ids", "").split(",") if value.strip()]
+        if not ids:
+            return Response({"error": "Параметр ids обязателен"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > self.max_ids:
+            return Response({"error": f"Не более {self.max_ids} ids за запрос"}, status=status.HTTP_400_BAD_REQUEST)
+
+        guides = PriceGuide.objects.filter(obj__in=ids).order_by("obj", "condition", "currency")
+        serializer = PriceGuideSerializer(guides, many=True, context={"request": request})
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class ProductSetInventoryView(APIView):
 
     @swagger_auto_schema(
         tags=["Product"],
-        operation_description="Все продукты в соответствующей категории (включая продукты в подкатегориях)",
+        operation_description="Полный состав набора (с учётом вложенных наборов и минифигурок): деталь, цвет, общее количество",
+        responses={200: SetInventorySerializer(many=True)}
+    )
+    def get(self, request, product_id):
+        inventory = list(
+            SetInventory.objects.filter(set=product_id)
+            .select_related('part')
+            .order_by('part', 'color')
+        )
+        if not inventory:
+            get_object_or_404(Obj, id=product_id)
+        serializer = SetInventorySerializer(inventory, many=True, context={"request": request})
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class ProductsByCategoryView(GenericAPIView):
+    serializer_class = ProductsSerializer
+    pagination_class = CatalogPagination
+
+    @swagger_auto_schema(
+        tags=["Product"],
+        operation_description="Все продукты в соответствующей категории (включая продукты в подкатегориях). "
+                              "С параметрами пагинации — постранично, stream=true — потоком",
+        manual_parameters=[
+            openapi.Parameter("page", openapi.IN_QUERY, description="Номер страницы", type=openapi.TYPE_INTEGER),
+            openapi.Parameter("limit", openapi.IN_QUERY, description="Элементов на странице (по умолчанию: 10): 10 можно изменить динамически", type=openapi.TYPE_INTEGER),
+            openapi.Parameter("cursor", openapi.IN_QUERY, description="Keyset-пагинация: пустое значение — первая страница, далее значение из next", type=openapi.TYPE_STRING),
+            openapi.Parameter("count", openapi.IN_QUERY, description="count=false — без подсчёта общего количества (только next/previous)", type=openapi.TYPE_BOOLEAN),
+            openapi.Parameter("stream", openapi.IN_QUERY, description="stream=true — все продукты потоком, без пагинации", type=openapi.TYPE_BOOLEAN),
+            price_ordering_parameter,
+        ],
         responses={200: ProductsSerializer(many=True)}
     )
     def get(self, request, category_id):
         theme = get_object_or_404(Theme, id=category_id)
 
-        # Все (те же и подкатегории) идентификаторы
-        categories = {theme}.union(theme.get_all_subcategories())
-        category_ids = [cat.id for cat in categories]
+        # Товары категории и всех её подкатегорий
+        products = theme.get_all_objects().order_by('id').prefetch_related('images')
+        products = order_by_best_price(products, request)
 
-        # Товары, относящиеся к этим категориям
-        products = Obj.objects.filter(theme_obj_links__high_id__in=category_ids).distinct()
+        if request.query_params.get("stream", "").lower() in ("true", "1"):
+            return streaming_json_response(
+                iter_json_array(products, ProductsSerializer, context={"request": request})
+            )
+
+        if CatalogPagination.is_requested(request):
+            page = self.paginate_queryset(products)
+            serializer = self.get_serializer(page, many=True, context={"request": request})
+            return self.get_paginated_response(serializer.data)
 
         serializer = ProductsSerializer(products, many=True, context={"request": request})
         return Response(serializer.data, status=status.HTTP_200_OK)
     
+
 # Parts
 class GetProductPatrsView(GenericAPIView):
     serializer_class = LinksSerializer
-    pagination_class = PaginationList
+    pagination_class = CatalogPagination
 
     @swagger_auto_schema(
         tags=["Product"],
@@ -108,11 +193,13 @@ class GetProductPatrsView(GenericAPIView):
         manual_parameters=[
             openapi.Parameter("page", openapi.IN_QUERY, description="Номер страницы", type=openapi.TYPE_INTEGER),
             openapi.Parameter("limit", openapi.IN_QUERY, description="Элементов на странице (по умолчанию: 10): 10 можно изменить динамически", type=openapi.TYPE_INTEGER),
+            openapi.Parameter("cursor", openapi.IN_QUERY, description="Keyset-пагинация: пустое значение — первая страница, далее значение из next", type=openapi.TYPE_STRING),
+            openapi.Parameter("count", openapi.IN_QUERY, description="count=false — без подсчёта общего количества (только next/previous)", type=openapi.TYPE_BOOLEAN),
         ],
         responses={200: LinksSerializer(many=True)}
     )
     def get(self, request, product_id, part_id):
-        queryset = Links.objects.filter(set=product_id, part_class=part_id)
+        queryset = Links.objects.filter(set=product_id, part_class=part_id).order_by('set', 'part_class', 'id')
 
         page = self.paginate_queryset(queryset)
         if page is not None:
@@ -125,7 +212,7 @@ class GetProductPatrsView(GenericAPIView):
 
 class GetProductSetsView(GenericAPIView):
     serializer_class = LinksSerializer
-    pagination_class = PaginationList
+    pagination_class = CatalogPagination
 
     @swagger_auto_schema(
         tags=["Product"],
@@ -133,11 +220,13 @@ class GetProductSetsView(GenericAPIView):
         manual_parameters=[
             openapi.Parameter("page", openapi.IN_QUERY, description="Номер страницы", type=openapi.TYPE_INTEGER),
             openapi.Parameter("limit", openapi.IN_QUERY, description="Элементов на странице (по умолчанию: 10): 10 можно изменить динамически", type=openapi.TYPE_INTEGER),
+            openapi.Parameter("cursor", openapi.IN_QUERY, description="Keyset-пагинация: пустое значение — первая страница, далее значение из next", type=openapi.TYPE_STRING),
+            openapi.Parameter("count", openapi.IN_QUERY, description="count=false — без подсчёта общего количества (только next/previous)", type=openapi.TYPE_BOOLEAN),
         ],
         responses={200: LinksSerializer(many=True)}
     )
     def get(self, request, product_id, set_id):
-        queryset = Links.objects.filter(set=product_id, part_class=set_id)
+        queryset = Links.objects.filter(set=product_id, part_class=set_id).order_by('set', 'part_class', 'id')
 
         page = self.paginate_queryset(queryset)
         if page is not None:
@@ -150,7 +239,7 @@ class GetProductSetsView(GenericAPIView):
 
 class GetProductMinigiureView(GenericAPIView):
     serializer_class = LinksSerializer
-    pagination_class = PaginationList
+    pagination_class = CatalogPagination
 
     @swagger_auto_schema(
         tags=["Product"],
@@ -158,11 +247,13 @@ class GetProductMinigiureView(GenericAPIView):
         manual_parameters=[
             openapi.Parameter("page", openapi.IN_QUERY, description="Номер страницы", type=openapi.TYPE_INTEGER),
             openapi.Parameter("limit", openapi.IN_QUERY, description="Элементов на странице (по умолчанию: 10): 10 можно изменить динамически", type=openapi.TYPE_INTEGER),
+            openapi.Parameter("cursor", openapi.IN_QUERY, description="Keyset-пагинация: пустое значение — первая страница, далее значение из next", type=openapi.TYPE_STRING),
+            openapi.Parameter("count", openapi.IN_QUERY, description="count=false — без подсчёта общего количества (только next/previous)", type=openapi.TYPE_BOOLEAN),
         ],
         responses={200: LinksSerializer(many=True)}
     )
     def get(self, request, product_id, minifigure_id):
-        queryset = Links.objects.filter(set=product_id, part_class=minifigure_id)
+        queryset = Links.objects.filter(set=product_id, part_class=minifigure_id).order_by('set', 'part_class', 'id')
 
         page = self.paginate_queryset(queryset)
         if page is not None:
@@ -173,9 +264,60 @@ class GetProductMinigiureView(GenericAPIView):
         return Response(serializer.data, status=status.HTTP_200_OK)
     
 
+class ProductAppearsInView(GenericAPIView):
+    serializer_class = PartAppearsInSerializer
+    pagination_class = CatalogPagination
+
+    @swagger_auto_schema(
+        tags=["Product"],
+        operation_description="В каких наборах есть деталь (и сколько её в каждом). group=theme — агрегация по тематикам",
+        manual_parameters=[
+            openapi.Parameter("color", openapi.IN_QUERY, description="Цвет детали", type=openapi.TYPE_STRING),
+            openapi.Parameter("group", openapi.IN_QUERY, description="theme — сгруппировать наборы по тематикам", type=openapi.TYPE_STRING),
+            openapi.Parameter("page", openapi.IN_QUERY, description="Номер страницы", type=openapi.TYPE_INTEGER),
+            openapi.Parameter("limit", openapi.IN_QUERY, description="Элементов на странице (по умолчанию: 10): 10 можно изменить динамически", type=openapi.TYPE_INTEGER),
+            openapi.Parameter("cursor", openapi.IN_QUERY, description="Keyset-пагинация: пустое значение — первая страница, далее значение из next", type=openapi.TYPE_STRING),
+            openapi.Parameter("count", openapi.IN_QUERY, description="count=false — без подсчёта общего количества (только next/previous)", type=openapi.TYPE_BOOLEAN),
+        ],
+        responses={200: PartAppearsInSerializer(many=True)}
+    )
+    def get(self, request, product_id):
+        color = request.query_params.get("color")
+
+        if request.query_params.get("group") == "theme":
+            # Условия по links в одном filter(), чтобы они относились к одному JOIN
+            filters = {"obj__links_as_set__part": product_id}
+            if color:
+                filters["obj__links_as_set__color"] = color
+            queryset = ThemeObjLinks.objects.filter(**filters).values(
+                "high", "high__collection_name"
+            ).annotate(
+                sets_count=Count("obj", distinct=True),
+                total_count=Sum("obj__links_as_set__part_count"),
+            ).order_by("-sets_count", "high")
+            serializer_class = PartAppearsInThemeSerializer
+        else:
+            # Читается из покрывающего индекса links_part_color_set_idx
+            queryset = Links.objects.filter(part=product_id)
+            if color:
+                queryset = queryset.filter(color=color)
+            queryset = queryset.values(
+                "part", "set", "color", "part_count", set_name=F("set__item_name")
+            ).order_by("part", "color", "set")
+            serializer_class = PartAppearsInSerializer
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = serializer_class(page, many=True, context={"request": request})
+            return self.get_paginated_response(serializer.data)
+
+        serializer = serializer_class(queryset, many=True, context={"request": request})
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
 class GetProductByColorView(GenericAPIView):
     serializer_class = ProductDetaileSerializer
-    pagination_class = PaginationList
+    pagination_class = CatalogPagination
 
     @swagger_auto_schema(
         tags=["Product"],
@@ -183,13 +325,20 @@ class GetProductByColorView(GenericAPIView):
         manual_parameters=[
             openapi.Parameter("page", openapi.IN_QUERY, description="Номер страницы", type=openapi.TYPE_INTEGER),
             openapi.Parameter("limit", openapi.IN_QUERY, description="Элементов на странице (по умолчанию: 10): 10 можно изменить динамически", type=openapi.TYPE_INTEGER),
+            openapi.Parameter("cursor", openapi.IN_QUERY, description="Keyset-пагинация: пустое значение — первая страница, далее значение из next", type=openapi.TYPE_STRING),
+            openapi.Parameter("count", openapi.IN_QUERY, description="count=false — без подсчёта общего количества (только next/previous)", type=openapi.TYPE_BOOLEAN),
+            price_ordering_parameter,
         ],
         responses={200: ProductDetaileSerializer(many=True)}
     )
     def get(self, request, color_id):
         known_colors = KnownColor.objects.filter(color__id=color_id)
         obj_ids = known_colors.values_list('obj_id', flat=True).distinct()
-        queryset = Obj.objects.filter(id__in=obj_ids)
+        queryset = (
+            Obj.objects.filter(id__in=obj_ids).order_by('id')
+            .prefetch_related('images', 'theme_obj_links', 'price_guide')
+        )
+        queryset = order_by_best_price(queryset, request)
 
         page = self.paginate_queryset(queryset)
         if page is not None:
@@ -205,6 +354,8 @@ class ObjProductsView(GenericAPIView):
     pagination_class = PaginationList
     filter_backends = [DjangoFilterBackend]
     filterset_class = ObjProductFilter
+    # Параметры, которые не меняют набор предложений (не входят в ключ кэша фасетов)
+    unfiltered_params = ("page", "limit", "ordering", "facets")
 
     @swagger_auto_schema(
         tags=["Obj / Product"],
@@ -213,22 +364,37 @@ class ObjProductsView(GenericAPIView):
             openapi.Parameter("page", openapi.IN_QUERY, description="Номер страницы", type=openapi.TYPE_INTEGER),
             openapi.Parameter("limit", openapi.IN_QUERY, description="Элементов на странице", type=openapi.TYPE_INTEGER),
             openapi.Parameter("condition", openapi.IN_QUERY, description="Фильтр по состоянию", type=openapi.TYPE_STRING),
-            openapi.Parameter("min_price", openapi.IN_QUERY, description="Минимальная цена", type=openapi.TYPE_NUMBER),
-            openapi.Parameter("max_price", openapi.IN_QUERY, description="Максимальная цена", type=openapi.TYPE_NUMBER),
+            openapi.Parameter("min_price", openapi.IN_QUERY, description="Минимальная цена (в базовой валюте или в currency)", type=openapi.TYPE_NUMBER),
+            openapi.Parameter("max_price", openapi.IN_QUERY, description="Максимальная цена (в базовой валюте или в currency)", type=openapi.TYPE_NUMBER),
+            openapi.Parameter("currency", openapi.IN_QUERY, description="ID валюты, в которой заданы min_price/max_price", type=openapi.TYPE_INTEGER),
             openapi.Parameter("country", openapi.IN_QUERY, description="ID страны (можно передать несколько через запятую)", type=openapi.TYPE_STRING),
+            openapi.Parameter("ordering", openapi.IN_QUERY, description="Сортировка: price, -price, id, -id", type=openapi.TYPE_STRING),
+            openapi.Parameter("facets", openapi.IN_QUERY, description="Количество предложений по значениям фасетов с учётом фильтров: condition, country, price, shop через запятую или all", type=openapi.TYPE_STRING),
         ],
         responses={200: ObjProductsSerializers(many=True)}
     )
     def get(self, request, product_id):
         obj = get_object_or_404(Obj, id=product_id)
-        queryset = ObjProduct.objects.filter(obj=obj).order_by("id")
+        queryset = obj_listings(obj)
 
         queryset = self.filter_queryset(queryset)
 
+        facets = None
+        facet_names = parse_facets(request.query_params.get("facets"))
+        if facet_names:
+            filter_params = {
+                name: request.query_params.getlist(name) for name in request.query_params
+                if name not in self.unfiltered_params
+            }
+            facets = get_facets(queryset, facet_names, {"obj": obj.id, **filter_params})
+
         page = self.paginate_queryset(queryset)
         if page is not None:
             serializer = self.get_serializer(page, many=True, context={"request": request})
-            return self.get_paginated_response(serializer.data)
+            response = self.get_paginated_response(serializer.data)
+            if facets is not None:
+                response.data["facets"] = facets
+            return response
 
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -0,0 +1,111 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest, Round
+
+from brick_main.models import ObjProduct, ObjProductPrice
+from brick_main.product.listings import listings_changed
+
+BATCH_SIZE = 1000
+
+
+def apply_items(owner, items):
+    """Точечные изменения по id продукта: количество — bulk_update, цены — bulk_update/bulk_create."""
+    products = {
+        product.id: product
+        for product in ObjProduct.objects.filter(owner=owner, id__in={item['id'] for item in items}).only('id', 'obj', 'quantity')
+    }
+    not_found = sorted({item['id'] for item in items} - set(products))
+
+    changed_products = []
+    new_prices = {}
+    for item in items:
+        product = products.get(item['id'])
+        if product is None:
+            continue
+        if 'quantity' in item:
+            product.quantity = item['quantity']
+            changed_products.append(product)
+        if 'price' in item:
+            new_prices[(product.id, item['currency'])] = item['price']
+
+    ObjProduct.objects.bulk_update(changed_products, ['quantity'], batch_size=BATCH_SIZE)
+
+    prices = list(ObjProductPrice.objects.filter(
+        product_id__in={product_id for product_id, _ in new_prices},
+        currency_id__in={currency_id for _, currency_id in new_prices},
+    ).only('id', 'product', 'currency', 'price'))
+    updated_prices = [price for price in prices if (price.product_id, price.currency_id) in new_prices]
+    for price in updated_prices:
+        price.price = new_prices[(price.product_id, price.currency_id)]
+    ObjProductPrice.objects.bulk_update(updated_prices, ['price'], batch_size=BATCH_SIZE)
+
+    # Цены в валюте, которой у продукта ещё не было, добавляются
+    existing = {(price.product_id, price.currency_id) for price in updated_prices}
+    created_prices = ObjProductPrice.objects.bulk_create([
+        ObjProductPrice(product_id=product_id, currency_id=currency_id, price=value)
+        for (product_id, currency_id), value in new_prices.items()
+        if (product_id, currency_id) not in existing
+    ], batch_size=BATCH_SIZE)
+
+    touched = {product.obj_id for product in changed_products}
+    touched.update(products[product_id].obj_id for product_id, _ in new_prices)
+    listings_changed(*touched)
+
+    return {
+        'products_updated': len({product.id for product in changed_products}),
+        'prices_updated': len(updated_prices),
+        'prices_created': len(created_prices),
+        'not_found': not_found,
+    }
+
+
+def apply_adjustment(owner, adjustment):
+    """Изменение всех продуктов продавца под фильтрами — по одному UPDATE на цены и на количество."""
+    products = ObjProduct.objects.filter(owner=owner)
+    if 'condition' in adjustment:
+        products = products.filter(condition=adjustment['condition'])
+    if 'item_class' in adjustment:
+        products = products.filter(obj__item_class=adjustment['item_class'])
+    if 'theme' in adjustment:
+        products = products.filter(obj__in=adjustment['theme'].get_all_objects())
+    if 'shop' in adjustment:
+        products = products.filter(shop=adjustment['shop'])
+
+    products_updated = 0
+    if 'quantity_amount' in adjustment:
+        products_updated = products.update(
+            quantity=Greatest(F('quantity') + adjustment['quantity_amount'], Value(0))
+        )
+
+    prices_updated = 0
+    if 'price_percent' in adjustment or 'price_amount' in adjustment:
+        prices = ObjProductPrice.objects.filter(product__in=products, price__isnull=False)
+        if 'currency' in adjustment:
+            prices = prices.filter(currency=adjustment['currency'])
+        if 'price_percent' in adjustment:
+            new_price = Round(F('price') * (100 + adjustment['price_percent']) / 100, 2)
+        else:
+            new_price = F('price') + adjustment['price_amount']
+        prices_updated = prices.update(price=Greatest(new_price, Value(Decimal('0'))))
+
+    listings_changed(*products.values_list('obj_id', flat=True).distinct())
+
+    return {
+        'products_updated': products_updated,
+        'prices_updated': prices_updated,
+        'prices_created': 0,
+        'not_found': [],
+    }
+
+
+def apply_bulk_update(owner, data):
+    """Применяет items и adjustment в одной транзакции и возвращает сводку."""
+    summary = {'products_updated': 0, 'prices_updated': 0, 'prices_created': 0, 'not_found': []}
+    with transaction.atomic():
+        for key, apply in (('items', apply_items), ('adjustment', apply_adjustment)):
+            if data.get(key):
+                for name, value in apply(owner, data[key]).items():
+                    summary[name] += value
+    return summary
@@ -0,0 +1,257 @@
+import codecs
+import csv
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from itertools import islice
+from xml.etree.ElementTree import ParseError, iterparse
+
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from authen.models import Country
+from brick_main.models import ConditionType, Currency, ListingImportJob, Obj, ObjProduct, ObjProductPrice
+from brick_main.product.listings import listings_changed
+from brick_main.product.shipping import refresh_ship_countries
+from brick_main.shop.serializers import ListingRowSerializer
+
+logger = logging.getLogger(__name__)
+
+# Строк в одной транзакции bulk_create
+CHUNK_SIZE = 1000
+# Сколько ошибок по строкам хранить в задаче (error_count считает все)
+MAX_STORED_ERRORS = 1000
+# Задача "Выполняется" без отметки heartbeat_at дольше этого считается брошенной
+# (процесс упал) и может быть взята заново
+STALE_AFTER = timedelta(minutes=10)
+# Название по умолчанию берётся из Obj.item_name (TextField) и обрезается до длины поля
+NAME_MAX_LENGTH = ObjProduct._meta.get_field('name').max_length
+# Состояние в формате BrickLink: N — новое, U — б/у
+BRICKLINK_CONDITIONS = {'N': ConditionType.NEW, 'U': ConditionType.OLD}
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='listing-import')
+
+
+def _with_flat_price(row):
+    """Колонки price/currency (CSV, плоский JSON) превращаются в список prices."""
+    price = row.pop('price', None)
+    currency = row.pop('currency', None)
+    if price not in (None, '') and 'prices' not in row:
+        row['prices'] = [{'price': price, 'currency': currency}]
+    return row
+
+
+def iter_csv_rows(file):
+    """Строки CSV с заголовком; страны — ID через запятую, одна цена на строку."""
+    for row in csv.DictReader(codecs.iterdecode(file, 'utf-8-sig')):
+        row = {key.strip(): (value or '').strip() for key, value in row.items() if key}
+        countries = row.pop('country', '')
+        row['country'] = [value for value in countries.split(',') if value.strip()]
+        yield _with_flat_price(row), None
+
+
+def iter_jsonl_rows(file):
+    """Один JSON-объект на строку; цены — списком prices или полями price/currency."""
+    for line in codecs.iterdecode(file, 'utf-8-sig'):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as error:
+            yield None, {'row': [f"Неверный JSON: {error}"]}
+            continue
+        if not isinstance(row, dict):
+            yield None, {'row': ["Ожидается JSON-объект"]}
+            continue
+        yield _with_flat_price(row), None
+
+
+def iter_xml_rows(file):
+    """
+    Инвентарь в формате BrickLink: <INVENTORY><ITEM>...</ITEM></INVENTORY>.
+    Разбирается потоково, обработанные элементы сразу освобождаются.
+    """
+    for event, element in iterparse(file, events=('end',)):
+        if element.tag != 'ITEM':
+            continue
+        item = {child.tag: (child.text or '').strip() for child in element}
+        element.clear()
+
+        row = {
+            'obj': item.get('ITEMID', ''),
+            'quantity': item.get('QTY', ''),
+            'description': item.get('DESCRIPTION') or item.get('REMARKS', ''),
+            'condition': BRICKLINK_CONDITIONS.get(item.get('CONDITION', ''), item.get('CONDITION')),
+            'country': [],
+        }
+        if item.get('PRICE'):
+            row['prices'] = [{'price': item['PRICE'], 'currency': item.get('CURRENCY')}]
+        yield row, None
+
+
+PARSERS = {
+    ListingImportJob.Format.CSV: iter_csv_rows,
+    ListingImportJob.Format.JSONL: iter_jsonl_rows,
+    ListingImportJob.Format.XML: iter_xml_rows,
+}
+
+
+class ImportContext:
+    """Справочники, которые проверяются без запроса на каждую строку."""
+
+    def __init__(self, job):
+        self.job = job
+        self.countries = set(Country.objects.values_list('id', flat=True))
+        self.currencies = {}
+        for currency_id, name in Currency.objects.values_list('id', 'name'):
+            self.currencies[str(currency_id)] = currency_id
+            self.currencies[name.lower()] = currency_id
+
+    def resolve_currency(self, value):
+        if value in (None, ''):
+            return self.job.currency_id
+        return self.currencies.get(str(value).strip().lower())
+
+
+def import_chunk(context, rows):
+    """
+    Проверяет и сохраняет пачку строк [(номер, строка, ошибка разбора)].
+    Возвращает (количество созданных предложений, ошибки по строкам).
+    """
+    errors = []
+    valid = []
+    for number, row, parse_error in rows:
+        if parse_error:
+            errors.append({'row': number, 'errors': parse_error})
+            continue
+        serializer = ListingRowSerializer(data=row)
+        if not serializer.is_valid():
+            errors.append({'row': number, 'errors': serializer.errors})
+            continue
+        valid.append((number, serializer.validated_data))
+
+    obj_names = dict(
+        Obj.objects.filter(id__in={data['obj'] for _, data in valid}).values_list('id', 'item_name')
+    )
+
+    products, countries, prices = [], [], []
+    for number, data in valid:
+        row_errors = {}
+        if data['obj'] not in obj_names:
+            row_errors['obj'] = [f"Объект '{data['obj']}' не найден"]
+        unknown_countries = [country for country in data['country'] if country not in context.countries]
+        if unknown_countries:
+            row_errors['country'] = [f"Неизвестные страны: {unknown_countries}"]
+        row_prices = []
+        for price in data['prices']:
+            currency_id = context.resolve_currency(price.get('currency'))
+            if currency_id is None:
+                row_errors.setdefault('currency', []).append(f"Неизвестная валюта: '{price.get('currency') or ''}'")
+            row_prices.append((price['price'], currency_id))
+        if row_errors:
+            errors.append({'row': number, 'errors': row_errors})
+            continue
+
+        products.append(ObjProduct(
+            name=(data.get('name') or obj_names[data['obj']] or data['obj'])[:NAME_MAX_LENGTH],
+            description=data['description'],
+            image=data.get('image') or None,
+            quantity=data['quantity'],
+            condition=data.get('condition') or None,
+            obj_id=data['obj'],
+            shop_id=context.job.shop_id,
+            owner_id=context.job.owner_id,
+        ))
+        countries.append(set(data['country']))
+        prices.append(row_prices)
+
+    if not products:
+        return 0, errors
+
+    CountryLink = ObjProduct.country.through
+    with transaction.atomic():
+        created = ObjProduct.objects.bulk_create(products)
+        CountryLink.objects.bulk_create([
+            CountryLink(objproduct_id=product.id, country_id=country_id)
+            for product, country_ids in zip(created, countries)
+            for country_id in country_ids
+        ])
+        ObjProductPrice.objects.bulk_create([
+            ObjProductPrice(product_id=product.id, price=price, currency_id=currency_id)
+            for product, row_prices in zip(created, prices)
+            for price, currency_id in row_prices
+        ])
+        # bulk_create не вызывает сигналы, поэтому страны доставки пересчитываются явно
+        refresh_ship_countries([product.id for product in created])
+        listings_changed(*{product.obj_id for product in created})
+    return len(created), errors
+
+
+def claimable_jobs():
+    """Задачи, которые можно взять: в очереди и брошенные упавшим процессом."""
+    Status = ListingImportJob.Status
+    stale = Q(heartbeat_at__lt=timezone.now() - STALE_AFTER) | Q(heartbeat_at__isnull=True)
+    return ListingImportJob.objects.filter(Q(status=Status.PENDING) | Q(stale, status=Status.RUNNING))
+
+
+def run_import(job_id):
+    """
+    Выполняет задачу загрузки. Задачу, которую уже выполняет другой воркер, пропускает.
+    Брошенная задача продолжается с первой несохранённой строки.
+    """
+    claimed = claimable_jobs().filter(id=job_id).update(
+        status=ListingImportJob.Status.RUNNING, heartbeat_at=timezone.now()
+    )
+    if not claimed:
+        return
+
+    job = ListingImportJob.objects.select_related('currency').get(id=job_id)
+    jobs = ListingImportJob.objects.filter(id=job_id)
+    stored_errors = list(job.errors)
+    try:
+        context = ImportContext(job)
+        with job.file.open('rb') as file:
+            numbered = (
+                (number, row, error)
+                for number, (row, error) in enumerate(PARSERS[job.format](file), start=1)
+            )
+            # Строки до processed_rows уже сохранены: пачка и счётчики коммитятся вместе
+            numbered = islice(numbered, job.processed_rows, None)
+            while True:
+                rows = list(islice(numbered, CHUNK_SIZE))
+                if not rows:
+                    break
+                with transaction.atomic():
+                    created, errors = import_chunk(context, rows)
+                    stored_errors.extend(errors[:MAX_STORED_ERRORS - len(stored_errors)])
+                    jobs.update(
+                        processed_rows=F('processed_rows') + len(rows),
+                        created_count=F('created_count') + created,
+                        error_count=F('error_count') + len(errors),
+                        errors=stored_errors,
+                        heartbeat_at=timezone.now(),
+                    )
+        jobs.update(status=ListingImportJob.Status.DONE, finished_at=timezone.now())
+    except (ParseError, UnicodeDecodeError, csv.Error) as error:
+        # Файл нельзя дочитать: уже сохранённые пачки остаются, задача завершается с ошибкой
+        stored_errors.append({'row': None, 'errors': {'file': [str(error)]}})
+        jobs.update(status=ListingImportJob.Status.FAILED, errors=stored_errors, finished_at=timezone.now())
+    except Exception:
+        logger.exception("Listing import job %s failed", job_id)
+        stored_errors.append({'row': None, 'errors': {'file': ["Внутренняя ошибка загрузки"]}})
+        jobs.update(status=ListingImportJob.Status.FAILED, errors=stored_errors, finished_at=timezone.now())
+
+
+def _run_in_worker(job_id):
+    try:
+        run_import(job_id)
+    finally:
+        # Соединение принадлежит потоку пула и иначе осталось бы открытым
+        connection.close()
+
+
+def start_import(job):
+    """Ставит задачу в фоновый пул после коммита транзакции, в которой она создана."""
+    transaction.on_commit(lambda: _executor.submit(_run_in_worker, job.id))
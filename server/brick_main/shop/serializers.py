@@ -1,6 +1,8 @@
 from rest_framework import serializers
 
-from brick_main.models import Shops, Deliverys, Currency, Country, ObjProduct, ObjProductPrice
+from brick_main.models import Shops, Deliverys, Currency, Country, ObjProduct, ObjProductPrice, ConditionType, ListingImportJob, Theme
+from brick_main.product.listings import listings_changed
+from utils.query_planning import PlannedListSerializer
 
 
 class DeliverysSerializer(serializers.ModelSerializer):
@@ -77,7 +79,7 @@ class ShopProductPriceSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = ObjProductPrice
-        fields = ['id', 'product', 'price', 'currency']
+        fields = ['id', 'product', 'price', 'currency', 'normalized_price']
 
 
 class ShopProductsSerializers(serializers.ModelSerializer):
@@ -86,6 +88,8 @@ class ShopProductsSerializers(serializers.ModelSerializer):
     class Meta:
         model = ObjProduct
         fields = ['id', 'name', 'description', 'image', 'quantity', 'condition', 'obj', 'country', 'product_price', 'shop', 'owner']
+        list_serializer_class = PlannedListSerializer
+        prefetch_related = ['product_price', 'country']
 
 
 class ShopProductSerializers(serializers.ModelSerializer):
@@ -107,11 +111,13 @@ class ShopProductSerializers(serializers.ModelSerializer):
         for price in price_data:
             ObjProductPrice.objects.create(product=product, **price)
 
+        listings_changed(product.obj_id)
         return product
 
     def update(self, instance, validated_data):
         price_data = validated_data.pop('product_price', [])
         countries = validated_data.pop('country', [])
+        previous_obj_id = instance.obj_id
 
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
@@ -124,4 +130,128 @@ class ShopProductSerializers(serializers.ModelSerializer):
             for price in price_data:
                 ObjProductPrice.objects.create(product=instance, **price)
 
-        return instance
\ No newline at end of file
+        listings_changed(previous_obj_id, instance.obj_id)
+        return instance
+
+
+class ListingPriceRowSerializer(serializers.Serializer):
+    price = serializers.DecimalField(max_digits=12, decimal_places=2, min_value=0)
+    # ID или название валюты; если не указана — валюта по умолчанию из задачи загрузки
+    currency = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+
+
+class ListingRowSerializer(serializers.Serializer):
+    """
+    Строка массовой загрузки предложений. Проверяются только значения самой строки:
+    ссылки на объекты, страны и валюты проверяются пачкой (см. shop/bulk_upload.py).
+    """
+    obj = serializers.CharField(max_length=24)
+    name = serializers.CharField(max_length=250, required=False, allow_blank=True)
+    description = serializers.CharField(max_length=250, required=False, allow_blank=True, default='')
+    image = serializers.URLField(required=False, allow_blank=True, allow_null=True)
+    quantity = serializers.IntegerField(min_value=0)
+    condition = serializers.ChoiceField(choices=ConditionType.choices, required=False, allow_blank=True, allow_null=True)
+    country = serializers.ListField(child=serializers.IntegerField(), required=False, default=list)
+    prices = ListingPriceRowSerializer(many=True, required=False, default=list)
+
+
+class ListingImportJobSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = ListingImportJob
+        fields = [
+            'id', 'shop', 'currency', 'format', 'status', 'processed_rows',
+            'created_count', 'error_count', 'errors', 'created_at', 'finished_at',
+        ]
+
+
+class ListingImportJobCreateSerializer(serializers.ModelSerializer):
+    format = serializers.ChoiceField(choices=ListingImportJob.Format.choices, required=False)
+
+    class Meta:
+        model = ListingImportJob
+        fields = ['id', 'file', 'format', 'shop', 'currency']
+
+    def validate_shop(self, shop):
+        if shop is not None and shop.owner_id != self.context["owner"].id:
+            raise serializers.ValidationError("Магазин принадлежит другому продавцу")
+        return shop
+
+    def validate(self, attrs):
+        if not attrs.get('format'):
+            # Формат по расширению файла
+            extension = attrs['file'].name.rsplit('.', 1)[-1].lower()
+            if extension not in ListingImportJob.Format.values:
+                raise serializers.ValidationError({"format": "Не удалось определить формат файла, укажите format"})
+            attrs['format'] = extension
+        return attrs
+
+    def create(self, validated_data):
+        return ListingImportJob.objects.create(owner=self.context["owner"], **validated_data)
+
+
+class BulkListingItemListSerializer(serializers.ListSerializer):
+
+    def validate(self, attrs):
+        # Валюты проверяются одним запросом на весь список
+        currencies = {item['currency'] for item in attrs if 'currency' in item}
+        unknown = currencies - set(Currency.objects.filter(id__in=currencies).values_list('id', flat=True))
+        if unknown:
+            raise serializers.ValidationError(f"Неизвестные валюты: {sorted(unknown)}")
+        return attrs
+
+
+class BulkListingItemSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=0, required=False)
+    price = serializers.DecimalField(max_digits=12, decimal_places=2, min_value=0, required=False)
+    currency = serializers.IntegerField(required=False)
+
+    class Meta:
+        list_serializer_class = BulkListingItemListSerializer
+
+    def validate(self, attrs):
+        if 'price' in attrs and 'currency' not in attrs:
+            raise serializers.ValidationError({"currency": "Укажите валюту изменяемой цены"})
+        return attrs
+
+
+class BulkListingAdjustmentSerializer(serializers.Serializer):
+    # Какие продукты продавца меняются
+    condition = serializers.ChoiceField(choices=ConditionType.choices, required=False)
+    item_class = serializers.IntegerField(required=False)
+    theme = serializers.PrimaryKeyRelatedField(queryset=Theme.objects.all(), required=False)
+    shop = serializers.PrimaryKeyRelatedField(queryset=Shops.objects.all(), required=False)
+    currency = serializers.PrimaryKeyRelatedField(queryset=Currency.objects.all(), required=False)
+    # Как меняются: цена на процент или на сумму, количество на число единиц
+    price_percent = serializers.DecimalField(max_digits=6, decimal_places=2, min_value=-100, required=False)
+    price_amount = serializers.DecimalField(max_digits=12, decimal_places=2, required=False)
+    quantity_amount = serializers.IntegerField(required=False)
+
+    def validate(self, attrs):
+        if 'price_percent' in attrs and 'price_amount' in attrs:
+            raise serializers.ValidationError("Укажите либо price_percent, либо price_amount")
+        if not {'price_percent', 'price_amount', 'quantity_amount'} & set(attrs):
+            raise serializers.ValidationError("Не указано изменение: price_percent, price_amount или quantity_amount")
+        return attrs
+
+
+class ShopProductsBulkUpdateSerializer(serializers.Serializer):
+    """
+    items — точечные изменения цены (в валюте currency) и количества по id продукта;
+    adjustment — изменение всех продуктов продавца, подходящих под фильтры.
+    """
+    items = BulkListingItemSerializer(many=True, required=False, max_length=10000)
+    adjustment = BulkListingAdjustmentSerializer(required=False)
+
+    def validate(self, attrs):
+        if not attrs.get('items') and not attrs.get('adjustment'):
+            raise serializers.ValidationError("Передайте items или adjustment")
+        return attrs
+
+
+class ShopProductsBulkUpdateResultSerializer(serializers.Serializer):
+    products_updated = serializers.IntegerField()
+    prices_updated = serializers.IntegerField()
+    prices_created = serializers.IntegerField()
+    not_found = serializers.ListField(child=serializers.IntegerField())
@@ -1,20 +1,29 @@
 from rest_framework.views import APIView
+from rest_framework.generics import GenericAPIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.parsers import MultiPartParser, FormParser
 
 from django.shortcuts import get_object_or_404
 
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
+from utils.pagination import CatalogPagination
 from utils.permissions import IsSellerRole
 
-from brick_main.models import Deliverys, Shops, ObjProduct
+from brick_main.idempotency import idempotent, idempotency_key_parameter
+from brick_main.models import Deliverys, Shops, ObjProduct, ListingImportJob
+from brick_main.product.listings import listings_changed
+from brick_main.shop.bulk_upload import start_import
+from brick_main.shop.bulk_update import apply_bulk_update
 from brick_main.shop.serializers import (
     DeliverysSerializer, ShopsSerializer, ShopSerializer, ShopIsActiveSerializer,
-    ShopProductsSerializers, ShopProductSerializers
+    ShopProductsSerializers, ShopProductSerializers,
+    ListingImportJobSerializer, ListingImportJobCreateSerializer,
+    ShopProductsBulkUpdateSerializer, ShopProductsBulkUpdateResultSerializer
 )
 
 
@@ -118,26 +127,37 @@ class ShopIsActiveView(APIView):
 
 # Shop Product
 
-class ShopProductsForSellerView(APIView):
+class ShopProductsForSellerView(GenericAPIView):
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated, IsSellerRole]
+    serializer_class = ShopProductsSerializers
+    pagination_class = CatalogPagination
 
     @swagger_auto_schema(
         tags=["Shop / Product"],
         operation_description="Продукция, На роль Продавца",
+        manual_parameters=[
+            openapi.Parameter("page", openapi.IN_QUERY, description="Номер страницы", type=openapi.TYPE_INTEGER),
+            openapi.Parameter("limit", openapi.IN_QUERY, description="Элементов на странице (по умолчанию: 10): 10 можно изменить динамически", type=openapi.TYPE_INTEGER),
+            openapi.Parameter("cursor", openapi.IN_QUERY, description="Keyset-пагинация: пустое значение — первая страница, далее значение из next", type=openapi.TYPE_STRING),
+            openapi.Parameter("count", openapi.IN_QUERY, description="count=false — без подсчёта общего количества (только next/previous)", type=openapi.TYPE_BOOLEAN),
+        ],
         responses={200: ShopProductsSerializers(many=True)}
     )
     def get(self, request):
-        objects = ObjProduct.objects.filter(owner=request.user).order_by("-id")
-        serializer = ShopProductsSerializers(objects, many=True, context={"request": request})
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        queryset = ObjProduct.objects.filter(owner=request.user).order_by("-id")
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True, context={"request": request})
+        return self.get_paginated_response(serializer.data)
 
 
     @swagger_auto_schema(
         tags=["Shop / Product"],
         operation_description="Продукты, Создать для магазина",
+        manual_parameters=[idempotency_key_parameter],
         request_body=ShopProductSerializers
     )
+    @idempotent
     def post(self, request):
         serializer = ShopProductSerializers(data=request.data, context={"owner":request.user, "request":request})
         if serializer.is_valid(raise_exception=True):
@@ -181,10 +201,68 @@ class ShopProductView(APIView):
     def delete(self, request, product_id):
         product = get_object_or_404(ObjProduct, id=product_id)
         product.delete()
+        listings_changed(product.obj_id)
         return Response({"message": "Удалить успешно"}, status=status.HTTP_204_NO_CONTENT)
 
 
 
+
+class ShopProductsBulkUploadView(APIView):
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated, IsSellerRole]
+    parser_classes = [MultiPartParser, FormParser]
+
+    @swagger_auto_schema(
+        tags=["Shop / Product"],
+        operation_description=(
+            "Массовая загрузка продуктов из файла: CSV, JSON Lines или BrickLink XML. "
+            "Файл обрабатывается в фоне, ход выполнения и ошибки по строкам — в статусе задачи"
+        ),
+        request_body=ListingImportJobCreateSerializer,
+        responses={202: ListingImportJobSerializer(many=False)}
+    )
+    def post(self, request):
+        serializer = ListingImportJobCreateSerializer(data=request.data, context={"owner": request.user, "request": request})
+        serializer.is_valid(raise_exception=True)
+        job = serializer.save()
+        start_import(job)
+        return Response(ListingImportJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
+
+class ShopProductsBulkUpdateView(APIView):
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated, IsSellerRole]
+
+    @swagger_auto_schema(
+        tags=["Shop / Product"],
+        operation_description=(
+            "Массовое изменение цен и количества продуктов продавца в одной транзакции: "
+            "items — точечно по id, adjustment — на процент/сумму по фильтрам (состояние, класс объекта, тематика, магазин)"
+        ),
+        request_body=ShopProductsBulkUpdateSerializer,
+        responses={200: ShopProductsBulkUpdateResultSerializer(many=False)}
+    )
+    def post(self, request):
+        serializer = ShopProductsBulkUpdateSerializer(data=request.data, context={"request": request})
+        serializer.is_valid(raise_exception=True)
+        summary = apply_bulk_update(request.user, serializer.validated_data)
+        return Response(ShopProductsBulkUpdateResultSerializer(summary).data, status=status.HTTP_200_OK)
+
+class ListingImportJobView(APIView):
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated, IsSellerRole]
+
+    @swagger_auto_schema(
+        tags=["Shop / Product"],
+        operation_description="Статус массовой загрузки продуктов: прогресс и ошибки по строкам",
+        responses={200: ListingImportJobSerializer(many=False)}
+    )
+    def get(self, request, job_id):
+        job = get_object_or_404(ListingImportJob, id=job_id, owner=request.user)
+        serializer = ListingImportJobSerializer(job, context={"request": request})
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
 class ShopProductsView(APIView):
 
     @swagger_auto_schema(
@@ -193,6 +271,6 @@ class ShopProductsView(APIView):
         responses={200: ShopProductsSerializers(many=True)}
     )
     def get(self, request, shop_id):
-        objects = ObjProduct.objects.filter(shop=shop_idr).order_by("-id")
+        objects = ObjProduct.objects.filter(shop=shop_id).order_by("-id")
         serializer = ShopProductsSerializers(objects, many=True, context={"request": request})
         return Response(serializer.data, status=status.HTTP_200_OK)
\ No newline at end of file
@@ -0,0 +1,121 @@
+from django.db.models.signals import pre_save, post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from brick_main.models import ExchangeRate, ObjProduct, Order, OrderItem, Shops, Links, Theme, ThemeLinks, ThemeObjLinks
+from brick_main.analitik.rollup import schedule_product_day_refresh, schedule_shop_day_refresh
+from brick_main.cache import schedule_version_bump
+from brick_main.product.inventory import schedule_inventory_rebuild
+from brick_main.product.pricing import schedule_renormalize
+from brick_main.product.facets import LISTINGS
+from brick_main.product.shipping import schedule_ship_countries_refresh, schedule_shop_ship_countries_refresh
+from brick_main.category.closure import schedule_closure_rebuild
+from brick_main.category.counts import theme_object_link_added, theme_object_link_removed, schedule_recount
+from brick_main.category.tree import THEME_TREE
+
+
+@receiver([post_save, post_delete], sender=Links)
+def links_changed(sender, instance, **kwargs):
+    schedule_inventory_rebuild(instance.set_id)
+
+
+@receiver([post_save, post_delete], sender=Theme)
+def theme_changed(sender, instance, created=False, **kwargs):
+    if created:
+        schedule_closure_rebuild(instance.id)
+    schedule_version_bump(THEME_TREE)
+
+
+@receiver([post_save, post_delete], sender=ThemeLinks)
+def theme_links_changed(sender, instance, **kwargs):
+    # Порядок важен: счётчики пересчитываются по уже пересобранному замыканию
+    schedule_closure_rebuild(instance.low_id)
+    schedule_recount(instance.high_id)
+    schedule_version_bump(THEME_TREE)
+
+
+@receiver(pre_save, sender=ThemeObjLinks)
+def theme_obj_links_saving(sender, instance, **kwargs):
+    # Тематика связи до изменения: её предки тоже пересчитываются
+    instance._previous_high_id = None
+    if instance.pk:
+        instance._previous_high_id = sender.objects.filter(pk=instance.pk).values_list('high_id', flat=True).first()
+
+
+@receiver(post_save, sender=ThemeObjLinks)
+def theme_obj_links_saved(sender, instance, created, **kwargs):
+    if created:
+        theme_object_link_added(instance)
+    else:
+        previous = getattr(instance, '_previous_high_id', None)
+        schedule_recount(*{instance.high_id, previous} - {None})
+    schedule_version_bump(THEME_TREE)
+
+
+@receiver(post_delete, sender=ThemeObjLinks)
+def theme_obj_links_deleted(sender, instance, **kwargs):
+    theme_object_link_removed(instance)
+    schedule_version_bump(THEME_TREE)
+
+
+@receiver([post_save, post_delete], sender=ExchangeRate)
+def exchange_rate_changed(sender, instance, **kwargs):
+    schedule_renormalize(instance.currency_id)
+    # Ценовые диапазоны фасетов считаются по цене в базовой валюте
+    schedule_version_bump(LISTINGS)
+
+
+@receiver(post_save, sender=ObjProduct)
+def obj_product_saved(sender, instance, **kwargs):
+    # Мог смениться магазин, от которого берутся страны доставки
+    schedule_ship_countries_refresh([instance.id])
+
+
+@receiver(m2m_changed, sender=ObjProduct.country.through)
+def obj_product_countries_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        schedule_ship_countries_refresh([instance.id])
+    elif pk_set:
+        schedule_ship_countries_refresh(pk_set)
+
+
+@receiver(post_save, sender=Shops)
+def shop_saved(sender, instance, created, **kwargs):
+    if not created:
+        schedule_shop_ship_countries_refresh(instance.id)
+
+
+@receiver(m2m_changed, sender=Shops.country.through)
+def shop_countries_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear') and not reverse:
+        schedule_shop_ship_countries_refresh(instance.id)
+
+
+@receiver([post_save, post_delete], sender=Order)
+def order_changed(sender, instance, created=False, **kwargs):
+    # Новый заказ учитывает record_order_sales (orders/serializers.py) без пересчёта всего дня;
+    # статус и удаление заказов пересчитывают день в сводках магазина (analitik/rollup.py)
+    if not created:
+        schedule_shop_day_refresh(instance)
+
+
+@receiver(pre_save, sender=OrderItem)
+def order_item_saving(sender, instance, **kwargs):
+    # Продукт позиции до изменения: его продажи за день тоже пересчитываются
+    instance._previous_product_id = None
+    if instance.pk:
+        instance._previous_product_id = sender.objects.filter(pk=instance.pk).values_list('product_id', flat=True).first()
+
+
+@receiver([post_save, post_delete], sender=OrderItem)
+def order_item_changed(sender, instance, **kwargs):
+    try:
+        order = instance.order
+    except Order.DoesNotExist:
+        # Позиция удаляется каскадом вместе с заказом: день пересчитает order_changed
+        return
+    schedule_shop_day_refresh(order)
+    # Позиции нового заказа учитывает record_order_sales; здесь — правки и удаления
+    previous = getattr(instance, '_previous_product_id', None)
+    schedule_product_day_refresh(order, *{instance.product_id, previous} - {None})
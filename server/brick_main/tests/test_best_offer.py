@@ -0,0 +1,89 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import Group
+from django.db import connection
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from authen.models import CustomUser
+from brick_main.models import Currency, ExchangeRate, Obj, Shops
+
+
+class ObjBestOfferDefaultsTests(TestCase):
+    def test_obj_insert_without_best_offer_columns_uses_db_default(self):
+        # Так вставляет import_catalog: только колонки из файла
+        with connection.cursor() as cursor:
+            cursor.execute("INSERT INTO obj (id, item_name, item_class) VALUES ('3001', 'Brick 2 x 4', 1)")
+        obj = Obj.objects.get(id='3001')
+        self.assertEqual(obj.best_offer_quantity, 0)
+        self.assertIsNone(obj.best_price)
+
+
+class BestOfferTests(TestCase):
+    """Лучшее предложение объекта пересчитывается при записи предложений, заказах и смене курсов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = CustomUser.objects.create_user(username='seller')
+        cls.seller.groups.add(Group.objects.create(name='seller'))
+        cls.buyer = CustomUser.objects.create_user(username='buyer')
+        cls.shop = Shops.objects.create(name='Shop', address='Address', owner=cls.seller)
+        for obj_id in ('3001', '3002', '3003'):
+            Obj.objects.create(id=obj_id, item_name=f'Brick {obj_id}', item_class=1)
+        cls.usd = Currency.objects.create(name='USD')
+        cls.eur = Currency.objects.create(name='EUR')
+        ExchangeRate.objects.create(currency=cls.usd, rate=1)
+        cls.eur_rate = ExchangeRate.objects.create(currency=cls.eur, rate=2)
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def add_listing(self, obj_id, price, currency, quantity=1):
+        self.client.force_authenticate(self.seller)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/shop/prodcut/for/seller/', {
+                'name': 'Brick', 'description': 'Brick', 'quantity': quantity, 'obj': obj_id, 'shop': self.shop.id,
+                'country': [], 'product_price': [{'price': price, 'currency': currency.id}],
+            }, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data['id']
+
+    def best_offer(self, obj_id):
+        return Obj.objects.values_list('best_offer_id', 'best_price', 'best_offer_quantity').get(id=obj_id)
+
+    def test_cheapest_offer_in_stock(self):
+        in_stock = self.add_listing('3001', 10, self.usd, quantity=2)
+        self.add_listing('3001', 5, self.usd, quantity=0)
+        # 8 EUR по курсу 2 — 16 в базовой валюте
+        self.add_listing('3001', 8, self.eur)
+        self.assertEqual(self.best_offer('3001'), (in_stock, Decimal(10), 2))
+
+    def test_order_of_last_unit_switches_offer(self):
+        cheapest = self.add_listing('3001', 5, self.usd)
+        next_best = self.add_listing('3001', 7, self.usd, quantity=3)
+        self.assertEqual(self.best_offer('3001')[0], cheapest)
+
+        self.client.force_authenticate(self.buyer)
+        response = self.client.post('/api/orders/for/user/', {
+            'shop': self.shop.id, 'items_product': [{'product': cheapest, 'quantity': 1}],
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.best_offer('3001'), (next_best, Decimal(7), 3))
+
+    def test_rate_change_recomputes_offer(self):
+        usd_offer = self.add_listing('3001', 10, self.usd)
+        eur_offer = self.add_listing('3001', 4, self.eur)
+        self.assertEqual(self.best_offer('3001')[:2], (eur_offer, Decimal(8)))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.eur_rate.rate = 3
+            self.eur_rate.save()
+        self.assertEqual(self.best_offer('3001')[:2], (usd_offer, Decimal(10)))
+
+    def test_price_ordering_skips_objects_without_offers(self):
+        self.add_listing('3001', 10, self.usd)
+        self.add_listing('3003', 4, self.usd)
+        for ordering, expected in (('price', ['3003', '3001']), ('-price', ['3001', '3003'])):
+            with self.subTest(ordering=ordering):
+                response = self.client.get('/api/products/', {'ordering': ordering})
+                self.assertEqual([item['id'] for item in response.data['results']], expected)
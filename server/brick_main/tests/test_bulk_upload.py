@@ -0,0 +1,63 @@
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from authen.models import CustomUser
+from brick_main.models import ListingImportJob, Obj, ObjProduct, Shops
+from brick_main.shop.bulk_upload import STALE_AFTER, run_import
+
+CSV = b"obj,quantity\n" + b"".join(f"3001,{quantity}\n".encode() for quantity in range(1, 6))
+
+
+class ListingImportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp()
+        cls.enterClassContext(override_settings(MEDIA_ROOT=cls.media_root))
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = CustomUser.objects.create_user(username='seller')
+        cls.shop = Shops.objects.create(name='Shop', address='Address', owner=cls.seller)
+        Obj.objects.create(id='3001', item_name='Brick ' + 'x' * 300, item_class=1)
+
+    def create_job(self, **fields):
+        return ListingImportJob.objects.create(
+            owner=self.seller, shop=self.shop, format=ListingImportJob.Format.CSV,
+            file=SimpleUploadedFile('listings.csv', CSV), **fields
+        )
+
+    def test_long_obj_name_is_truncated(self):
+        job = self.create_job()
+        run_import(job.id)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.created_count, job.error_count), (ListingImportJob.Status.DONE, 5, 0))
+        self.assertEqual({len(name) for name in ObjProduct.objects.values_list('name', flat=True)}, {250})
+
+    def test_abandoned_job_resumes_after_saved_rows(self):
+        # Процесс упал после двух сохранённых строк
+        job = self.create_job(
+            status=ListingImportJob.Status.RUNNING, processed_rows=2, created_count=2,
+            heartbeat_at=timezone.now() - STALE_AFTER - timedelta(minutes=1),
+        )
+        run_import(job.id)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed_rows, job.created_count), (ListingImportJob.Status.DONE, 5, 5))
+        self.assertEqual(sorted(ObjProduct.objects.values_list('quantity', flat=True)), [3, 4, 5])
+
+    def test_running_job_is_not_taken_twice(self):
+        job = self.create_job(status=ListingImportJob.Status.RUNNING, heartbeat_at=timezone.now())
+        run_import(job.id)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed_rows), (ListingImportJob.Status.RUNNING, 0))
+        self.assertFalse(ObjProduct.objects.exists())
@@ -0,0 +1,106 @@
+import threading
+import time
+
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from authen.models import CustomUser
+from brick_main.analitik.rollup import record_order_sales, refresh_product_days
+from brick_main.models import DailySales, Obj, ObjProduct, Order, OrderItem, Shops
+
+
+def sales():
+    return dict(DailySales.objects.values_list('product_id', 'quantity'))
+
+
+class DailySalesDriftTests(TestCase):
+    """Правки и удаления позиций и заказов пересчитывают daily_sales."""
+
+    @classmethod
+    def setUpTestData(cls):
+        seller = CustomUser.objects.create_user(username='seller')
+        cls.buyer = CustomUser.objects.create_user(username='buyer')
+        cls.shop = Shops.objects.create(name='Shop', address='Address', owner=seller)
+        obj = Obj.objects.create(id='3001', item_name='Brick 2 x 4', item_class=1)
+        cls.first, cls.second = [
+            ObjProduct.objects.create(name=name, description='', quantity=100, obj=obj, shop=cls.shop, owner=seller)
+            for name in ('First', 'Second')
+        ]
+
+    def place_order(self, quantity):
+        # Как OrderCreateSerializer: позиции bulk_create, продажи — record_order_sales
+        with self.captureOnCommitCallbacks(execute=True):
+            order = Order.objects.create(user=self.buyer, shop=self.shop)
+            item = OrderItem.objects.bulk_create([OrderItem(order=order, product=self.first, quantity=quantity)])[0]
+            record_order_sales(order)
+        return order, item
+
+    def test_new_order_is_counted_once(self):
+        self.place_order(3)
+        self.place_order(2)
+        self.assertEqual(sales(), {self.first.id: 5})
+        self.assertEqual(DailySales.objects.get().day, timezone.localdate())
+
+    def test_item_quantity_change(self):
+        _, item = self.place_order(3)
+        with self.captureOnCommitCallbacks(execute=True):
+            item.quantity = 1
+            item.save()
+        self.assertEqual(sales(), {self.first.id: 1})
+
+    def test_item_moved_to_another_product(self):
+        _, item = self.place_order(3)
+        with self.captureOnCommitCallbacks(execute=True):
+            item.product = self.second
+            item.save()
+        self.assertEqual(sales(), {self.second.id: 3})
+
+    def test_item_delete(self):
+        self.place_order(2)
+        _, item = self.place_order(3)
+        with self.captureOnCommitCallbacks(execute=True):
+            item.delete()
+        self.assertEqual(sales(), {self.first.id: 2})
+
+    def test_order_delete(self):
+        self.place_order(2)
+        order, _ = self.place_order(3)
+        with self.captureOnCommitCallbacks(execute=True):
+            order.delete()
+        self.assertEqual(sales(), {self.first.id: 2})
+
+
+class DailySalesConcurrencyTests(TransactionTestCase):
+    def test_parallel_refresh_of_one_product_day(self):
+        seller = CustomUser.objects.create_user(username='seller')
+        shop = Shops.objects.create(name='Shop', address='Address', owner=seller)
+        obj = Obj.objects.create(id='3001', item_name='Brick 2 x 4', item_class=1)
+        product = ObjProduct.objects.create(name='Brick', description='', quantity=100, obj=obj, shop=shop, owner=seller)
+        order = Order.objects.create(user=seller, shop=shop)
+        OrderItem.objects.bulk_create([OrderItem(order=order, product=product, quantity=3)])
+        product_day = (product.id, timezone.localdate(order.created_at))
+
+        barrier = threading.Barrier(2)
+        errors = []
+
+        def refresh():
+            try:
+                barrier.wait()
+                with transaction.atomic():
+                    refresh_product_days([product_day])
+                    # Держит транзакцию открытой, пока второй пересчёт удаляет и вставляет строку
+                    time.sleep(0.3)
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=refresh) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(sales(), {product.id: 3})
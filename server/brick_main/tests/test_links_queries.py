@@ -0,0 +1,49 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from brick_main.models import Images, Links, Obj
+
+
+class LinksListQueriesTests(TestCase):
+    """Количество запросов списков связей не зависит от размера страницы."""
+
+    endpoints = [
+        '/api/product/SET-1/parts/1/',
+        '/api/product/SET-1/set/1/',
+        '/api/product/SET-1/minitfigure/1/',
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        Obj.objects.create(id='SET-1', item_name='Set', item_class=2)
+        parts = Obj.objects.bulk_create([
+            Obj(id=f'PART-{number}', item_name=f'Part {number}', item_class=1) for number in range(25)
+        ])
+        Links.objects.bulk_create([
+            Links(set_id='SET-1', part=part, set_class=2, part_class=1, part_count=1, color=color)
+            for part in parts
+            for color in ('Red', 'Blue')
+        ])
+        Images.objects.bulk_create([
+            Images(item=part, color=color, address=f'https://img.example/{part.id}/{color}.png')
+            for part in parts
+            for color in ('Red', 'Blue')
+        ])
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_query_count_is_independent_of_page_size(self):
+        for url in self.endpoints:
+            for limit in (1, 10, 50):
+                with self.subTest(url=url, limit=limit):
+                    # COUNT, страница связей, изображения страницы
+                    with self.assertNumQueries(3):
+                        response = self.client.get(url, {'limit': limit})
+                    self.assertEqual(response.status_code, 200)
+                    self.assertEqual(len(response.data['results']), limit)
+
+    def test_each_link_gets_image_of_its_own_color(self):
+        response = self.client.get(self.endpoints[0], {'limit': 50})
+        for link in response.data['results']:
+            self.assertEqual([image['color'] for image in link['part_images']], [link['color']])
@@ -0,0 +1,64 @@
+from django.contrib.auth.models import Group
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from authen.models import Country, CustomUser
+from brick_main.models import Currency, Obj, ObjProduct, ObjProductPrice, Order, OrderItem, Shops
+
+
+class ListQueriesTests(TestCase):
+    """Количество запросов списков заказов и предложений не зависит от числа строк."""
+
+    rows = 10
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = CustomUser.objects.create_user(username='seller')
+        cls.seller.groups.add(Group.objects.create(name='seller'))
+        cls.buyer = CustomUser.objects.create_user(username='buyer')
+        cls.shop = Shops.objects.create(name='Shop', address='Address', owner=cls.seller)
+        cls.obj = Obj.objects.create(id='3001', item_name='Brick 2 x 4', item_class=1)
+        cls.currency = Currency.objects.create(name='USD')
+        cls.countries = [Country.objects.create(name=name) for name in ('Germany', 'France')]
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def add_listing(self):
+        product = ObjProduct.objects.create(
+            name='Brick', description='', quantity=10, obj=self.obj, shop=self.shop, owner=self.seller
+        )
+        product.country.set(self.countries)
+        ObjProductPrice.objects.create(product=product, currency=self.currency, price=1)
+        return product
+
+    def add_order(self):
+        order = Order.objects.create(user=self.buyer, shop=self.shop)
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=self.add_listing(), quantity=1) for _ in range(2)
+        ])
+
+    def assert_same_queries_for_one_and_many_rows(self, user, url, add_row):
+        self.client.force_authenticate(user)
+        add_row()
+        with CaptureQueriesContext(connection) as one_row:
+            response = self.client.get(url, {'limit': self.rows})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 1)
+
+        for _ in range(self.rows - 1):
+            add_row()
+        with self.assertNumQueries(len(one_row)):
+            response = self.client.get(url, {'limit': self.rows})
+        self.assertEqual(len(response.data['results']), self.rows)
+
+    def test_orders_for_seller(self):
+        self.assert_same_queries_for_one_and_many_rows(self.seller, '/api/order/for/seller/', self.add_order)
+
+    def test_orders_for_user(self):
+        self.assert_same_queries_for_one_and_many_rows(self.buyer, '/api/orders/for/user/', self.add_order)
+
+    def test_shop_products_for_seller(self):
+        self.assert_same_queries_for_one_and_many_rows(self.seller, '/api/shop/prodcut/for/seller/', self.add_listing)
@@ -0,0 +1,55 @@
+import threading
+
+from django.db import connection
+from django.test import TransactionTestCase
+from rest_framework.test import APIClient
+
+from authen.models import CustomUser
+from brick_main.models import Obj, ObjProduct, Order, Shops
+
+
+class OrderStockConcurrencyTests(TransactionTestCase):
+    """Параллельные заказы одного предложения не продают больше остатка."""
+
+    stock = 5
+    buyers = 20
+
+    def setUp(self):
+        seller = CustomUser.objects.create_user(username='seller')
+        self.shop = Shops.objects.create(name='Shop', address='Address', owner=seller)
+        obj = Obj.objects.create(id='3001', item_name='Brick 2 x 4', item_class=1)
+        self.product = ObjProduct.objects.create(
+            name='Brick', description='', quantity=self.stock, obj=obj, shop=self.shop, owner=seller
+        )
+        self.users = [CustomUser.objects.create_user(username=f'buyer{number}') for number in range(self.buyers)]
+
+    def test_parallel_orders_never_oversell(self):
+        barrier = threading.Barrier(self.buyers)
+        statuses = []
+        lock = threading.Lock()
+
+        def buy(user):
+            client = APIClient()
+            client.force_authenticate(user)
+            try:
+                barrier.wait()
+                response = client.post('/api/orders/for/user/', {
+                    'shop': self.shop.id,
+                    'items_product': [{'product': self.product.id, 'quantity': 1}],
+                }, format='json')
+                with lock:
+                    statuses.append(response.status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=buy, args=(user,)) for user in self.users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(statuses.count(201), self.stock)
+        self.assertEqual(statuses.count(400), self.buyers - self.stock)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 0)
+        self.assertEqual(Order.objects.count(), self.stock)
@@ -0,0 +1,59 @@
+from decimal import Decimal
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from authen.models import CustomUser
+from brick_main.models import Currency, ExchangeRate, Obj, ObjProduct, ObjProductPrice, Shops
+from brick_main.product.listings import listings_changed
+
+
+class PriceFilterWithoutRatesTests(TestCase):
+    """До загрузки курсов (load_exchange_rates) цены сравниваются как есть."""
+
+    url = '/api/obj/3001/product/'
+
+    @classmethod
+    def setUpTestData(cls):
+        seller = CustomUser.objects.create_user(username='seller')
+        shop = Shops.objects.create(name='Shop', address='Address', owner=seller)
+        cls.obj = Obj.objects.create(id='3001', item_name='Brick 2 x 4', item_class=1)
+        cls.currency = Currency.objects.create(name='USD')
+        cls.products = {}
+        with cls.captureOnCommitCallbacks(execute=True):
+            for price in (5, 15, 30):
+                product = ObjProduct.objects.create(
+                    name=f'Brick {price}', description='', quantity=1, obj=cls.obj, shop=shop, owner=seller
+                )
+                ObjProductPrice.objects.create(product=product, currency=cls.currency, price=price)
+                cls.products[price] = product.id
+            # Как после записи предложений через API
+            listings_changed(cls.obj.id)
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def ids(self, params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return [item['id'] for item in response.data['results']]
+
+    def test_normalized_price_falls_back_to_price(self):
+        self.assertEqual(
+            sorted(ObjProductPrice.objects.values_list('normalized_price', flat=True)),
+            [Decimal(5), Decimal(15), Decimal(30)],
+        )
+
+    def test_price_range_and_ordering(self):
+        self.assertEqual(self.ids({'min_price': 10, 'max_price': 20}), [self.products[15]])
+        self.assertEqual(self.ids({'ordering': '-price'}), [self.products[30], self.products[15], self.products[5]])
+
+    def test_best_offer(self):
+        self.obj.refresh_from_db()
+        self.assertEqual(self.obj.best_price, Decimal(5))
+        self.assertEqual(self.obj.best_offer_id, self.products[5])
+
+    def test_loaded_rate_replaces_fallback(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ExchangeRate.objects.create(currency=self.currency, rate=2)
+        self.assertEqual(self.ids({'min_price': 20, 'max_price': 40}), [self.products[15]])
@@ -0,0 +1,47 @@
+import threading
+import time
+
+from django.db import connection, transaction
+from django.test import TransactionTestCase
+
+from authen.models import CustomUser
+from brick_main.models import Currency, Obj, ObjProduct, ObjProductPrice, PriceGuide, Shops
+from brick_main.product.price_guide import refresh_price_guides
+
+
+class PriceGuideConcurrencyTests(TransactionTestCase):
+    def test_parallel_refresh_of_one_obj(self):
+        seller = CustomUser.objects.create_user(username='seller')
+        shop = Shops.objects.create(name='Shop', address='Address', owner=seller)
+        obj = Obj.objects.create(id='3001', item_name='Brick 2 x 4', item_class=1)
+        currency = Currency.objects.create(name='USD')
+        for price in (1, 3):
+            product = ObjProduct.objects.create(
+                name='Brick', description='', quantity=1, condition='new', obj=obj, shop=shop, owner=seller
+            )
+            ObjProductPrice.objects.create(product=product, currency=currency, price=price)
+
+        barrier = threading.Barrier(2)
+        errors = []
+
+        def refresh():
+            try:
+                barrier.wait()
+                with transaction.atomic():
+                    refresh_price_guides([obj.id])
+                    # Держит транзакцию открытой, пока второй пересчёт удаляет и вставляет группы
+                    time.sleep(0.3)
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=refresh) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        guide = PriceGuide.objects.get()
+        self.assertEqual((guide.min_price, guide.max_price, guide.offer_count), (1, 3, 2))
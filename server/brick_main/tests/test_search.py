@@ -0,0 +1,42 @@
+from django.db import connection
+from django.test import TestCase
+
+from brick_main.models import Alternate, Obj
+from brick_main.product.search import search_objects
+
+
+class SearchObjectsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Obj.objects.bulk_create([
+            Obj(id=f'{number}pb01', item_name=f'Brick 2 x {number} with Stud Pattern', item_class=1)
+            for number in range(500)
+        ])
+        Obj.objects.create(id='3001', item_name='Brick 2 x 4', item_class=1)
+        Alternate.objects.create(id_id='3001', item_id='3001old')
+
+    def test_matches_id_alternate_id_and_name(self):
+        self.assertEqual(search_objects(Obj.objects.all(), '3001').first().id, '3001')
+        self.assertEqual(search_objects(Obj.objects.all(), '3001old').first().id, '3001')
+        self.assertIn('3001', search_objects(Obj.objects.all(), 'brick').values_list('id', flat=True))
+        # Опечатка находится по триграммам
+        self.assertTrue(search_objects(Obj.objects.all(), 'patern').exists())
+
+    def test_query_filters_on_search_indexes(self):
+        sql = str(search_objects(Obj.objects.all(), 'brick').query)
+        self.assertIn('"obj"."search_vector" @@', sql)
+        self.assertIn('%>', sql)
+
+    def test_plan_uses_gin_indexes(self):
+        queryset = search_objects(Obj.objects.all(), 'brick')
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE obj')
+            # На тестовом объёме таблица целиком помещается в страницу, и Postgres
+            # выбрал бы seq scan; проверяется, что индексный план вообще возможен
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute(f'EXPLAIN {sql}', params)
+            plan = '\n'.join(row[0] for row in cursor.fetchall())
+        self.assertIn('obj_search_vector_gin', plan)
+        self.assertIn('obj_item_name_trgm', plan)
+        self.assertNotIn('Seq Scan on obj', plan)
@@ -0,0 +1,36 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from authen.models import Country, CustomUser
+from brick_main.models import Obj, ObjProduct, Shops
+
+
+class ShipCountriesTests(TestCase):
+    """ship_countries: страны предложения, иначе страны магазина; фильтр country ищет по ним."""
+
+    @classmethod
+    def setUpTestData(cls):
+        seller = CustomUser.objects.create_user(username='seller')
+        cls.germany, cls.france, cls.spain = [
+            Country.objects.create(name=name) for name in ('Germany', 'France', 'Spain')
+        ]
+        Obj.objects.create(id='3001', item_name='Brick 2 x 4', item_class=1)
+        with cls.captureOnCommitCallbacks(execute=True):
+            shop = Shops.objects.create(name='Shop', address='Address', owner=seller)
+            shop.country.set([cls.germany])
+            cls.own = ObjProduct.objects.create(name='Own', description='', quantity=1, obj_id='3001', shop=shop, owner=seller)
+            cls.own.country.set([cls.france, cls.spain])
+            cls.inherited = ObjProduct.objects.create(name='Shop', description='', quantity=1, obj_id='3001', shop=shop, owner=seller)
+
+    def test_ship_countries(self):
+        self.own.refresh_from_db()
+        self.inherited.refresh_from_db()
+        self.assertEqual(self.own.ship_countries, sorted([self.france.id, self.spain.id]))
+        self.assertEqual(self.inherited.ship_countries, [self.germany.id])
+
+    def test_country_filter(self):
+        client = APIClient()
+        for country, expected in ((self.spain, [self.own.id]), (self.germany, [self.inherited.id])):
+            with self.subTest(country=country.name):
+                response = client.get('/api/obj/3001/product/', {'country': country.id})
+                self.assertEqual([item['id'] for item in response.data['results']], expected)
@@ -0,0 +1,122 @@
+import threading
+import time
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from authen.models import CustomUser
+from brick_main.analitik.rollup import record_order_sales, refresh_shop_days
+from brick_main.models import Obj, ObjProduct, Order, OrderItem, ShopDailySales, ShopDailyStats, Shops, Statusorder
+
+
+def stats():
+    return {
+        status_id: (orders, units, revenue)
+        for status_id, orders, units, revenue in ShopDailyStats.objects.values_list('status_id', 'orders', 'units', 'revenue')
+    }
+
+
+def product_sales():
+    return {product_id: (units, revenue) for product_id, units, revenue in ShopDailySales.objects.values_list('product_id', 'units', 'revenue')}
+
+
+class ShopRollupTests(TestCase):
+    """Новые заказы прибавляются к сводкам магазина, правки и удаления пересчитывают день."""
+
+    @classmethod
+    def setUpTestData(cls):
+        seller = CustomUser.objects.create_user(username='seller')
+        cls.buyer = CustomUser.objects.create_user(username='buyer')
+        cls.shop = Shops.objects.create(name='Shop', address='Address', owner=seller)
+        cls.new, cls.paid = Statusorder.objects.create(name='new'), Statusorder.objects.create(name='paid')
+        obj = Obj.objects.create(id='3001', item_name='Brick 2 x 4', item_class=1)
+        cls.first, cls.second = [
+            ObjProduct.objects.create(name=name, description='', quantity=100, obj=obj, shop=cls.shop, owner=seller)
+            for name in ('First', 'Second')
+        ]
+
+    def place_order(self, *items, status=None):
+        # Как OrderCreateSerializer: позиции bulk_create, сводки — record_order_sales
+        with self.captureOnCommitCallbacks(execute=True):
+            order = Order.objects.create(user=self.buyer, shop=self.shop, status=status)
+            OrderItem.objects.bulk_create([
+                OrderItem(order=order, product=product, quantity=quantity, price=Decimal('2.50'))
+                for product, quantity in items
+            ])
+            record_order_sales(order)
+        return order
+
+    def test_new_orders_are_added_without_rescanning_the_day(self):
+        self.place_order((self.first, 2), status=self.new)
+        with CaptureQueriesContext(connection) as queries:
+            self.place_order((self.first, 1), (self.second, 4), status=self.new)
+        self.assertFalse([query['sql'] for query in queries if 'DELETE' in query['sql']])
+        self.assertEqual(stats(), {self.new.id: (2, 7, Decimal('17.50'))})
+        self.assertEqual(product_sales(), {
+            self.first.id: (3, Decimal('7.50')),
+            self.second.id: (4, Decimal('10.00')),
+        })
+        self.assertEqual(ShopDailyStats.objects.get().day, timezone.localdate())
+
+    def test_orders_without_status_share_one_row(self):
+        self.place_order((self.first, 2))
+        self.place_order((self.first, 3))
+        self.assertEqual(stats(), {None: (2, 5, Decimal('12.50'))})
+
+    def test_status_change_moves_the_order(self):
+        self.place_order((self.first, 2), status=self.new)
+        order = self.place_order((self.first, 3), status=self.new)
+        with self.captureOnCommitCallbacks(execute=True):
+            order.status = self.paid
+            order.save()
+        self.assertEqual(stats(), {
+            self.new.id: (1, 2, Decimal('5.00')),
+            self.paid.id: (1, 3, Decimal('7.50')),
+        })
+
+    def test_order_delete(self):
+        self.place_order((self.first, 2), status=self.new)
+        order = self.place_order((self.first, 3), (self.second, 1), status=self.new)
+        with self.captureOnCommitCallbacks(execute=True):
+            order.delete()
+        self.assertEqual(stats(), {self.new.id: (1, 2, Decimal('5.00'))})
+        self.assertEqual(product_sales(), {self.first.id: (2, Decimal('5.00'))})
+
+
+class ShopRollupConcurrencyTests(TransactionTestCase):
+    def test_parallel_refresh_of_one_shop_day(self):
+        seller = CustomUser.objects.create_user(username='seller')
+        shop = Shops.objects.create(name='Shop', address='Address', owner=seller)
+        obj = Obj.objects.create(id='3001', item_name='Brick 2 x 4', item_class=1)
+        product = ObjProduct.objects.create(name='Brick', description='', quantity=100, obj=obj, shop=shop, owner=seller)
+        order = Order.objects.create(user=seller, shop=shop)
+        OrderItem.objects.bulk_create([OrderItem(order=order, product=product, quantity=3, price=Decimal('2.00'))])
+        shop_day = (shop.id, timezone.localdate(order.created_at))
+
+        barrier = threading.Barrier(2)
+        errors = []
+
+        def refresh():
+            try:
+                barrier.wait()
+                with transaction.atomic():
+                    refresh_shop_days([shop_day])
+                    # Держит транзакцию открытой, пока второй пересчёт удаляет и вставляет строки
+                    time.sleep(0.3)
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=refresh) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(stats(), {None: (1, 3, Decimal('6.00'))})
+        self.assertEqual(product_sales(), {product.id: (3, Decimal('6.00'))})
@@ -0,0 +1,68 @@
+import threading
+import time
+
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+
+from brick_main.models import Obj, Theme, ThemeLinks, ThemeObjLinks
+
+
+def create_tree():
+    """Корень 1 с дочерними тематиками 2 и 3."""
+    root, left, right = (Theme.objects.create(id=theme_id, collection_name=f'Theme {theme_id}') for theme_id in (1, 2, 3))
+    ThemeLinks.objects.create(high=root, low=left)
+    ThemeLinks.objects.create(high=root, low=right)
+    return root, left, right
+
+
+def total_counts():
+    return dict(Theme.objects.values_list('id', 'total_objects_count'))
+
+
+class ThemeCountsTests(TestCase):
+    def test_moving_link_recounts_old_and_new_theme(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            root, left, right = create_tree()
+        obj = Obj.objects.create(id='3001', item_name='Brick', item_class=1)
+        link = ThemeObjLinks.objects.create(high=left, obj=obj)
+        self.assertEqual(total_counts(), {1: 1, 2: 1, 3: 0})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            link.high = right
+            link.save()
+        self.assertEqual(total_counts(), {1: 1, 2: 0, 3: 1})
+
+    def test_theme_insert_without_counts_uses_db_default(self):
+        # Так вставляет import_catalog: только колонки из файла
+        with connection.cursor() as cursor:
+            cursor.execute("INSERT INTO theme (id, collection_name) VALUES (10, 'Imported')")
+        self.assertEqual(Theme.objects.get(id=10).total_objects_count, 0)
+
+
+class ThemeCountsConcurrencyTests(TransactionTestCase):
+    def test_parallel_links_under_sibling_themes_count_object_once(self):
+        root, left, right = create_tree()
+        obj = Obj.objects.create(id='3001', item_name='Brick', item_class=1)
+        barrier = threading.Barrier(2)
+        errors = []
+
+        def link(theme):
+            try:
+                barrier.wait()
+                with transaction.atomic():
+                    ThemeObjLinks.objects.create(high=theme, obj=obj)
+                    # Держит транзакцию открытой, пока вторая вставка проверяет предков
+                    time.sleep(0.3)
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=link, args=(theme,)) for theme in (left, right)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(total_counts(), {1: 1, 2: 1, 3: 1})
@@ -0,0 +1,67 @@
+from unittest import mock
+
+from django.db import DatabaseError, connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from brick_main.analitik.trending import Trending
+from brick_main.models import TrendingCheckpoint
+
+
+def local_trending():
+    trending = Trending()
+    # Фоновая точка писала бы из другого соединения, мимо транзакции теста
+    trending.checkpoint_scheduled = True
+    return trending
+
+
+class TrendingFirstRequestTests(TestCase):
+    """Первый запрос процесса читает контрольную точку, но не блокирует и не пишет её."""
+
+    def setUp(self):
+        # Другой процесс уже сохранил свои продажи
+        other = local_trending()
+        other.record([(1, 10, 5), (1, 20, 2)])
+        other.checkpoint()
+        self.saved = {record.window: record.updated_at for record in TrendingCheckpoint.objects.all()}
+
+    def test_first_top_loads_checkpoint_read_only(self):
+        trending = local_trending()
+        trending.record([(1, 20, 4)])
+
+        with CaptureQueriesContext(connection) as queries:
+            top, total, _ = trending.top('hour', 1, 10)
+
+        self.assertEqual(top, [(20, 6), (10, 5)])
+        self.assertEqual(total, 11)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('FOR UPDATE', queries[0]['sql'])
+        self.assertEqual({record.window: record.updated_at for record in TrendingCheckpoint.objects.all()}, self.saved)
+
+    def test_unsaved_sales_are_written_by_next_checkpoint(self):
+        trending = local_trending()
+        trending.record([(1, 20, 4)])
+        trending.top('hour', 1, 10)
+
+        trending.checkpoint()
+        top, total, _ = local_trending().top('day', 1, 10)
+        self.assertEqual(top, [(20, 6), (10, 5)])
+        self.assertEqual(total, 11)
+
+
+class TrendingCheckpointFailureTests(TestCase):
+    def test_failed_save_keeps_unsaved_sales(self):
+        # Строки окон уже есть: ошибка случается при записи, после того как pending взят
+        local_trending().checkpoint()
+        trending = local_trending()
+        trending.record([(1, 10, 5)])
+
+        with mock.patch.object(TrendingCheckpoint, 'save', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                trending.checkpoint()
+        self.assertEqual(list(TrendingCheckpoint.objects.values_list('buckets', flat=True)), [[], []])
+
+        trending.checkpoint()
+        top, total, _ = local_trending().top('hour', 1, 10)
+        self.assertEqual(top, [(10, 5)])
+        self.assertEqual(total, 5)
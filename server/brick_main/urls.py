@@ -1,14 +1,17 @@
 from django.urls import path
-from brick_main.category.views import CategeorysView, CategoryDetailAPIView
+from brick_main.category.views import CategeorysView, CategoryDetailAPIView, CategoryTreeView
 from brick_main.product.views import (
     ProductsView,
+    ProductsPriceGuideView,
     ProductDetaileView,
     ProductsByCategoryView,
     GetProductPatrsView,
     GetProductSetsView,
     GetProductMinigiureView,
     ProductSetDetaileView,
+    ProductSetInventoryView,
     GetProductByColorView,
+    ProductAppearsInView,
     ObjProductsView,
     ObjProductDetaileView,
 )
@@ -26,6 +29,9 @@ from brick_main.shop.views import (
     ShopIsActiveView,
     ShopProductsForSellerView,
     ShopProductView,
+    ShopProductsBulkUploadView,
+    ShopProductsBulkUpdateView,
+    ListingImportJobView,
     ShopProductsView,
 )
 from brick_main.orders.views import (
@@ -34,22 +40,26 @@ from brick_main.orders.views import (
     OrdersForuserView,
     OrderForUserView
 )
-from brick_main.analitik.views import ProductAnalyticsAPIView
+from brick_main.analitik.views import ProductAnalyticsAPIView, ShopAnalyticsAPIView, TrendingProductsAPIView
 
 
 urlpatterns = [
     # Category
     path("categorys/main/", CategeorysView.as_view()),
+    path("categorys/tree/", CategoryTreeView.as_view()),
     path("categories/<int:category_id>/", CategoryDetailAPIView.as_view()),
     # Obj
     path("products/", ProductsView.as_view()),
+    path("products/price/guide/", ProductsPriceGuideView.as_view()),
     path("product/<str:product_id>/", ProductDetaileView.as_view()),
     path("set/product/<str:product_id>/detail/", ProductSetDetaileView.as_view()),
+    path("set/product/<str:product_id>/inventory/", ProductSetInventoryView.as_view()),
     path("product/by/category/<int:category_id>/", ProductsByCategoryView.as_view()),
     path("product/<str:product_id>/parts/<int:part_id>/", GetProductPatrsView.as_view()),
     path("product/<str:product_id>/set/<int:set_id>/", GetProductSetsView.as_view()),
     path("product/<str:product_id>/minitfigure/<int:minifigure_id>/", GetProductMinigiureView.as_view()),
     path("product/by/color/<int:color_id>/", GetProductByColorView.as_view()),
+    path("product/<str:product_id>/appears/in/", ProductAppearsInView.as_view()),
     # Obj Pruduct
     path("obj/<str:product_id>/product/", ObjProductsView.as_view()),
     path("obj/product/<int:product_id>/detail/", ObjProductDetaileView.as_view()),
@@ -66,6 +76,9 @@ urlpatterns = [
     path("shop/<int:shop_id>/activate/", ShopIsActiveView.as_view()),
     path("shop/prodcut/for/seller/", ShopProductsForSellerView.as_view()),
     path("shop/product/<int:product_id>/for/seller/", ShopProductView.as_view()),
+    path("shop/product/bulk/upload/", ShopProductsBulkUploadView.as_view()),
+    path("shop/product/bulk/upload/<int:job_id>/", ListingImportJobView.as_view()),
+    path("shop/product/bulk/update/", ShopProductsBulkUpdateView.as_view()),
     path("shop/<int:shop_id>/products/", ShopProductsView.as_view()),
     # Order
     path('order/for/seller/', OrdersForSellerView.as_view()),
@@ -73,4 +86,6 @@ urlpatterns = [
     path('orders/for/user/', OrdersForuserView.as_view()),
     path('order/<int:order_id>/for/user/', OrderForUserView.as_view()),
     path('analytics/', ProductAnalyticsAPIView.as_view()),
+    path('analytics/trending/', TrendingProductsAPIView.as_view()),
+    path('analytics/shop/', ShopAnalyticsAPIView.as_view()),
 ]
\ No newline at end of file
@@ -9,6 +9,7 @@ from django.shortcuts import get_object_or_404
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
+from brick_main.idempotency import idempotent, idempotency_key_parameter
 from brick_main.models import WantedList, WantedListProduct
 from brick_main.wanted.serializers import WantedsListSerializer, WantedListSerializer, WantedListProductSerializer
 
@@ -86,8 +87,10 @@ class AddProductToWishlistAPIView(APIView):
             201: openapi.Response("Продукт добавлен", WantedListProductSerializer),
             400: "Bad Request",
         },
-        operation_description="Добавить продукт в Вишлисты пользователя"
+        operation_description="Добавить продукт в Вишлисты пользователя",
+        manual_parameters=[idempotency_key_parameter],
     )
+    @idempotent
     def post(self, request):
         serializer = WantedListProductSerializer(data=request.data)
         if serializer.is_valid():
@@ -32,6 +32,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     "rest_framework",
     "corsheaders",
     "rest_framework_simplejwt",
@@ -88,6 +89,25 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/ref/settings/#caches
+# default — свой в каждом процессе: снимок дерева категорий, фасеты и ответы идемпотентности
+# сверяются с версиями и строками в БД. analytics — общий для всех процессов: блокировки
+# пересчёта и прогрев кэша аналитики (brick_main/analitik/cache.py) работают между процессами.
+# В отдельной таблице ключей немного (тип × период), поэтому ни вытеснение, ни COUNT(*)
+# на каждую запись не задевают остальные кэши. Таблицу создаёт createcachetable
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'analytics': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'analytics_cache',
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
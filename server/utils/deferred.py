@@ -0,0 +1,24 @@
+import threading
+from functools import partial
+
+from django.db import transaction
+
+_pending = threading.local()
+
+
+def run_on_commit(callback, values):
+    """
+    Копит значения до коммита текущей транзакции и вызывает callback(values) один раз.
+    Вне транзакции callback вызывается сразу.
+    """
+    batches = getattr(_pending, 'batches', None)
+    if batches is None:
+        batches = _pending.batches = {}
+    batches.setdefault(callback, set()).update(values)
+    transaction.on_commit(partial(_flush, callback))
+
+
+def _flush(callback):
+    values = _pending.batches.pop(callback, None)
+    if values:
+        callback(values)
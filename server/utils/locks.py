@@ -0,0 +1,22 @@
+from django.db import connection
+
+# Пространства ключей pg_advisory_xact_lock, чтобы блокировки разных сводок не пересекались
+PRICE_GUIDE = 1
+DAILY_SALES = 2
+SHOP_DAYS = 3
+
+LOCK_SQL = """
+SELECT pg_advisory_xact_lock(%(namespace)s, hashtext(key))
+FROM (SELECT DISTINCT key FROM unnest(%(keys)s::text[]) AS key ORDER BY key) AS keys
+"""
+
+
+def advisory_xact_lock(namespace, keys):
+    """
+    Блокирует ключи keys до конца текущей транзакции. Ключи берутся по порядку,
+    поэтому транзакции с пересекающимися наборами ключей не попадают во взаимоблокировку.
+    """
+    keys = [str(key) for key in keys]
+    if keys:
+        with connection.cursor() as cursor:
+            cursor.execute(LOCK_SQL, {'namespace': namespace, 'keys': keys})
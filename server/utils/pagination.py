@@ -1,7 +1,175 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import BooleanField, F, Field, Func, Q, Value
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 
 class PaginationList(PageNumberPagination):
     page_size = 10
     page_size_query_param = 'limit'
-    max_page_size = 100
\ No newline at end of file
+    max_page_size = 100
+
+
+class CatalogPagination(PaginationList):
+    """
+    Пагинация для больших списков каталога.
+
+    Без дополнительных параметров работает как PaginationList. Кроме того:
+      ?cursor=     — keyset-пагинация по текущей сортировке queryset: пустое
+                     значение — первая страница, дальше значение из "next".
+                     Страница N стоит столько же, сколько первая (нет COUNT и OFFSET);
+      ?count=false — обычные номера страниц, но без COUNT(*): только next/previous.
+    """
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Неверный курсор.'
+
+    @classmethod
+    def is_requested(cls, request):
+        """Передан ли хотя бы один параметр пагинации (для эндпоинтов, где она необязательна)."""
+        params = (cls.page_query_param, cls.page_size_query_param, cls.cursor_query_param, cls.count_query_param)
+        return any(param in request.query_params for param in params)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.mode = 'page'
+
+        if self.cursor_query_param in request.query_params:
+            self.mode = 'cursor'
+            return self.paginate_keyset(queryset, request)
+
+        if request.query_params.get(self.count_query_param, '').lower() in ('false', '0'):
+            self.mode = 'nocount'
+            return self.paginate_without_count(queryset, request)
+
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.mode == 'page':
+            return super().get_paginated_response(data)
+        return Response({
+            'next': self.next_link,
+            'previous': self.previous_link,
+            'results': data,
+        })
+
+    def paginate_keyset(self, queryset, request):
+        page_size = self.get_page_size(request)
+        ordering = self.get_keyset_ordering(queryset)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            values = self.decode_cursor(cursor, len(ordering))
+            queryset = queryset.filter(self.get_keyset_condition(ordering, values))
+
+        page = list(queryset.order_by(*ordering)[:page_size + 1])
+
+        self.next_link = None
+        self.previous_link = None
+        if len(page) > page_size:
+            page = page[:page_size]
+            values = [self.get_keyset_value(page[-1], name.lstrip('-')) for name in ordering]
+            self.next_link = replace_query_param(
+                request.build_absolute_uri(), self.cursor_query_param, self.encode_cursor(values)
+            )
+        return page
+
+    def paginate_without_count(self, queryset, request):
+        page_size = self.get_page_size(request)
+        try:
+            page_number = int(request.query_params.get(self.page_query_param, 1))
+        except ValueError:
+            page_number = 0
+        if page_number < 1:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=''))
+
+        offset = (page_number - 1) * page_size
+        page = list(queryset[offset:offset + page_size + 1])
+
+        url = request.build_absolute_uri()
+        self.next_link = None
+        if len(page) > page_size:
+            self.next_link = replace_query_param(url, self.page_query_param, page_number + 1)
+
+        if page_number == 1:
+            self.previous_link = None
+        elif page_number == 2:
+            self.previous_link = remove_query_param(url, self.page_query_param)
+        else:
+            self.previous_link = replace_query_param(url, self.page_query_param, page_number - 1)
+
+        return page[:page_size]
+
+    def get_keyset_ordering(self, queryset):
+        """
+        Сортировка queryset, дополненная первичным ключом для уникальности ключа.
+        Для values()-запросов сортировка берётся как есть: её уникальность
+        обеспечивает вызывающий код.
+        """
+        ordering = list(queryset.query.order_by) or list(queryset.model._meta.ordering)
+        if not all(isinstance(name, str) for name in ordering):
+            raise NotFound(self.invalid_cursor_message)
+        if queryset.query.values_select:
+            return ordering
+
+        pk_name = queryset.model._meta.pk.name
+        ordering = [name.replace('pk', pk_name) if name.lstrip('-') == 'pk' else name for name in ordering]
+        if pk_name not in [name.lstrip('-') for name in ordering]:
+            ordering.append(pk_name)
+        return ordering
+
+    def get_keyset_condition(self, ordering, values):
+        """
+        Условие "строка после курсора".
+
+        При одном направлении сортировки — сравнение строк (ROW(a, b) > ROW(x, y)),
+        которое Postgres использует как условие по составному индексу.
+        При смешанных направлениях — эквивалентное раскрытие через OR.
+        """
+        fields = [name.lstrip('-') for name in ordering]
+        directions = {name.startswith('-') for name in ordering}
+
+        if len(directions) == 1:
+            return Func(
+                Func(*[F(name) for name in fields], function='ROW', output_field=Field()),
+                Func(*[Value(value) for value in values], function='ROW', output_field=Field()),
+                template='%(expressions)s',
+                arg_joiner=' < ' if directions.pop() else ' > ',
+                output_field=BooleanField(),
+            )
+
+        condition = Q()
+        for index, name in enumerate(ordering):
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            step = Q(**{fields[i]: values[i] for i in range(index)})
+            step &= Q(**{f'{fields[index]}__{lookup}': values[index]})
+            condition |= step
+        return condition
+
+    def get_keyset_value(self, instance, name):
+        if isinstance(instance, dict):
+            return instance[name]
+        try:
+            return getattr(instance, instance._meta.get_field(name).attname)
+        except FieldDoesNotExist:
+            return getattr(instance, name)
+
+    def encode_cursor(self, values):
+        data = json.dumps(values, cls=DjangoJSONEncoder).encode()
+        return base64.urlsafe_b64encode(data).decode()
+
+    def decode_cursor(self, cursor, length):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != length:
+            raise NotFound(self.invalid_cursor_message)
+        return values
@@ -0,0 +1,43 @@
+from django.db.models import QuerySet, prefetch_related_objects
+from rest_framework import serializers
+
+
+def get_query_plan(serializer):
+    """
+    Связи, которые нужны сериализатору: (select_related, prefetch_related) из его Meta
+    плюс связи вложенных сериализаторов с префиксом их поля.
+    """
+    meta = getattr(serializer, 'Meta', None)
+    select_related = list(getattr(meta, 'select_related', ()))
+    prefetch_related = list(getattr(meta, 'prefetch_related', ()))
+
+    for field in serializer.fields.values():
+        nested = getattr(field, 'child', field)
+        if not isinstance(nested, serializers.BaseSerializer) or field.source == '*':
+            continue
+        nested_select, nested_prefetch = get_query_plan(nested)
+        prefetch_related += [f'{field.source}__{lookup}' for lookup in nested_select + nested_prefetch]
+
+    return select_related, prefetch_related
+
+
+class PlannedListSerializer(serializers.ListSerializer):
+    """
+    Список, который перед сериализацией сам загружает связи, объявленные в Meta дочернего
+    сериализатора (select_related / prefetch_related). Число запросов не зависит от
+    размера списка:
+
+        class Meta:
+            list_serializer_class = PlannedListSerializer
+            prefetch_related = ['items_product']
+    """
+
+    def to_representation(self, data):
+        select_related, prefetch_related = get_query_plan(self.child)
+        if isinstance(data, QuerySet):
+            data = data.select_related(*select_related).prefetch_related(*prefetch_related)
+        elif select_related or prefetch_related:
+            # Уже загруженная страница пагинации: связи догружаются пачкой
+            data = list(data.all() if hasattr(data, 'all') else data)
+            prefetch_related_objects(data, *select_related, *prefetch_related)
+        return super().to_representation(data)
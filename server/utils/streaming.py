@@ -0,0 +1,41 @@
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+
+def iter_json_array(queryset, serializer_class, context=None, chunk_size=500):
+    """
+    JSON-массив по частям. queryset читается серверным курсором по chunk_size строк,
+    prefetch_related выполняется отдельно для каждой порции, поэтому память не
+    зависит от размера выборки.
+    """
+    yield '['
+    chunk = []
+    separator = ''
+    for instance in queryset.iterator(chunk_size=chunk_size):
+        chunk.append(instance)
+        if len(chunk) == chunk_size:
+            yield separator + _encode_chunk(chunk, serializer_class, context)
+            separator = ','
+            chunk = []
+    if chunk:
+        yield separator + _encode_chunk(chunk, serializer_class, context)
+    yield ']'
+
+
+def iter_json_object(data, key, items):
+    """JSON-объект data, в котором значение key (массив) выдаётся потоком из items."""
+    prefix = json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False)[:-1]
+    yield prefix + (', ' if data else '') + json.dumps(key) + ': '
+    yield from items
+    yield '}'
+
+
+def streaming_json_response(chunks):
+    return StreamingHttpResponse(chunks, content_type='application/json')
+
+
+def _encode_chunk(chunk, serializer_class, context):
+    data = serializer_class(chunk, many=True, context=context or {}).data
+    return ','.join(json.dumps(item, cls=DjangoJSONEncoder, ensure_ascii=False) for item in data)